@@ -0,0 +1,93 @@
+"""
+Microbenchmarks of the embed engine against the previous implementation of
+BotClient.text_splitter and BotClient.inter_send.
+
+Run from the root of the repository with:
+    python -m benchmarks.embed_packing
+"""
+import timeit
+
+import disnake
+
+from packages.utils import embeds as embed_engine
+
+LINE = "`Field:   ` some value that a command printed into a panel"
+
+
+def legacy_text_splitter(text: str, code_block: bool = False) -> list[str]:
+    blocks = []
+    block = ''
+    for i in text.split('\n'):
+        if (len(i) + len(block)) > embed_engine.EMBED_DESCRIPTION:
+            block = block.rstrip('\n')
+            if code_block:
+                blocks.append(f'```{block}```')
+            else:
+                blocks.append(block)
+            block = f'{i}\n'
+        else:
+            block += f'{i}\n'
+    if block:
+        if code_block:
+            blocks.append(f'```{block}```')
+        else:
+            blocks.append(block)
+    return blocks
+
+
+def legacy_pack(panels: list[str]) -> list[list[disnake.Embed]]:
+    total_panels = [sub_panel for panel in panels
+                    for sub_panel in legacy_text_splitter(panel)]
+    total_embeds = []
+    embeds = []
+    for index, panel in enumerate(total_panels):
+        embed = disnake.Embed(description=panel,
+                              title="Title" if index == 0 else "")
+
+        embeds_size = sum(len(embed) for embed in embeds)
+        if len(embeds) == embed_engine.EMBED_SEND_TOTAL:
+            total_embeds.append(embeds.copy())
+            embeds = []
+
+        if embeds_size + len(embed) > embed_engine.EMBED_TOTAL:
+            total_embeds.append(embeds.copy())
+            embeds = []
+
+        embeds.append(embed)
+
+    if embeds:
+        total_embeds.append(embeds)
+    return total_embeds
+
+
+def engine_pack(panels: list[str]) -> list[list[disnake.Embed]]:
+    return embed_engine.pack_embeds(
+        embed_engine.build_embeds(panels, title="Title"))
+
+
+def _report(name: str, legacy, engine, number: int) -> None:
+    legacy_time = min(timeit.repeat(legacy, number=number, repeat=5))
+    engine_time = min(timeit.repeat(engine, number=number, repeat=5))
+    print(f"{name:<28} legacy {legacy_time * 1000 / number:8.3f}ms  "
+          f"engine {engine_time * 1000 / number:8.3f}ms  "
+          f"x{legacy_time / engine_time:.2f}")
+
+
+def main() -> None:
+    for lines in (50, 1_000, 20_000):
+        text = "\n".join(LINE for _ in range(lines))
+        _report(f"text_splitter {lines} lines",
+                lambda: legacy_text_splitter(text),
+                lambda: embed_engine.text_splitter(text),
+                number=20)
+
+    for count in (10, 100, 500):
+        panels = ["\n".join(LINE for _ in range(20))] * count
+        _report(f"pack {count} panels",
+                lambda: legacy_pack(panels),
+                lambda: engine_pack(panels),
+                number=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the query throughput of a default asyncpg pool with the pool tuned by
+the database settings and the prepared hot queries.
+
+Requires the same environment variables as the bot to reach the database.
+Run from the root of the repository with:
+    python -m benchmarks.pool_throughput
+"""
+import asyncio
+import json
+import time
+
+import asyncpg
+
+from packages.config import BotMode, load_settings
+from packages.utils import crud, db
+
+WORKERS = 50
+QUERIES = 5000
+
+
+async def _init(con: asyncpg.Connection) -> None:
+    await con.set_type_codec("json", schema="pg_catalog",
+                             encoder=json.dumps, decoder=json.loads)
+
+
+async def _tuned_init(con: asyncpg.Connection) -> None:
+    await _init(con)
+    await db.prepare_statements(con)
+
+
+async def _run(pool: asyncpg.Pool) -> float:
+    remaining = QUERIES
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await crud.get_message(pool, remaining)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(WORKERS)))
+    return QUERIES / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    settings = load_settings(BotMode.DEV_MODE)
+    db.configure(settings)
+
+    pool = await asyncpg.create_pool(settings.dsn, init=_init)
+    baseline = await _run(pool)
+    await pool.close()
+
+    pool = await asyncpg.create_pool(settings.dsn, init=_tuned_init,
+                                     **settings.db_pool_args)
+    tuned = await _run(pool)
+    await pool.close()
+
+    print(f"{'default pool':<14} {baseline:10.0f} queries/s")
+    print(f"{'tuned pool':<14} {tuned:10.0f} queries/s  x{tuned / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
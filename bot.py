@@ -1,3 +1,5 @@
+import asyncio
+import time
 import traceback
 import logging
 
@@ -7,8 +9,14 @@ import disnake
 from disnake.ext import commands
 from disnake import Forbidden, MessageInteraction
 from disnake.ui import Item
-
-from packages.config import Settings, BotMode
+from disnake.webhook.async_ import async_context
+
+from packages.config import Settings
+from packages.utils import db, embeds as embed_engine
+from packages.utils.audit import CommandAuditor
+from packages.utils.dispatcher import OutboundDispatcher
+from packages.utils.maintenance import MaintenanceTracker
+from packages.utils.perf import PerfRecorder
 from packages.utils.utils import EmbedColor
 from packages.views.welcome_views import WelcomeView
 
@@ -29,53 +37,153 @@ class ViewErr(disnake.ui.View):
 
 class BotClient(commands.Bot):
     # limits
-    EMBED_TITLE = 256
-    EMBED_DESCRIPTION = 4096
-    EMBED_FOOTER = 2048
-    EMBED_AUTHOR = 256
-    EMBED_TOTAL = 6000
-    EMBED_SEND_TOTAL = 10
-
-    def __init__(self, settings: Settings, coc_client: coc.Client,
-                 pool: asyncpg.Pool, intents: disnake.Intents):
+    EMBED_TITLE = embed_engine.EMBED_TITLE
+    EMBED_DESCRIPTION = embed_engine.EMBED_DESCRIPTION
+    EMBED_FOOTER = embed_engine.EMBED_FOOTER
+    EMBED_AUTHOR = embed_engine.EMBED_AUTHOR
+    EMBED_TOTAL = embed_engine.EMBED_TOTAL
+    EMBED_SEND_TOTAL = embed_engine.EMBED_SEND_TOTAL
+
+    def __init__(self, settings: Settings, intents: disnake.Intents):
         super().__init__(
             command_prefix=settings.bot_prefix,
             description=DESCRIPTION,
             case_insensitive=True,
             intents=intents
         )
-        self.pool = pool
+        # Attached once they are healthy, see attach_pool and attach_coc_client
+        self.pool: asyncpg.Pool | None = None
+        self.coc_client: coc.Client | None = None
         self.settings = settings
-        self.coc_client = coc_client
         self.color = disnake.Color.greyple()
         self.stats_board_id = None
         self.log = logging.getLogger(f"{self.settings.log_name}.BotClient")
         self.loaded_cogs: list[str] = []
+        self._command_sync: asyncio.Task | None = None
+        self.dispatcher = OutboundDispatcher(self)
+        self.auditor = CommandAuditor(self)
+        self.maintenance = MaintenanceTracker(self)
+
+        # Instrumentation of the handlers and the Discord API time
+        self.perf = PerfRecorder()
+        self.http.request = self.perf.wrap_request(self.http.request)
+        # Interaction responses and followups bypass the HTTPClient
+        webhook_adapter = async_context.get()
+        webhook_adapter.request = self.perf.wrap_request(webhook_adapter.request)
+        self.before_slash_command_invoke(self._perf_before_slash)
+        self.after_slash_command_invoke(self._perf_after_slash)
 
         # Persistent view
         self.welcome_view_init = False
 
+        # Seconds each startup phase took
+        self.startup_timings: dict[str, float] = {}
+        self._created = time.perf_counter()
+
+        self._load_cogs()
+        self.log.info("Bot is ready to go.")
+
+    @property
+    def dependencies(self) -> set[str]:
+        """The dependencies that are currently available"""
+        dependencies = set()
+        if self.pool is not None:
+            dependencies.add("db")
+        if self.coc_client is not None:
+            dependencies.add("coc")
+        return dependencies
+
+    def _load_cogs(self) -> bool:
+        """Load the cogs whose dependencies are available, returns True if any was loaded"""
+        available = self.dependencies
+        loaded = False
         for extension in self.settings.cogs_list:
+            if extension in self.loaded_cogs:
+                continue
+
+            missing = self.settings.get_cog_requirements(extension) - available
+            if missing:
+                self.log.debug(f"{extension} is waiting on {', '.join(sorted(missing))}")
+                continue
+
             try:
                 self.load_extension(f"packages.cogs.{extension}")
                 self.log.debug(f"{extension} loaded successfully...")
                 self.loaded_cogs.append(extension)
-            except Exception as extension:
+                loaded = True
+            except Exception:
                 self.log.error(f"Failed to load extension {extension}.",
                                exc_info=True)
+        return loaded
 
-        self.log.info("Bot is ready to go.")
+    def _load_gated_cogs(self) -> None:
+        """
+        Load the cogs unlocked by a dependency. The startup sync may already
+        have run without them, so their application commands are synced
+        explicitly once the bot is ready.
+        """
+        if self._load_cogs():
+            self.schedule_command_sync()
 
-    async def on_ready(self):
-        activity = disnake.Activity(type=disnake.ActivityType.watching,
-                                    name="you write code")
-        await self.change_presence(activity=activity)
+    def schedule_command_sync(self) -> None:
+        """
+        Sync the application commands added or removed after startup once
+        the bot is ready. disnake has no public API for it, the sync relies
+        on the internals of the disnake version pinned in requirements.txt.
+        """
+        # A sync still waiting on the gateway picks up these commands as well
+        if self._command_sync is not None and not self._command_sync.done() and not self.is_ready():
+            return
+        self._command_sync = asyncio.create_task(self._sync_commands())
+
+    async def _sync_commands(self) -> None:
+        await self.wait_until_ready()
+        try:
+            await self._sync_application_commands()
+            self.log.debug("Application commands synced")
+        except disnake.HTTPException:
+            self.log.error("Could not sync the application commands", exc_info=True)
+
+    def attach_pool(self, pool: asyncpg.Pool) -> None:
+        """Make the database available and load the cogs gated on it"""
+        self.pool = pool
+        self._load_gated_cogs()
 
         # Init the welcome view to activate the listener
         if not self.welcome_view_init:
             self.welcome_view_init = True
             self.add_view(WelcomeView(self))
 
+    def attach_coc_client(self, coc_client: coc.Client) -> None:
+        """Make the Clash API available and load the cogs gated on it"""
+        self.coc_client = coc_client
+        self._load_gated_cogs()
+
+    def report_startup(self) -> None:
+        """Log the timing of each startup phase once all of them are done"""
+        if not {"dependencies", "gateway"} <= self.startup_timings.keys():
+            return
+
+        panel = "\n".join(f"`{phase + ':':<12}` {seconds:.2f}s"
+                          for phase, seconds in self.startup_timings.items())
+        self.log.info(f"Startup timings\n{panel}\n"
+                      f"`{'Cogs:':<12}` {', '.join(self.loaded_cogs)}")
+
+    async def on_ready(self):
+        activity = disnake.Activity(type=disnake.ActivityType.watching,
+                                    name="you write code")
+        await self.change_presence(activity=activity)
+        self.auditor.start()
+
+        if "gateway" not in self.startup_timings:
+            self.startup_timings["gateway"] = time.perf_counter() - self._created
+            self.report_startup()
+
+    async def close(self) -> None:
+        await self.auditor.stop()
+        await self.dispatcher.close()
+        await super().close()
+
     async def on_resume(self):
         self.log.debug("Resuming connection...")
 
@@ -83,51 +191,41 @@ class BotClient(commands.Bot):
                                inter: disnake.ApplicationCommandInteraction
                                ) -> None:
         """
-        Function logs all the commands made by the users
+        Function logs all the commands made by the users. The command is only
+        buffered here, the auditor posts the digest in the background.
 
         :param inter: disnake.ApplicationCommandInteraction
         :return:
         """
+        self.auditor.record(inter)
 
-        space = 0
-        if inter.options:
-            space = max(len(option) + 1 for option in inter.options.keys())
-
-        if space < 9:
-            space = 9  # Length of the 'Command: ' key
-
-        name = f"{inter.author.name}"
-        source = inter.channel.jump_url if isinstance(inter.channel, disnake.TextChannel) else inter.channel.id
-        msg = (
-            f"`{'User:':<{space}}` {name}\n"
-            f"`{'Source:':<{space}}` {source}\n"
-            f"`{'Command:':<{space}}` {inter.data.name}\n"
-        )
+    async def _perf_before_slash(self,
+                                 inter: disnake.ApplicationCommandInteraction) -> None:
+        self.perf.start("slash", inter.data.name)
 
-        for option, data in inter.options.items():
-            option = f"{option}:"
+    async def _perf_after_slash(self,
+                                inter: disnake.ApplicationCommandInteraction) -> None:
+        self.perf.finish()
 
-            if isinstance(data, disnake.Member):
-                data: disnake.Member
-                name = f"{data.name}"
-                msg += f"`{option:<{space}}` {name}\n"
-            else:
-                msg += f"`{option:<{space}}` {data}\n"
-
-        self.log.warning(f"{msg}")
-
-        if self.settings.mode == BotMode.LIVE_MODE:
-            channel = self.get_channel(self.settings.get_channel("mod-log"))
-            embeds = await self.inter_send(
-                inter,
-                panel=msg,
-                title="Command Log",
-                author=inter.author,
-                color=EmbedColor.WARNING,
-                return_embed=True,
-                flatten_list=True
-            )
-            await channel.send(embed=embeds[0])
+    async def _run_event(self, coro, event_name: str, *args, **kwargs) -> None:
+        """
+        Override of disnake.Client._run_event to time every listener. Each
+        listener already runs in its own task so the span is isolated.
+        """
+        name = getattr(coro, "__qualname__", event_name)
+        span = self.perf.start("listener", name)
+        try:
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self.perf.record_error("listener", name)
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+        finally:
+            self.perf.finish(span)
 
     async def on_error(self, event, *args, **kwargs):
         self.log.error(traceback.format_exc())
@@ -144,6 +242,8 @@ class BotClient(commands.Bot):
         :param inter: disnake.ApplicationCommandInteraction
         :return:
         """
+        self.perf.record_error("slash", inter.data.name)
+
         # Catch all
         err_msg = "".join(
             traceback.format_exception(type(error),
@@ -154,6 +254,15 @@ class BotClient(commands.Bot):
         # Catch all errors within command logic
         if isinstance(error, commands.CommandInvokeError):
             original = error.original
+            # The circuit breaker is open, nothing to log per command
+            if isinstance(original, db.DatabaseUnavailable):
+                await self.inter_send(inter,
+                                      panel="The database is unreachable right now, "
+                                            "please try again in a minute.",
+                                      title="DATABASE UNAVAILABLE",
+                                      color=EmbedColor.ERROR)
+                return
+
             # Catch errors such as roles not found
             if isinstance(original, disnake.InvalidData):
                 await self.inter_send(inter, panel=original.args[0],
@@ -231,28 +340,22 @@ class BotClient(commands.Bot):
         if not description:
             raise commands.BadArgument("No value to encapsulate in a embed")
 
-        blocks = await self.text_splitter(description, code_block)
-        embed_list = [disnake.Embed(
+        embed_list = embed_engine.build_embeds(
+            [description],
             title=f'{title}',
-            description=blocks[0],
-            color=color.value
-        )]
-        for i in blocks[1:]:
-            embed_list.append(disnake.Embed(
-                description=i,
-                color=color.value
-            ))
-        if footnote:
-            embed_list[-1].set_footer(text=self.settings.version)
-        if author:
-            embed_list[0].set_author(name=author[0], icon_url=author[1])
+            color=color,
+            code_block=code_block,
+            footer=self.settings.version if footnote else "",
+            author_name=author[0] if author else None,
+            author_icon=author[1] if author else None
+        )
 
         if _return:
             return embed_list
 
         else:
-            for i in embed_list:
-                await ctx.send(embed=i)
+            for embeds in embed_engine.pack_embeds(embed_list):
+                await ctx.send(embeds=embeds)
         return
 
     async def inter_send(self,
@@ -283,57 +386,14 @@ class BotClient(commands.Bot):
         :param inter: The Interaction object
         :param panels: Optional list of panels to send
         """
-        total_panels = []
-        input_panels = []
-
-        if panels:
-            for i in panels:
-                input_panels.append(i)
-        else:
-            input_panels.append(panel)
-
-        for panel in input_panels:
-            for sub_panel in await self.text_splitter(panel, code_block):
-                total_panels.append(sub_panel)
-
-        last_index = len(total_panels) - 1
-        total_embeds = []
-        embeds = []
-        author_set = False
-        for index, panel in enumerate(total_panels):
-            embed = disnake.Embed(
-                description=panel,
-                color=color.value,
-                title=title if index == 0 else "",
-            )
-
-            if index == 0:
-                if author and not author_set:
-                    author_set = True
-                    embed.set_author(
-                        name=author.display_name,
-                        icon_url=author.avatar.url if author.avatar else None
-                    )
-
-            if index == last_index:
-                if footer != "":
-                    embed.set_footer(text=footer)
-
-            # If the current embed is going to make the embeds block exceed
-            # to send size, then create a new embed block
-            embeds_size = sum(len(embed) for embed in embeds)
-            if len(embeds) == BotClient.EMBED_SEND_TOTAL:
-                total_embeds.append(embeds.copy())
-                embeds = []
-
-            if embeds_size + len(embed) > BotClient.EMBED_TOTAL:
-                total_embeds.append(embeds.copy())
-                embeds = []
-
-            embeds.append(embed)
-
-        if embeds:
-            total_embeds.append(embeds)
+        total_embeds = embed_engine.pack_embeds(embed_engine.build_embeds(
+            panels if panels else [panel],
+            title=title,
+            color=color,
+            code_block=code_block,
+            footer=footer,
+            author=author
+        ))
 
         if return_embed:
             if flatten_list:
@@ -354,24 +414,38 @@ class BotClient(commands.Bot):
             else:
                 await send_func(embeds=embeds)
 
+    def queue_send(self,
+                   channel: disnake.abc.Messageable,
+                   panel: str = "",
+                   panels: list[str] | None = None,
+                   title: str = "",
+                   color: EmbedColor = EmbedColor.INFO,
+                   code_block: bool = False,
+                   footer: str = "",
+                   author: disnake.Member = None) -> None:
+        """
+        Queue the embeds on the outbound dispatcher instead of awaiting the
+        send. Use this for logs where the caller does not need the message.
+
+        :param channel: Channel to send the embeds to
+        :param panel: Text to send
+        :param panels: Optional list of panels to send
+        :param title: The optional title of the embed
+        :param color: Color to use for the embed
+        :param code_block: If the text should be in a code block
+        :param footer: Optional footer to use
+        :param author: Optional author to send
+        """
+        self.dispatcher.enqueue(channel, embed_engine.build_embeds(
+            panels if panels else [panel],
+            title=title,
+            color=color,
+            code_block=code_block,
+            footer=footer,
+            author=author
+        ))
+
     @staticmethod
     async def text_splitter(text: str, code_block: bool = False) -> list[str]:
         """Split text into blocks and return a list of blocks"""
-        blocks = []
-        block = ''
-        for i in text.split('\n'):
-            if (len(i) + len(block)) > BotClient.EMBED_DESCRIPTION:
-                block = block.rstrip('\n')
-                if code_block:
-                    blocks.append(f'```{block}```')
-                else:
-                    blocks.append(block)
-                block = f'{i}\n'
-            else:
-                block += f'{i}\n'
-        if block:
-            if code_block:
-                blocks.append(f'```{block}```')
-            else:
-                blocks.append(block)
-        return blocks
+        return embed_engine.text_splitter(text, code_block)
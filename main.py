@@ -2,6 +2,8 @@ import argparse
 import asyncio
 import json
 import logging
+import time
+from typing import Awaitable, Callable, TypeVar
 
 import asyncpg
 import coc
@@ -9,8 +11,15 @@ import disnake
 
 from bot import BotClient
 from packages.config import Settings, BotMode, init_tables, load_settings
+from packages.utils import db
 from packages.utils.logging_setup import BotLogger
 
+STARTUP_ATTEMPTS = 5
+STARTUP_BACKOFF = 2
+STARTUP_BACKOFF_MAX = 30
+
+T = TypeVar("T")
+
 
 def _bot_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -44,58 +53,118 @@ def _get_settings() -> Settings:
         return load_settings(BotMode.DEV_MODE)
 
 
-async def _get_pool(settings: Settings) -> asyncpg.pool.Pool:
+async def _retry(phase: str,
+                 factory: Callable[[], Awaitable[T]],
+                 fatal: tuple[type[Exception], ...] = ()) -> T | None:
+    """Run a startup phase with bounded retries and exponential backoff"""
+    for attempt in range(1, STARTUP_ATTEMPTS + 1):
+        try:
+            return await factory()
+        except fatal:
+            log.critical(f"{phase} failed and will not be retried", exc_info=True)
+            return None
+        except Exception as error:
+            if attempt == STARTUP_ATTEMPTS:
+                log.critical(f"{phase} failed after {attempt} attempts", exc_info=True)
+                return None
+
+            delay = min(STARTUP_BACKOFF * 2 ** (attempt - 1), STARTUP_BACKOFF_MAX)
+            log.error(f"{phase} failed on attempt {attempt}, retrying in {delay}s: {error}")
+            await asyncio.sleep(delay)
+
+
+async def _get_pool(settings: Settings, timings: dict[str, float]) -> asyncpg.pool.Pool:
+    async def init(con):
+        """Create custom column type, json and prepare the hot queries."""
+        await con.set_type_codec("json", schema="pg_catalog",
+                                 encoder=json.dumps, decoder=json.loads)
+        await db.prepare_statements(con)
+
+    # Tables must exist before the pool connections prepare statements
+    start = time.perf_counter()
+    con = await asyncpg.connect(settings.dsn)
     try:
-        async def init(con):
-            """Create custom column type, json."""
-            await con.set_type_codec("json", schema="pg_catalog",
-                                     encoder=json.dumps, decoder=json.loads)
-
-        pool = await asyncpg.create_pool(settings.dsn, init=init)
-        if pool is None:
-            raise Exception("Unable to create pool")
-
-        async with pool.acquire() as con:
-            for table in init_tables():
+        for table in init_tables():
+            try:
                 await con.execute(table)
+            except asyncpg.UniqueViolationError:
+                # Existing rows break a new unique index, they need a manual clean up
+                log.error(f"Migration skipped, duplicate rows prevent:\n{table}", exc_info=True)
+    finally:
+        await con.close()
+    timings["migrations"] = time.perf_counter() - start
 
-        return pool
-    except Exception:
-        log.critical("Pool error", exc_info=True)
+    start = time.perf_counter()
+    db.configure(settings)
+    pool = await asyncpg.create_pool(settings.dsn, init=init,
+                                     **settings.db_pool_args)
+    if pool is None:
+        raise Exception("Unable to create pool")
+    timings["pool"] = time.perf_counter() - start
+
+    db.monitor.pool = pool
+    return pool
 
 
-async def _get_coc_client(settings: Settings) -> coc.Client:
-    coc_client = coc.Client(key_names="APIBOT Keys")
+async def _get_coc_client(settings: Settings) -> coc.EventsClient:
+    # The events client is needed for the maintenance events
+    coc_client = coc.EventsClient(key_names="APIBOT Keys")
     try:
         await coc_client.login(settings.coc_email, settings.coc_password)
         return coc_client
-
-    except coc.InvalidCredentials as err:
-        log.critical("CoC error", exc_info=True)
+    except Exception:
+        await coc_client.close()
+        raise
 
 
-def _get_bot_client(settings: Settings, coc_client: coc.Client,
-                    pool: asyncpg.Pool) -> BotClient:
+def _get_bot_client(settings: Settings) -> BotClient:
     intents = disnake.Intents.default()
     intents.message_content = True
     intents.members = True
     intents.reactions = True
     intents.emojis = True
     intents.guilds = True
+    intents.presences = True
 
     return BotClient(
         settings=settings,
-        coc_client=coc_client,
-        pool=pool,
         intents=intents
     )
 
 
+async def _start_dependencies(bot: BotClient, settings: Settings) -> None:
+    """
+    Bring up Postgres and the Clash API login concurrently while the gateway
+    connects. Each dependency is attached to the bot as soon as it is healthy
+    which loads the cogs gated on it.
+    """
+    start = time.perf_counter()
+    timings = bot.startup_timings
+
+    async def postgres() -> None:
+        phase_start = time.perf_counter()
+        pool = await _retry("Postgres", lambda: _get_pool(settings, timings))
+        timings["postgres"] = time.perf_counter() - phase_start
+        if pool is not None:
+            bot.attach_pool(pool)
+
+    async def clash_api() -> None:
+        phase_start = time.perf_counter()
+        coc_client = await _retry("CoC login", lambda: _get_coc_client(settings),
+                                  fatal=(coc.InvalidCredentials,))
+        timings["coc"] = time.perf_counter() - phase_start
+        if coc_client is not None:
+            bot.attach_coc_client(coc_client)
+
+    await asyncio.gather(postgres(), clash_api())
+    timings["dependencies"] = time.perf_counter() - start
+    bot.report_startup()
+
+
 async def main(settings: Settings) -> None:
-    pool = await _get_pool(settings)
-    coc_client = await _get_coc_client(settings)
+    bot = _get_bot_client(settings)
     log.debug("Bot initialized, starting bot...")
-    bot = _get_bot_client(settings, coc_client, pool)
+    dependencies = asyncio.create_task(_start_dependencies(bot, settings))
 
     try:
         await bot.start(settings.bot_token)
@@ -104,9 +173,13 @@ async def main(settings: Settings) -> None:
         pass  # Ignore interrupts and go to clean up
 
     finally:
+        dependencies.cancel()
+
         # Close both pool and client sessions
-        await pool.close()
-        await coc_client.close()
+        if bot.pool is not None:
+            await bot.pool.close()
+        if bot.coc_client is not None:
+            await bot.coc_client.close()
 
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 import disnake
 from disnake.ext import commands, tasks
 
-from packages.utils import utils
+from packages.utils import crud, db, perf, utils
 from packages.config import guild_ids, BotMode
 from bot import BotClient
 from packages.utils.utils import EmbedColor
@@ -29,18 +29,30 @@ class Admin(commands.Cog):
         if self.bot.settings.mode == BotMode.LIVE_MODE:
             self.prune_users_task.start()
 
+        if self.bot.settings.perf_flush_minutes:
+            self.perf_flush_task.change_interval(minutes=self.bot.settings.perf_flush_minutes)
+            self.perf_flush_task.start()
+
     @tasks.loop(hours=2)
     async def prune_users_task(self):
         count = await self._prune_users(guild=None)
         if count:
             self.log.error(f"Removed {count} inactive users from server")
 
+    @tasks.loop(minutes=5)
+    async def perf_flush_task(self):
+        metrics = perf.to_metrics(self.bot.perf.drain_interval())
+        if metrics and self.bot.pool is not None:
+            await crud.set_perf_metrics(self.bot.pool, metrics)
+
+    @perf_flush_task.before_loop
     @prune_users_task.before_loop
     async def before_loops(self):
         await self.bot.wait_until_ready()
 
     def cog_unload(self):
         self.prune_users_task.cancel()
+        self.perf_flush_task.cancel()
 
     @commands.command(name="lg", hidden=True)
     async def links_get(self, ctx, tag):
@@ -60,12 +72,14 @@ class Admin(commands.Cog):
         self.log.error('Closing connections...')
         await self.bot.send(ctx, "Logging off")
         try:
-            await self.bot.coc_client.close()
+            if self.bot.coc_client is not None:
+                await self.bot.coc_client.close()
         except Exception as error:
             self.log.critical("Could not close coc connection", exc_info=True)
 
         try:
-            await self.bot.pool.close()
+            if self.bot.pool is not None:
+                await self.bot.pool.close()
         except Exception as error:
             self.log.critical("Could not close coc connection", exc_info=True)
 
@@ -166,6 +180,101 @@ class Admin(commands.Cog):
 
         await self.bot.send(ctx, output)
 
+    @commands.check(utils.is_owner)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def perf(self,
+                   inter: disnake.ApplicationCommandInteraction,
+                   kind: str = commands.Param(
+                       default="all",
+                       choices=["all", "slash", "component", "listener"])):
+        """
+        Show the latency of the handlers since start up
+
+        Parameters
+        ----------
+        kind
+            The type of handler to show
+        """
+        metrics = [metric for metric in perf.to_metrics(self.bot.perf.stats)
+                   if kind == "all" or metric.kind == kind]
+
+        if not metrics:
+            await self.bot.inter_send(inter, panel="No handlers recorded yet")
+            return
+
+        metrics.sort(key=lambda metric: metric.wall_p95, reverse=True)
+        lines = [f"{'Handler':<32} {'Calls':>6} {'Err':>4} {'p50':>6} {'p95':>6} "
+                 f"{'1st95':>6} {'DB':>6} {'API':>6}"]
+        for metric in metrics[:40]:
+            lines.append(f"{metric.name[-32:]:<32} {metric.calls:>6} {metric.errors:>4} "
+                         f"{metric.wall_p50:>6.0f} {metric.wall_p95:>6.0f} "
+                         f"{metric.first_response_p95:>6.0f} {metric.db_mean:>6.1f} "
+                         f"{metric.api_mean:>6.1f}")
+
+        await self.bot.inter_send(inter,
+                                  panel="\n".join(lines),
+                                  title="Handler latency (ms)",
+                                  code_block=True)
+
+    @commands.check(utils.is_admin)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def db_stats(self,
+                       inter: disnake.ApplicationCommandInteraction,
+                       view: str = commands.Param(default="queries",
+                                                  choices=["queries", "slow"])):
+        """
+        Show the query timings, the pool saturation and the slow query log
+
+        Parameters
+        ----------
+        view
+            Show the per query timings or the slow query log
+        """
+        pool = db.monitor.pool_status()
+        lines = [" ".join(f"{key}={value}" for key, value in pool.items()),
+                 " ".join(f"{key}={value}" for key, value in db.status().items()),
+                 ""]
+
+        if view == "queries":
+            lines.append(f"{'Query':<24} {'Calls':>6} {'Err':>4} {'Rows':>7} "
+                         f"{'Acq95':>6} {'Exe50':>6} {'Exe95':>6}")
+            stats = sorted(db.monitor.stats.items(),
+                           key=lambda item: item[1].execute.total, reverse=True)
+            for name, query in stats:
+                lines.append(f"{name[:24]:<24} {query.calls:>6} {query.errors:>4} "
+                             f"{query.rows:>7} {query.acquire.percentile(95):>6.0f} "
+                             f"{query.execute.percentile(50):>6.0f} "
+                             f"{query.execute.percentile(95):>6.0f}")
+        else:
+            for slow in reversed(db.monitor.slow_queries):
+                lines.append(f"{slow.time.strftime('%d %H:%M:%S')} {slow.name} "
+                             f"acq={slow.acquire_ms:.0f}ms exe={slow.execute_ms:.0f}ms "
+                             f"({slow.params})")
+
+        await self.bot.inter_send(inter,
+                                  panel="\n".join(lines),
+                                  title="Database (ms)",
+                                  code_block=True)
+
+    @commands.check(utils.is_admin)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def outbound_backlog(self,
+                               inter: disnake.ApplicationCommandInteraction):
+        """
+        List the messages waiting in the outbound queue of each channel
+        """
+        backlog = self.bot.dispatcher.backlog()
+        if not backlog:
+            panel = "All outbound queues are empty"
+        else:
+            panel = "\n".join(f"<#{channel_id}> `{count}` queued"
+                              for channel_id, count in backlog.items())
+
+        panel += f"\n\n`Dropped:` {self.bot.dispatcher.dropped}"
+        await self.bot.inter_send(inter,
+                                  panel=panel,
+                                  title="Outbound Backlog")
+
     @commands.check(utils.is_admin)
     @commands.slash_command(guild_ids=guild_ids())
     async def prune_users(self, inter: disnake.ApplicationCommandInteraction):
@@ -1,14 +1,19 @@
 import asyncio
 import logging
+from typing import Awaitable, Callable
 
 import disnake
-from disnake.ext import commands
+from disnake.ext import commands, tasks
 
 from bot import BotClient
 from packages.config import guild_ids
 from packages.utils import crud, models
+from packages.utils.pacing import PacedQueue
 from packages.utils.utils import is_admin, EmbedColor
 from packages.views.comfirm_selection import Confirm, Confirmation
+from packages.views.paginator import Paginator
+
+PAGE_SIZE = 10
 
 
 class DemoBot(commands.Cog):
@@ -16,6 +21,141 @@ class DemoBot(commands.Cog):
     def __init__(self, bot: BotClient):
         self.bot: BotClient = bot
         self.log: logging.Logger = logging.getLogger(f"{self.bot.settings.log_name}.{self.__class__.__name__}")
+        self._reconcile_lock = asyncio.Lock()
+
+        if self.bot.settings.demo_reconcile_hours:
+            self.reconcile_task.change_interval(hours=self.bot.settings.demo_reconcile_hours)
+            self.reconcile_task.start()
+
+    def cog_unload(self):
+        self.reconcile_task.cancel()
+
+    @tasks.loop(hours=6)
+    async def reconcile_task(self):
+        guild = self.bot.get_guild(self.bot.settings.guild)
+        if guild is None:
+            self.log.error("Demo reconciliation skipped, the guild is not available")
+            return
+        await self._reconcile(guild, dry_run=self.bot.settings.demo_dry_run)
+
+    @reconcile_task.before_loop
+    async def before_loops(self):
+        await self.bot.wait_until_ready()
+
+    async def _reconcile(self,
+                         guild: disnake.Guild,
+                         dry_run: bool,
+                         on_plan: Callable[[str], Awaitable[None]] | None = None) -> str:
+        """
+        Diff the demo_channel rows against the guild cache in one pass and tear
+        down every demo that lost its channel, its bot or its owner. The API
+        calls go through a paced queue and one summary is posted to mod-log.
+        on_plan is awaited with the plan before the paced actions start.
+        """
+        # A partial member cache would make every demo look orphaned
+        if not guild.chunked:
+            return "Member cache is not ready yet, skipping"
+
+        async with self._reconcile_lock:
+            records = await crud.get_demo_channel(self.bot.pool, guild)
+
+            orphans = [record for record in records
+                       if not (record.channel_obj and record.member_obj and record.bot_obj)]
+            if not orphans:
+                return "Every demo channel is healthy"
+
+            # Owners keep their role while they still have a healthy demo
+            orphan_ids = {record.channel_id for record in orphans}
+            healthy_owners = {record.owner_id for record in records
+                              if record.channel_id not in orphan_ids}
+            demo_owner = guild.get_role(self.bot.settings.get_role("demo_owner"))
+
+            queue = PacedQueue(self.bot.settings.demo_actions_per_second, self.log)
+            lines = []
+            for record in orphans:
+                missing = [name for name, obj in (("channel", record.channel_obj),
+                                                  ("owner", record.member_obj),
+                                                  ("bot", record.bot_obj)) if obj is None]
+                lines.append(f"<#{record.channel_id}> <@{record.bot_id}> <@{record.owner_id}> "
+                             f"missing `{', '.join(missing)}`")
+
+                if record.channel_obj:
+                    queue.add(f"Delete #{record.channel_obj}",
+                              lambda channel=record.channel_obj: channel.delete(
+                                  reason="Demo bot cleanup"),
+                              key=record.channel_id)
+                if record.bot_obj:
+                    queue.add(f"Kick {record.bot_obj}",
+                              lambda member=record.bot_obj: member.kick(
+                                  reason="Demo channel is orphaned"),
+                              key=record.channel_id)
+                if record.member_obj and record.owner_id not in healthy_owners and demo_owner:
+                    queue.add(f"Remove demo owner role from {record.member_obj}",
+                              lambda member=record.member_obj: member.remove_roles(demo_owner),
+                              key=record.channel_id)
+
+            if dry_run:
+                actions = "\n".join(f"- {action.description}" for action in queue.actions)
+            else:
+                if on_plan is not None:
+                    await on_plan(f"Cleaning up {len(orphans)} orphaned demos with {len(queue)} actions, "
+                                  f"the summary is posted here when they are done.")
+                done, failed = await queue.drain()
+                # A row with a failed action is kept, the next run retries what is left of it
+                cleaned = orphan_ids - {action.key for action in failed}
+                if cleaned:
+                    await crud.del_demo_channels(self.bot.pool, list(cleaned))
+                actions = "\n".join([f"- {action.description}" for action in done] +
+                                    [f"- Failed: {action.description}" for action in failed])
+
+            summary = (f"**Orphaned demos ({len(orphans)})**\n" + "\n".join(lines) +
+                       f"\n\n**{'Planned' if dry_run else 'Actions'}**\n{actions or 'None'}")
+
+            mod_log = self.bot.get_channel(self.bot.settings.get_channel("mod-log"))
+            self.bot.queue_send(
+                mod_log,
+                panel=summary,
+                title=f"Demo Reconciliation{' (dry run)' if dry_run else ''}",
+                color=EmbedColor.WARNING
+            )
+            return summary
+
+    @commands.check(is_admin)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def demo_bot_reconcile(self,
+                                 inter: disnake.ApplicationCommandInteraction,
+                                 dry_run: bool = True) -> None:
+        """
+        Clean up demos whose owner left, whose bot was kicked or whose channel was deleted
+
+        Parameters
+        ----------
+        dry_run
+            Only report what would be cleaned up
+        """
+        if self._reconcile_lock.locked():
+            await self.bot.inter_send(inter,
+                                      panel="A reconciliation is already running, its summary will be "
+                                            "posted to mod-log.",
+                                      color=EmbedColor.ERROR)
+            return
+
+        await inter.response.defer()
+        title = f"Demo Reconciliation{' (dry run)' if dry_run else ''}"
+
+        # The paced actions can outlive the interaction token, the reply is the plan
+        planned = False
+
+        async def on_plan(panel: str) -> None:
+            nonlocal planned
+            planned = True
+            await self.bot.inter_send(inter, panel=panel, title=title)
+
+        summary = await self._reconcile(inter.guild, dry_run=dry_run, on_plan=on_plan)
+        if planned:
+            self.bot.queue_send(inter.channel, panel=summary, title=title)
+        else:
+            await self.bot.inter_send(inter, panel=summary, title=title)
 
     @commands.check(is_admin)
     @commands.slash_command(guild_ids=guild_ids())
@@ -33,14 +173,19 @@ class DemoBot(commands.Cog):
 
         await inter.response.defer()
 
-        param = next(param for param in [owner, bot, channel] if param is not None)
-        if param is None:
+        if channel is not None:
+            record = await crud.get_demo_channel_by_channel(self.bot.pool, inter.guild, channel.id)
+        elif bot is not None:
+            record = await crud.get_demo_channel_by_bot(self.bot.pool, inter.guild, bot.id)
+        else:
+            records = await crud.get_demo_channels_by_owner(self.bot.pool, inter.guild, owner.id)
+            record = records[0] if records else None
+
+        if record is None:
             await self.bot.inter_send(inter, panel="Was not able to find a record",
                                       color=EmbedColor.ERROR)
             return
 
-        record = await crud.get_demo_channel_param(self.bot.pool, inter.guild, param)
-
         view = Confirm(self.bot)
         await self.bot.inter_send(inter,
                                   title="Please confirm that you want to remove the following demo",
@@ -87,8 +232,7 @@ class DemoBot(commands.Cog):
             await record.member_obj.remove_roles(demo_owner)
 
         # 4) Update the db
-        param = record.bot_obj if record.bot_obj else record.channel_obj
-        await crud.del_demo_channel(self.bot.pool, param)
+        await crud.del_demo_channel(self.bot.pool, record.channel_id)
 
         payload = ""
         payload += f"Removed {record.bot_obj}" if record.bot_obj else ""
@@ -107,16 +251,23 @@ class DemoBot(commands.Cog):
         """List the registers users in the demo program"""
         await inter.response.defer()
 
-        records = await crud.get_demo_channel(self.bot.pool, inter.guild)
+        async def fetch_page(cursor: tuple | None) -> tuple[str, tuple | None]:
+            records = await crud.get_demo_channel_page(self.bot.pool, inter.guild,
+                                                       after=cursor, limit=PAGE_SIZE + 1)
+            if not records:
+                return "No demo channels registered", None
 
-        payload = _make_payload(records)
+            # The extra row only tells if there is a next page
+            next_cursor = None
+            if len(records) > PAGE_SIZE:
+                last = records[PAGE_SIZE - 1]
+                next_cursor = (last.creation_date, last.channel_id)
 
-        await self.bot.inter_send(
-            inter,
-            panel=payload,
-            author=inter.author,
-            footer="Emoji represents if member is present in the server",
-        )
+            return _make_payload(records[:PAGE_SIZE]), next_cursor
+
+        paginator = Paginator(self.bot, inter.author.id, fetch_page, title="Demo Bots",
+                              footer="Emoji represents if member is present in the server")
+        await paginator.start(inter)
 
     @commands.check(is_admin)
     @commands.slash_command(guild_ids=guild_ids())
@@ -129,25 +280,20 @@ class DemoBot(commands.Cog):
             return
 
         await inter.response.defer()
-        records = await crud.get_demo_channel(self.bot.pool, inter.guild)
-
-        user_registrations = []
-        for record in records:
-            # If the bot already has a channel, exit
-            if record.bot_id == bot.id:
-                await self.bot.inter_send(
-                    inter, panel=f"`{bot}` is already registered to {record.channel_obj.jump_url}",
-                    color=EmbedColor.WARNING
-                )
-                return
-
-            # If the user has a channel; keep count and inform the admin
-            if record.owner_id == owner.id:
-                user_registrations.append(record)
-
-        if user_registrations:
+        bot_channel, owner_channels = await crud.get_demo_registration(self.bot.pool, bot.id, owner.id)
+
+        # If the bot already has a channel, exit
+        if bot_channel is not None:
             await self.bot.inter_send(
-                inter, panel=f"User already has {len(user_registrations)} registrations. If "
+                inter, panel=f"`{bot}` is already registered to <#{bot_channel}>",
+                color=EmbedColor.WARNING
+            )
+            return
+
+        # If the user has a channel; inform the admin
+        if owner_channels:
+            await self.bot.inter_send(
+                inter, panel=f"User already has {owner_channels} registrations. If "
                              f"we run into this, then have doobie add a feature for it.",
                 color=EmbedColor.WARNING
             )
@@ -178,7 +324,7 @@ class DemoBot(commands.Cog):
         )
 
         mod_log = self.bot.get_channel(self.bot.settings.get_channel("mod-log"))
-        await self.bot.inter_send(
+        self.bot.queue_send(
             mod_log,
             panel=f"Created {channel.jump_url} for {owner.mention} to demo their bot {bot.mention}",
             color=EmbedColor.SUCCESS,
@@ -233,12 +379,10 @@ def _calculate_position(category: disnake.CategoryChannel, bot_name: str) -> int
 
 
 def _make_payload(records: list[models.DemoChannel]) -> str:
-    payload = ""
-    for count, record in enumerate(records):
-        payload += (
-            f"{record.channel_obj.jump_url if record.channel_obj else 'No Channel Found'}\n"
-            f"`{'Owner':>6}`: {record.member_present} {record.member_obj.mention if record.member_obj else record.owner_id}\n"
-            f"`{'Bot':>6}:` {record.bot_present} {record.bot_obj.mention if record.bot_obj else record.bot_id}\n"
-            f"`{'Added':>6}:` {record.creation_date.strftime('%Y%m%d %H:%M')}\n\n"
-        )
-    return payload
+    return "\n".join(
+        f"{record.channel_obj.jump_url if record.channel_obj else 'No Channel Found'}\n"
+        f"`{'Owner':>6}`: {record.member_present} {record.member_obj.mention if record.member_obj else record.owner_id}\n"
+        f"`{'Bot':>6}:` {record.bot_present} {record.bot_obj.mention if record.bot_obj else record.bot_id}\n"
+        f"`{'Added':>6}:` {record.creation_date.strftime('%Y%m%d %H:%M')}\n"
+        for record in records
+    )
@@ -1,283 +1,343 @@
-import coc
-import nextcord
 import asyncio
+import logging
+from datetime import timedelta
+
+import coc
+import disnake
+from disnake.ext import commands, tasks
 
-from datetime import datetime, timedelta
-from nextcord.ext import commands, tasks
-from packages.config import settings
-
-enviro = settings['enviro']
-
-JUNKIES_GUILD_ID = settings['guild']['junkies']
-if enviro == "LIVE":
-    GUILD_IDS = [JUNKIES_GUILD_ID, settings['guild']['bot_logs']]
-else:
-    GUILD_IDS = [settings['guild']['bot_logs']]
-
-
-def to_time(seconds):
-    d, r = divmod(seconds, 86400)
-    h, r = divmod(r, 3600)
-    m, s = divmod(r, 60)
-    if d > 0:
-        return f"{d:.0f}d {h:.0f}h"
-    elif h > 0:
-        return f"{h:.0f}h {m:.0f}m"
-    else:
-        return f"{m:.0f}m {s:.0f}s"
-
-
-class Bot:
-    def __init__(self, name, bot_id, channel_id, owner, monitor, email=None):
-        self.name = name
-        self.bot_id = bot_id
-        self.channel_id = channel_id
-        self.owner = owner
-        self.monitor = monitor
-        self.email = email
-
-    async def notify_down(self, bot):
-        """Notify bot owner that the bot is down"""
-        channel = bot.get_channel(self.channel_id)
-        msg = await channel.send(f"<@{self.owner}> - It would appear that {self.name} is down.")
-        bot.logger.info(f"Bot down: {self.name} - Email: {self.email}")
-        # if self.email:
-        #     send_email = SendMail(self.email, "Bot Owner", self.name, msg.guild.id, msg.channel.id, msg.id)
-        #     send_email.send_mail_down()
-
-    async def notify_follow_up(self, bot, downtime):
-        """Notify bot owner that the bot is still down"""
-        channel = bot.get_channel(self.channel_id)
-        msg = await channel.send(f"<@{self.owner}> - {self.name} has been down for {downtime}")
-        # if self.email:
-        #     send_email = SendMail(self.email, "Bot Owner", self.name, msg.guild.id, msg.channel.id, msg.id)
-        #     send_email.send_mail_followup(downtime)
-
-    async def notify_up(self, bot, downtime):
-        """Notify bot owner that the bot is back up again"""
-        channel = bot.get_channel(self.channel_id)
-        msg = await channel.send(f"<@{self.owner}> - {self.name} is back up.\n"
-                                 f"Downtime: {downtime}")
-        # if self.email:
-        #     send_email = SendMail(self.email, "Bot Owner", self.name, msg.guild.id, msg.channel.id, msg.id)
-        #     send_email.send_mail_up(downtime)
+from bot import BotClient
+from packages.config import guild_ids
+from packages.utils import crud, models, utils
+from packages.utils.pacing import PacedQueue
+from packages.utils.uptime import (WINDOWS, BotState, DeadlineScheduler, TrackedBot,
+                                   availability, outage_rollups, to_time, utcnow)
+from packages.utils.utils import EmbedColor
 
 
 class Downtime(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot: BotClient):
         self.bot = bot
-        self.bots = []
-        self.watchman.start()
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.Downtime")
+        self.bots: dict[int, TrackedBot] = {}
+        self.scheduler = DeadlineScheduler(self._confirm_down, self.log)
+
         self.bot.coc_client.add_events(self.maintenance_start, self.maintenance_end)
+        self.sync_task = asyncio.create_task(self._sync())
+        self.watchman.change_interval(minutes=self.bot.settings.downtime_sweep_minutes)
+        self.watchman.start()
 
     def cog_unload(self):
         self.bot.coc_client.remove_events(self.maintenance_start, self.maintenance_end)
+        self.sync_task.cancel()
+        self.scheduler.stop()
         self.watchman.cancel()
 
-    async def init_bots(self):
-        """Initialize self.bots with info from database"""
-        self.bots = []  # clear list of any previous entries
-        sql = "SELECT bot_id, name, owner_id, channel_id, monitor, email FROM bot_owners ORDER BY name"
-        fetch = await self.bot.pool.fetch(sql)
-        for row in fetch:
-            self.bots.append(Bot(row['name'], row['bot_id'], row['channel_id'], row['owner_id'],
-                                 row['monitor'], row['email']))
-
-    @nextcord.slash_command(name="bot", description="Command group to manage demo bots", guild_ids=GUILD_IDS)
-    @commands.has_role("Admin")
-    async def my_bot(self, interaction: nextcord.Interaction):
-        """ This is just for the slash command group and will never get called on its own, so we can pass. """
-        pass
+    async def _sync(self) -> None:
+        """Load the monitored bots and catch up with presences missed while offline"""
+        await self.bot.wait_until_ready()
+        await self.bot.maintenance.restore()
+
+        owners = await crud.get_bot_owners(self.bot.pool)
+        downtimes = await crud.get_open_downtimes(self.bot.pool)
+        for owner in owners:
+            tracked = TrackedBot(owner)
+            if owner.bot_id in downtimes:
+                tracked.state = BotState.DOWN
+                tracked.offline_start = downtimes[owner.bot_id]
+            self.bots[owner.bot_id] = tracked
+
+        self.scheduler.start()
+
+        guild = self.bot.get_guild(self.bot.settings.guild)
+        for tracked in self.bots.values():
+            member = guild.get_member(tracked.owner.bot_id)
+            if member is not None:
+                await self._transition(tracked, member.status)
 
-    @my_bot.subcommand(name="test", description="Tests the downtime notification")
-    async def my_bot_test(self, interaction: nextcord.Interaction, member: nextcord.Member):
-        """ Tests the downtime notifier for a given bot. """
-        self.bot.logger.debug("Starting...")
-        sql = "SELECT bot_id, name, owner_id, channel_id, monitor, email FROM bot_owners WHERE bot_id = $1"
-        row = await self.bot.pool.fetchrow(sql, member.id)
-        if not row:
-            await interaction.response.send_message("This bot is not in my DB.", ephemeral=True)
+        self.log.info(f"Monitoring {len(self.bots)} bots, {len(downtimes)} currently down")
+
+    def _notify(self, owner: models.BotOwner, message: str) -> None:
+        if self.bot.maintenance.active:
+            # The outages are still stored, only the pings stand down
+            self.log.info(f"Alert for {owner.name} suppressed during maintenance: {message}")
             return
-        bot = Bot(row['name'], row['bot_id'], row['channel_id'], row['owner_id'], row['monitor'], row['email'])
-        self.bot.logger.debug("About to send notification")
-        await bot.notify_down(self.bot)
-        await interaction.response.send_message("Test done.", ephemeral=True)
-
-    @my_bot.subcommand(name="add", description="Add a bot to be monitored")
-    async def my_bot_add(self, interaction: nextcord.Interaction,
-                         bot: nextcord.User,
-                         owner: nextcord.User,
-                         channel: nextcord.TextChannel):
-        """ Ads a given bot with a given owner and its demo channel to the database for future monitoring. """
-        if not bot.bot:
-            return await interaction.response.send_message(f"It would appear that {bot.name} ({bot.id}) is not a "
-                                                           f"bot user.")
-        if owner.bot:
-            return await interaction.response.send_message(f"{owner.name} ({owner.id}) is a bot and cannot be added "
-                                                           f"as a bot owner.")
-
-        sql = ("INSERT INTO bot_owners (bot_id, name, owner_id, channel_id) "
-               "VALUES ($1, $2, $3, $4)")
-        await self.bot.pool.execute(sql, bot.id, bot.name, owner.id, channel.id)
-        await interaction.response.send_message(f"Congratulations! You have successfully added {bot.name} to the bot "
-                                                f"monitoring system. If there is an outage that lasts more than 60 "
-                                                f"seconds, I will ping {owner.display_name} in {channel.mention}.  To "
-                                                f"toggle monitoring, please use `/bot monitor <bot tag>.")
-
-    @my_bot.subcommand(name="list")
-    async def my_bot_list(self, interaction: nextcord.Interaction):
-        """List the bots that are being monitored.
-
-        **Example:**
-        /bot list"""
-        await interaction.response.defer()
-        await self.init_bots()
-        embeds = []
-        for i, bot in enumerate(self.bots):
-            if i % 24 == 0:
-                embeds.append(nextcord.Embed(title="Bots that are configured for monitoring"))
-            owner = self.bot.get_user(bot.owner)
-            channel = self.bot.get_channel(bot.channel_id)
-            embeds[-1].add_field(name=f"{bot.name}",
-                                 value=f"Bot ID: {bot.bot_id}\n"
-                                       f"Owner: {owner.mention}\n"
-                                       f"Channel: {channel.mention}\n"
-                                       f"Monitoring: {bot.monitor}",
-                                 inline=True)
-        if len(embeds) > 1:
-            for i, embed in enumerate(embeds):
-                embed.title += f" ({i})"
-        await interaction.followup.send(embeds=embeds)
-
-    @my_bot.subcommand(name="monitor")
-    async def my_bot_monitor(self, interaction: nextcord.Interaction, bot: nextcord.Member):
-        """Toggle monitoring for the specified bot
-
-        **Example:**
-        /bot monitor @Ruby
+
+        channel = self.bot.get_channel(owner.channel_id)
+        if channel is None:
+            self.log.error(f"Demo channel {owner.channel_id} of {owner.name} is missing")
+            return
+        self.bot.dispatcher.enqueue(channel, content=f"<@{owner.owner_id}> - {message}")
+
+    async def _transition(self, tracked: TrackedBot, status: disnake.Status) -> None:
+        """Advance the state machine, only confirmed transitions are stored"""
+        if not tracked.owner.monitor:
+            return
+
+        offline = status == disnake.Status.offline
+
+        if offline and tracked.state in (BotState.ONLINE, BotState.RECOVERED):
+            tracked.state = BotState.SUSPECT
+            tracked.offline_start = utcnow()
+            self.scheduler.schedule(tracked.owner.bot_id, self.bot.settings.downtime_confirm_seconds)
+
+        elif not offline and tracked.state == BotState.SUSPECT:
+            tracked.state = BotState.ONLINE
+            tracked.offline_start = None
+            self.scheduler.cancel(tracked.owner.bot_id)
+
+        elif not offline and tracked.state == BotState.DOWN:
+            now = utcnow()
+            offline_start = tracked.offline_start
+            downtime = to_time((now - offline_start).total_seconds())
+            tracked.state = BotState.RECOVERED
+            tracked.offline_start = None
+
+            await crud.set_bot_up(self.bot.pool, tracked.owner.bot_id, now)
+            await crud.add_uptime_rollups(self.bot.pool,
+                                          outage_rollups(tracked.owner.bot_id, offline_start, now))
+            self._notify(tracked.owner, f"{tracked.owner.name} is back up.\nDowntime: {downtime}")
+            self.log.info(f"{tracked.owner.name} is back online. Downtime: {downtime}")
+
+    async def _confirm_down(self, bot_id: int) -> None:
+        """Deadline callback, the bot has been offline for the whole confirmation window"""
+        tracked = self.bots.get(bot_id)
+        if tracked is None or tracked.state != BotState.SUSPECT:
+            return
+
+        tracked.state = BotState.DOWN
+        await crud.set_bot_down(self.bot.pool, bot_id, tracked.offline_start)
+        self._notify(tracked.owner, f"It would appear that {tracked.owner.name} is down.")
+        self.log.info(f"Bot down: {tracked.owner.name} - Email: {tracked.owner.email}")
+
+    @tasks.loop(minutes=30)
+    async def watchman(self):
         """
-        sql = ("UPDATE bot_owners "
-               "SET monitor = NOT monitor "
-               "WHERE bot_id = $1 "
-               "RETURNING monitor")
-        monitor = await self.bot.pool.fetchval(sql, bot.id)
-        if monitor:
-            new_monitor = "ON"
-        else:
-            new_monitor = "OFF"
-        await interaction.response.send_message(f"Monitoring for {bot.display_name} is now set to {new_monitor}.")
+        Bot owners are reminded every `reminder_hours` until the bot comes back
+        online. The sweep runs more often than that so a reminder is never late
+        by more than one sweep interval, whenever the loop was started.
+        """
+        # The reminders resume with the first sweep after the maintenance
+        if self.bot.maintenance.active:
+            return
+
+        now = utcnow()
+        # Small slack so a reminder sent just after the previous sweep is not skipped
+        due = now - timedelta(hours=self.bot.settings.downtime_reminder_hours, minutes=-1)
+        downtimes = await crud.get_due_downtimes(self.bot.pool, due)
+        if not downtimes:
+            return
+
+        queue = PacedQueue(self.bot.settings.downtime_reminders_per_second, self.log)
+        for owner, offline_start in downtimes:
+            channel = self.bot.get_channel(owner.channel_id)
+            if channel is None:
+                self.log.error(f"Demo channel {owner.channel_id} of {owner.name} is missing")
+                continue
+
+            downtime = to_time((now - offline_start).total_seconds())
+            queue.add(f"Reminder for {owner.name}",
+                      lambda channel=channel, owner=owner, downtime=downtime: channel.send(
+                          f"<@{owner.owner_id}> - {owner.name} has been down for {downtime}"),
+                      key=owner.bot_id)
+
+        # The sweeps never overlap, a reminder that failed is due again on the next one
+        done, failed = await queue.drain()
+        if done:
+            await crud.set_bots_notified(self.bot.pool, [action.key for action in done], now)
+        self.log.info(f"Sent {len(done)} downtime reminders, {len(failed)} failed")
+
+    @watchman.before_loop
+    async def before_watchman(self):
+        await self.bot.wait_until_ready()
 
     @commands.Cog.listener()
-    async def on_guild_channel_delete(self, channel):
-        """Listen for channel delete and alert admins to remove monitoring if it was a demo channel"""
-        if not channel.category_id == 567551986229182474:
+    async def on_presence_update(self, before: disnake.Member, after: disnake.Member):
+        """Feed the status changes of the monitored bots to the state machine"""
+        tracked = self.bots.get(after.id)
+        if tracked is None or after.guild.id != self.bot.settings.guild:
             return
-        sql = "DELETE FROM bot_owners WHERE channel_id = $1"
-        await self.bot.pool.execute(sql, channel.id)
-        self.bot.logger.info(f"Bot monitoring has been removed for {channel.name} because someone deleted the channel.")
+
+        if (before.status == disnake.Status.offline) == (after.status == disnake.Status.offline):
+            return
+
+        await self._transition(tracked, after.status)
 
     @commands.Cog.listener()
-    async def on_presence_update(self, before, member):
-        """Task for monitoring API bots
-        Downtime is stored in the bot_downtime table of postgresql
+    async def on_guild_channel_delete(self, channel: disnake.abc.GuildChannel):
+        """Stop monitoring the bots of a demo channel when it is deleted"""
+        if channel.category_id != self.bot.settings.get_channel("bot_demo"):
+            return
+
+        for bot_id in await crud.del_bot_owners_by_channel(self.bot.pool, channel.id):
+            self.bots.pop(bot_id, None)
+            self.scheduler.cancel(bot_id)
+            self.log.info(f"Bot monitoring has been removed for {channel.name} "
+                          f"because someone deleted the channel.")
+
+    @commands.check(utils.is_admin)
+    @commands.slash_command(name="bot", guild_ids=guild_ids())
+    async def my_bot(self, inter: disnake.ApplicationCommandInteraction):
+        """Command group to manage demo bots"""
+        pass
+
+    @my_bot.sub_command(name="test")
+    async def my_bot_test(self,
+                          inter: disnake.ApplicationCommandInteraction,
+                          member: disnake.Member):
+        """
+        Tests the downtime notification
+
+        Parameters
+        ----------
+        member
+            The monitored bot to send a test notification for
         """
-        # Only monitor updates seen in our Discord server
-        if member.guild.id != settings['guild']['junkies']:
+        tracked = self.bots.get(member.id)
+        if tracked is None:
+            await self.bot.inter_send(inter, panel="This bot is not in my DB.",
+                                      color=EmbedColor.ERROR)
             return
-        # Is this user a bot?
-        if not member.bot:
+
+        self._notify(tracked.owner, f"It would appear that {tracked.owner.name} is down.")
+        await self.bot.inter_send(inter, panel="Test done.", color=EmbedColor.SUCCESS)
+
+    @my_bot.sub_command(name="add")
+    async def my_bot_add(self,
+                         inter: disnake.ApplicationCommandInteraction,
+                         bot: disnake.Member,
+                         owner: disnake.Member,
+                         channel: disnake.TextChannel):
+        """
+        Add a bot to be monitored
+
+        Parameters
+        ----------
+        bot
+            The bot to monitor
+        owner
+            The owner to ping when the bot goes down
+        channel
+            The demo channel of the bot
+        """
+        if not bot.bot:
+            await self.bot.inter_send(inter, panel=f"It would appear that {bot.name} ({bot.id}) "
+                                                   f"is not a bot user.",
+                                      color=EmbedColor.ERROR)
             return
-        # Is this update a status change?
-        if before.status == member.status:
+
+        if owner.bot:
+            await self.bot.inter_send(inter, panel=f"{owner.name} ({owner.id}) is a bot and cannot "
+                                                   f"be added as a bot owner.",
+                                      color=EmbedColor.ERROR)
             return
-        conn = self.bot.pool
-        sql = "SELECT bot_id, name, owner_id, channel_id, monitor, email FROM bot_owners WHERE bot_id = $1"
-        row = await conn.fetchrow(sql, member.id)
-        if not row:
+
+        record = await crud.set_bot_owner(self.bot.pool, bot.id, bot.name, owner.id, channel.id)
+        tracked = self.bots.get(bot.id)
+        if tracked is None:
+            self.bots[bot.id] = TrackedBot(record)
+        else:
+            tracked.owner = record
+
+        await self.bot.inter_send(
+            inter,
+            panel=f"Congratulations! You have successfully added {bot.name} to the bot "
+                  f"monitoring system. If there is an outage that lasts more than "
+                  f"{self.bot.settings.downtime_confirm_seconds:.0f} seconds, I will ping "
+                  f"{owner.display_name} in {channel.mention}. To toggle monitoring, please "
+                  f"use `/bot monitor <bot tag>`.",
+            color=EmbedColor.SUCCESS
+        )
+
+    @my_bot.sub_command(name="list")
+    async def my_bot_list(self, inter: disnake.ApplicationCommandInteraction):
+        """List the bots that are being monitored"""
+        if not self.bots:
+            await self.bot.inter_send(inter, panel="No bots are configured for monitoring")
             return
-        bot = Bot(row['name'], row['bot_id'], row['channel_id'], row['owner_id'], row['monitor'], row['email'])
-        # Are we currently monitoring this bot?
-        if not bot.monitor:
+
+        panels = [
+            f"**{tracked.owner.name}**\n"
+            f"`{'Bot ID':>10}:` {tracked.owner.bot_id}\n"
+            f"`{'Owner':>10}:` <@{tracked.owner.owner_id}>\n"
+            f"`{'Channel':>10}:` <#{tracked.owner.channel_id}>\n"
+            f"`{'Monitoring':>10}:` {tracked.owner.monitor}\n"
+            f"`{'State':>10}:` {tracked.state.value}\n"
+            for tracked in sorted(self.bots.values(), key=lambda tracked: tracked.owner.name)
+        ]
+        await self.bot.inter_send(inter, panel="\n".join(panels),
+                                  title="Bots that are configured for monitoring")
+
+    @my_bot.sub_command(name="uptime")
+    async def my_bot_uptime(self,
+                            inter: disnake.ApplicationCommandInteraction,
+                            bot: disnake.Member):
+        """
+        Show the availability and mean time to recovery of a monitored bot
+
+        Parameters
+        ----------
+        bot
+            The bot to report on
+        """
+        tracked = self.bots.get(bot.id)
+        if tracked is None:
+            await self.bot.inter_send(inter, panel="This bot is not in my DB.",
+                                      color=EmbedColor.ERROR)
             return
-        now = datetime.utcnow()
-        offline_sql = "SELECT offline_start FROM bot_downtime WHERE online = False AND bot_id = $1"
-        reported_sql = ("UPDATE bot_downtime "
-                        "SET online = True, reported = True, offline_end = $1 "
-                        "WHERE bot_id = $2 AND reported = False")
-        insert_sql = ("INSERT INTO bot_downtime (bot_id, online, offline_start, last_notification) "
-                      "VALUES ($1, False, $2, $3)")
-        offline_start = await conn.fetchval(offline_sql, member.id)
-        if offline_start:
-            # simply tells us that the bot is marked offline in the database
-            if member.status == nextcord.Status.online:
-                # bot is back online
-                downtime = to_time((now - offline_start).total_seconds())
-                try:
-                    await bot.notify_up(self.bot, downtime)
-                    self.bot.logger.info(f"{bot.name} is back online and notification sent. "
-                                         f"Downtime: {downtime}")
-                except nextcord.errors.Forbidden:
-                    channel = self.bot.get_channel(settings['channels']['mod-log'])
-                    await channel.send(f"API Bot does not have access to <#{bot.channel_id}> ({bot.channel_id})")
-                await conn.execute(reported_sql, now, bot.bot_id)
-        else:
-            if member.status != nextcord.Status.online:
-                # bot is offline for the first time
-                # pause 60 seconds to make sure it's a real outage
-                await asyncio.sleep(65)
-                check = member.guild.get_member(member.id)
-                if check.status == nextcord.Status.online:
-                    # bot is back online, no need to report anything
-                    return
-                await conn.execute(insert_sql, bot.bot_id, now, now)
-                try:
-                    await bot.notify_down(self.bot)
-                    self.bot.logger.info(f"{bot.name} is down and notification has been sent.")
-                except nextcord.errors.Forbidden:
-                    channel = self.bot.get_channel(settings['channels']['mod-log'])
-                    await channel.send(f"API Bot does not have access to <#{bot.channel_id}> ({bot.channel_id})")
-
-    @tasks.loop(hours=24.0)
-    async def watchman(self):
-        """Task for monitoring API bots
-        Downtime is stored in the bot_downtime table of postgresql
-        Bot owner is notified once every 24 hours until the bot comes back online
+
+        now = utcnow()
+        longest = max(days for _, days in WINDOWS)
+        rollups = await crud.get_uptime_rollups(self.bot.pool, bot.id,
+                                                now.date() - timedelta(days=longest - 1))
+
+        ongoing = tracked.offline_start if tracked.state == BotState.DOWN else None
+        lines = [f"{'Window':<7} {'Uptime':>8} {'Outages':>8} {'MTTR':>8}"]
+        for report in availability(rollups, now, ongoing):
+            mttr = to_time(report.mttr) if report.mttr is not None else "-"
+            lines.append(f"{report.window:<7} {report.uptime:>7.2f}% {report.recoveries:>8} {mttr:>8}")
+
+        await self.bot.inter_send(inter,
+                                  panel="\n".join(lines),
+                                  title=f"Uptime of {bot.display_name} ({tracked.state.value})",
+                                  footer="Calendar days in UTC, today included",
+                                  code_block=True)
+
+    @my_bot.sub_command(name="monitor")
+    async def my_bot_monitor(self,
+                             inter: disnake.ApplicationCommandInteraction,
+                             bot: disnake.Member):
         """
-        conn = self.bot.pool
-        now = datetime.utcnow()
-        update_sql = "UPDATE bot_downtime SET last_notification = $1 WHERE bot_id = $2 AND online = False"
-        sql = "SELECT offline_start, last_notification FROM bot_downtime WHERE bot_id = $1 AND online = False"
-        await self.init_bots()
-        for bot in self.bots:
-            if not bot.monitor:
-                continue
-            fetch = await conn.fetchrow(sql, bot.bot_id)
-            if not fetch:
-                continue
-            offline_start = fetch['offline_start']
-            last_notification = fetch['last_notification']
-            if offline_start and last_notification < now - timedelta(hours=23.0):
-                downtime = to_time((now - offline_start).total_seconds())
-                try:
-                    await bot.notify_follow_up(self.bot, downtime)
-                except nextcord.errors.Forbidden:
-                    channel = self.bot.get_channel(settings['channels']['mod-log'])
-                    await channel.send(f"API Bot does not have access to <#{bot.channel_id}> ({bot.channel_id})")
-                await conn.execute(update_sql, now, bot.bot_id)
+        Toggle monitoring for the specified bot
 
-    @watchman.before_loop
-    async def before_watchman(self):
-        await self.bot.wait_until_ready()
+        Parameters
+        ----------
+        bot
+            The bot to toggle monitoring for
+        """
+        monitor = await crud.toggle_bot_monitor(self.bot.pool, bot.id)
+        tracked = self.bots.get(bot.id)
+        if monitor is None or tracked is None:
+            await self.bot.inter_send(inter, panel="This bot is not in my DB.",
+                                      color=EmbedColor.ERROR)
+            return
+
+        tracked.owner.monitor = monitor
+        if not monitor and tracked.state == BotState.SUSPECT:
+            tracked.state = BotState.ONLINE
+            self.scheduler.cancel(bot.id)
+
+        await self.bot.inter_send(inter,
+                                  panel=f"Monitoring for {bot.display_name} is now set to "
+                                        f"{'ON' if monitor else 'OFF'}.")
 
     @coc.ClientEvents.maintenance_start()
     async def maintenance_start(self):
-        channel = self.bot.get_channel(settings['channels']['general'])
-        await channel.send("The Clash API has entered maintenance mode.")
+        await self.bot.maintenance.begin("coc.py events")
 
     @coc.ClientEvents.maintenance_completion()
     async def maintenance_end(self, time_started):
-        channel = self.bot.get_channel(settings['channels']['general'])
-        await channel.send("Maintenance has ended. Get back to work!")
+        await self.bot.maintenance.end("coc.py events")
 
 
 def setup(bot):
@@ -1,12 +1,19 @@
 import logging
-from datetime import datetime, timezone
+import re
+from datetime import datetime, timedelta, timezone
 
 import disnake
 from disnake import RawMessageDeleteEvent
-from disnake.ext import commands
-
-from packages.utils import crud
+from disnake.ext import commands, tasks
+
+from packages.config import guild_ids
+from packages.utils import crud, db, embeds as embed_engine, utils
+from packages.utils.ingest import MessageIngester
+from packages.utils.raid import JoinTracker, age_histogram
+from packages.utils.scanner import ContentScanner, ScanAction
+from packages.utils.spam import Hit, SpamDetector, SpamKind
 from packages.utils.utils import EmbedColor
+from packages.views.raid_view import RaidView
 from bot import BotClient
 
 
@@ -19,6 +26,36 @@ class EventDriver(commands.Cog):
         self.get_channel_cb = self.bot.settings.get_channel
         self.get_role_cb = self.bot.settings.get_role
 
+        self.ingester = MessageIngester(self.bot)
+        self.ingester.start()
+
+        settings = self.bot.settings
+        self.spam = SpamDetector(window_seconds=settings.spam_window_seconds,
+                                 user_messages=settings.spam_user_messages,
+                                 channel_messages=settings.spam_channel_messages,
+                                 duplicate_messages=settings.spam_duplicate_messages,
+                                 duplicate_min_length=settings.spam_duplicate_min_length,
+                                 incident_seconds=settings.spam_incident_minutes * 60)
+
+        self.joins = JoinTracker(window_seconds=settings.raid_window_seconds,
+                                 threshold=settings.raid_join_threshold,
+                                 calm_seconds=settings.raid_calm_minutes * 60)
+        self.raid_view: RaidView | None = None
+        self.raid_message: disnake.Message | None = None
+        self._raid_dirty = False
+        self.raid_summary.change_interval(seconds=settings.raid_summary_seconds)
+        self.raid_summary.start()
+
+        self.scanner = ContentScanner(settings.scanner_rules_path, self.log)
+        try:
+            self.scanner.reload()
+        except (OSError, ValueError, KeyError, re.error):
+            self.log.error("Content scanner rules could not be loaded, scanning is off", exc_info=True)
+
+    def cog_unload(self):
+        self.ingester.stop()
+        self.raid_summary.cancel()
+
     def _is_valid(self,
                   guild_id: int | None = None,
                   channel_id: int | None = None,
@@ -39,6 +76,148 @@ class EventDriver(commands.Cog):
 
         return True
 
+    async def _handle_spam(self, message: disnake.Message, hits: list[Hit]) -> None:
+        """
+        Time the offenders out once and alert mod-log once per incident. The
+        hits of one message are handled together, a message tripping several
+        windows is one timeout and one alert.
+        """
+        kinds = ", ".join(hit.incident.kind.value for hit in hits)
+        timeout_minutes = self.bot.settings.spam_timeout_minutes
+
+        # A busy channel is not the fault of everyone talking in it
+        offenders: set[int] = set()
+        for hit in hits:
+            if hit.incident.kind != SpamKind.CHANNEL:
+                offenders.update(hit.new_offenders)
+
+        action = "Alert only"
+        if offenders and timeout_minutes > 0:
+            timed_out = 0
+            for member_id in offenders:
+                member = message.author if member_id == message.author.id else message.guild.get_member(member_id)
+                if member is None:
+                    continue
+                try:
+                    await member.timeout(duration=timedelta(minutes=timeout_minutes),
+                                         reason=f"Spam detection: {kinds}")
+                    timed_out += 1
+                except disnake.HTTPException as error:
+                    self.log.error(f"Could not time out {member} for spam: {error}")
+            action = f"Timed out {timed_out} of {len(offenders)} members for {timeout_minutes} minutes"
+
+        self.log.warning(f"Spam, {kinds}: {message.author} in #{message.channel} - {action}")
+        new_incidents = [hit.incident for hit in hits if hit.new_incident]
+        if not new_incidents:
+            return
+
+        caught = set().union(*(incident.offenders for incident in new_incidents))
+        mod_log = self.bot.get_channel(self.get_channel_cb("mod-log"))
+        self.bot.queue_send(
+            mod_log,
+            title=f"Spam detected: {', '.join(incident.kind.value for incident in new_incidents)}",
+            panel=(f"`{'User:':<10}` {message.author.mention}\n"
+                   f"`{'Offenders:':<10}` {' '.join(f'<@{member_id}>' for member_id in list(caught)[:20])}\n"
+                   f"`{'Channel:':<10}` {message.channel.mention}\n"
+                   f"`{'Action:':<10}` {action}\n"
+                   f"`{'Message:':<10}` {message.jump_url}\n\n"
+                   f"{message.content[:500]}"),
+            footer="Further messages of this incident are not reported",
+            author=message.author,
+            color=EmbedColor.ERROR
+        )
+
+    async def _scan(self, message: disnake.Message) -> None:
+        """Delete or report the message if its content matches a scanner rule"""
+        hits = self.scanner.scan(message.content)
+        if not hits:
+            return
+
+        deleted = False
+        if any(hit.rule.action == ScanAction.DELETE for hit in hits):
+            try:
+                await message.delete()
+                deleted = True
+            except disnake.NotFound:
+                deleted = True
+            except disnake.HTTPException as error:
+                self.log.error(f"Could not delete the message {message.id} of {message.author}: {error}")
+
+        rules = ", ".join(f"{hit.rule.name} (`{hit.match}`)" for hit in hits)
+        self.log.warning(f"Content scanner: {message.author} in #{message.channel} matched {rules}")
+
+        mod_log = self.bot.get_channel(self.get_channel_cb("mod-log"))
+        self.bot.queue_send(
+            mod_log,
+            title=f"Message {'deleted' if deleted else 'flagged'} in #{message.channel}",
+            panel=(f"`{'User:':<10}` {message.author.mention}\n"
+                   f"`{'Rules:':<10}` {rules}\n"
+                   f"`{'Message:':<10}` {'Deleted' if deleted else message.jump_url}\n\n"
+                   f"{message.content[:500]}"),
+            footer=f"ID: {message.id}",
+            author=message.author,
+            color=EmbedColor.ERROR
+        )
+
+    def _raid_embeds(self, ended: bool) -> list[disnake.Embed]:
+        joins = list(self.raid_view.cohort.values())
+        histogram = age_histogram(joins)
+        largest = max(count for _, count in histogram) or 1
+
+        lines = [f"`{'Started:':<10}` <t:{int(self.raid_view.started_at.timestamp())}:R>",
+                 f"`{'Joins:':<10}` {len(joins)} ({sum(join.bot for join in joins)} bots)",
+                 f"`{'Status:':<10}` {'Ended' if ended else 'Ongoing'}",
+                 "",
+                 "**Account age**"]
+        lines.extend(f"`{label:<10}` `{count:>4}` {'█' * round(10 * count / largest)}"
+                     for label, count in histogram)
+        lines.extend(["", "**Latest joins**", ", ".join(join.name for join in joins[-10:])])
+
+        return embed_engine.build_embeds(["\n".join(lines)],
+                                         title="Raid summary",
+                                         color=EmbedColor.INFO if ended else EmbedColor.ERROR)
+
+    @tasks.loop(seconds=15)
+    async def raid_summary(self) -> None:
+        """Post the raid summary and keep it up to date until the raid ends"""
+        if self.raid_view is None:
+            return
+
+        ended = self.joins.check_calm()
+        if not (self._raid_dirty or ended):
+            return
+        self._raid_dirty = False
+
+        # A failed update is retried on the next tick, the loop must outlive it
+        embeds = self._raid_embeds(ended)
+        try:
+            if self.raid_message is None:
+                mod_log = self.bot.get_channel(self.get_channel_cb("mod-log"))
+                if mod_log is None:
+                    self.log.error("Raid summary not posted, the mod-log channel is missing")
+                    self._raid_dirty = True
+                else:
+                    self.raid_message = await mod_log.send(embeds=embeds, view=self.raid_view)
+            else:
+                await self.raid_message.edit(embeds=embeds)
+        except disnake.NotFound:
+            self.log.warning("Raid summary message was deleted, posting a new one")
+            self.raid_message = None
+            self._raid_dirty = True
+        except disnake.HTTPException as error:
+            self.log.error(f"Could not update the raid summary: {error}")
+            self._raid_dirty = True
+
+        if ended:
+            self.log.warning(f"Raid ended with {len(self.raid_view.cohort)} joins")
+            self.raid_view = None
+            self.raid_message = None
+            self._raid_dirty = False
+
+    @raid_summary.before_loop
+    async def before_raid_summary(self):
+        await self.bot.wait_until_ready()
+
     @commands.Cog.listener()
     async def on_raw_thread_member_remove(
             self,
@@ -85,16 +264,31 @@ class EventDriver(commands.Cog):
               admins that the account is new
 
             - Otherwise, just log that a user has joined the server
+
+        During a raid the joins are only added to the rolling raid summary.
         """
         self.log.debug(f"User {member} has joined")
 
+        if self.joins.observe(member):
+            self._raid_dirty = True
+            if self.raid_view is None:
+                self.raid_view = RaidView(self.bot, self.joins.started_at, self.joins.cohort)
+                self.log.warning(f"Raid mode, {len(self.joins.window)} joins in "
+                                 f"{self.bot.settings.raid_window_seconds} seconds")
+                self.bot.queue_send(
+                    self.bot.get_channel(self.get_channel_cb("admin")),
+                    panel="Join wave detected, the joins are summarized in mod-log until it calms down.",
+                    color=EmbedColor.ERROR
+                )
+            return
+
         timelapse = datetime.now(timezone.utc) - member.created_at
         years = timelapse.days // 365
         days = timelapse.days % 365
 
         mod_log = self.bot.get_channel(self.get_channel_cb("mod-log"))
 
-        await self.bot.inter_send(
+        self.bot.queue_send(
             mod_log,
             title="New member has joined",
             panel=(f"`{'User:':<10}` {member.name}\n"
@@ -109,7 +303,7 @@ class EventDriver(commands.Cog):
 
         # Brand-new account, flag it
         if years == 0 and days < 30 and not member.bot:
-            await self.bot.inter_send(
+            self.bot.queue_send(
                 channel,
                 panel=f"New member, {member.name}, is less than one month old.",
                 author=member,
@@ -117,7 +311,7 @@ class EventDriver(commands.Cog):
             )
 
         if member.bot:
-            await self.bot.inter_send(
+            self.bot.queue_send(
                 channel,
                 panel=f"{member.mention} has just been invited to the "
                       f"server. \nPerhaps it is time to set up a demo "
@@ -142,7 +336,7 @@ class EventDriver(commands.Cog):
 
         mod_log = self.bot.get_channel(self.get_channel_cb("mod-log"))
 
-        await self.bot.inter_send(
+        self.bot.queue_send(
             mod_log,
             title="Member left",
             panel=f"`{'User:':<12}` {member.name}\n"
@@ -169,36 +363,61 @@ class EventDriver(commands.Cog):
         log what message was deleted. To ensure that everyone is following the
         rules, the bot will log all messages and display them when a user
         deletes their message
+
+        Messages are appended to the local message log and bulk loaded into
+        the database by the ingester. Messages of the guild members that
+        cannot manage messages also go through the spam detector.
         """
         if not self._is_valid(bot_user=message.author):
             return
 
-        await crud.set_message(self.bot.pool, message)
+        self.ingester.record_message(message)
+
+        if message.guild is None or message.guild.id != self.guild_id:
+            return
+        if message.author.guild_permissions.manage_messages:
+            return
+
+        hits = self.spam.observe(message.author.id, message.channel.id, message.content)
+        if hits:
+            await self._handle_spam(message, hits)
+
+        await self._scan(message)
 
     @commands.Cog.listener()
     async def on_message_edit(self, before: disnake.Message,
                               after: disnake.Message):
         """
-        Show a diff of the message that was edited.
+        Show a diff of the message that was edited and log the revision.
         """
-        if not before.content:
+        if before.content == after.content:
             return
 
-        if before.content == after.content:
+        if not self._is_valid(bot_user=before.author):
+            return
+
+        # Every revision of an ingested message is recorded, the revisions are
+        # chained diffs and a skipped one would corrupt all the later ones
+        self.ingester.record_edit(before, after)
+
+        if not before.content or before.guild is None:
             return
 
         if not self._is_valid(guild_id=before.guild.id,
-                              channel_id=before.channel.id,
-                              bot_user=before.author
-                              ):
+                              channel_id=before.channel.id):
             return
 
+        # A link edited into an older message is scanned as well
+        if (after.guild.id == self.guild_id
+                and not after.author.guild_permissions.manage_messages):
+            await self._scan(after)
+
         self.log.debug(f"**Message Edit Event:**\n\n"
                        f"```\n{before.content}\n```\n\n"
                        f"```\n{after.content}\n```")
 
         mod_log = self.bot.get_channel(self.get_channel_cb("mod-log"))
-        await self.bot.inter_send(
+        self.bot.queue_send(
             mod_log,
             panel=(f"Message Link: {after.jump_url}\n\n"
                    f"**Before:**\n{before.content}\n\n"
@@ -242,7 +461,10 @@ class EventDriver(commands.Cog):
 
         else:
             # if not cached, see if the message is in the db
-            message = await crud.get_message(self.bot.pool, payload.message_id)
+            try:
+                message = await crud.get_message(self.bot.pool, payload.message_id)
+            except db.DatabaseUnavailable:
+                message = None
 
             if message:
                 user = self.bot.get_user(message.user_id)
@@ -254,7 +476,7 @@ class EventDriver(commands.Cog):
                     f"Message deleted in <#{message.channel_id}>")
                 send_payload["panel"] = message.content
                 send_payload["footer"] = (f"ID: {message.message_id} | "
-                                          f"{message.created_at}")
+                                          f"{message.create_date}")
 
             else:
                 # otherwise we are shit out of luck
@@ -265,7 +487,7 @@ class EventDriver(commands.Cog):
                 send_payload["footer"] = f"ID: {payload.message_id}"
 
         mod_log = self.bot.get_channel(self.get_channel_cb("mod-log"))
-        await self.bot.inter_send(
+        self.bot.queue_send(
             mod_log,
             panel=send_payload.get("panel"),
             title=send_payload.get("title"),
@@ -274,6 +496,49 @@ class EventDriver(commands.Cog):
             color=EmbedColor.ERROR
         )
 
+    @commands.check(utils.is_admin)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def scanner(self, inter: disnake.ApplicationCommandInteraction):
+        """Command group to manage the message content scanner"""
+        pass
+
+    @scanner.sub_command(name="reload")
+    async def scanner_reload(self, inter: disnake.ApplicationCommandInteraction):
+        """
+        Reload the rules from scanner.json, the current rules stay if the file is invalid
+        """
+        try:
+            count = self.scanner.reload()
+        except (OSError, ValueError, KeyError, re.error) as error:
+            self.log.error("Content scanner reload failed", exc_info=True)
+            await self.bot.inter_send(inter,
+                                      panel=f"Rules not reloaded, the current ones are kept:\n{error}",
+                                      color=EmbedColor.ERROR)
+            return
+
+        await self.bot.inter_send(inter,
+                                  panel=f"Loaded {count} scanner rules",
+                                  color=EmbedColor.SUCCESS)
+
+    @scanner.sub_command(name="stats")
+    async def scanner_stats(self, inter: disnake.ApplicationCommandInteraction):
+        """
+        Show the scanner rules with their hits since start up
+        """
+        if not self.scanner.rules:
+            await self.bot.inter_send(inter, panel="No scanner rules are loaded")
+            return
+
+        lines = [f"{'Rule':<24} {'Action':<7} {'Patterns':>8} {'Hits':>6}"]
+        for rule in self.scanner.rules:
+            lines.append(f"{rule.name[:24]:<24} {rule.action.value:<7} "
+                         f"{len(rule.patterns):>8} {self.scanner.hits[rule.name]:>6}")
+
+        await self.bot.inter_send(inter,
+                                  panel="\n".join(lines),
+                                  title="Content scanner",
+                                  code_block=True)
+
 
 def setup(bot):
     bot.add_cog(EventDriver(bot))
@@ -0,0 +1,160 @@
+import logging
+import time
+
+import disnake
+from disnake.ext import commands
+
+from bot import BotClient
+from packages.config import guild_ids
+from packages.utils import utils
+from packages.utils.faq import FaqDocument, FaqIndex, tokenize
+from packages.utils.utils import EmbedColor
+from packages.views.faq_suggest_view import FaqSuggestView
+
+# Titles of the FAQs served by the shortcut commands
+RATE_LIMIT_FAQ = "CoC API Rate Limit"
+CACHING_FAQ = "CoC API Response Caching"
+
+# Channels in the cooldown cache before the expired ones are dropped
+COOLDOWN_CACHE_SIZE = 500
+
+
+class Faq(commands.Cog):
+    def __init__(self, bot: BotClient):
+        self.bot = bot
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.Faq")
+        self.index = FaqIndex(self.bot.settings.faq_path, self.log)
+        self.index.reload()
+        self.log.info(f"Indexed {len(self.index.documents)} FAQs")
+
+        settings = self.bot.settings
+        self.suggest_channels = settings.faq_suggest_channels
+        self.suggest_cooldown = settings.faq_suggest_cooldown_minutes * 60
+        self.suggest_min_length = settings.faq_suggest_min_length
+        self.suggest_min_matches = settings.faq_suggest_min_matches
+
+        # Channel or thread id -> monotonic time of its last suggestion
+        self._last_suggestion: dict[int, float] = {}
+
+    async def _send_faq(self,
+                        inter: disnake.ApplicationCommandInteraction,
+                        document: FaqDocument | None,
+                        content: str | None = None) -> None:
+        if document is None:
+            await self.bot.inter_send(inter, panel="Could not find that FAQ.",
+                                      color=EmbedColor.ERROR)
+            return
+        await inter.send(content=content, embeds=document.embeds)
+
+    def _on_cooldown(self, channel_id: int, now: float) -> bool:
+        last = self._last_suggestion.get(channel_id)
+        return last is not None and now - last < self.suggest_cooldown
+
+    @commands.Cog.listener()
+    async def on_message(self, message: disnake.Message) -> None:
+        """
+        Suggest a FAQ for questions asked in the opted in help channels. The
+        cheap checks run first, a message reaching the index is tokenized
+        once and matched with a set intersection against the keywords.
+        """
+        if not self.suggest_channels or message.author.bot:
+            return
+        if len(message.content) < self.suggest_min_length:
+            return
+
+        # Threads of a help channel or forum are opted in with their parent
+        channel = message.channel
+        if channel.id not in self.suggest_channels and \
+                getattr(channel, "parent_id", None) not in self.suggest_channels:
+            return
+
+        now = time.monotonic()
+        if self._on_cooldown(channel.id, now):
+            return
+
+        document = self.index.suggest(set(tokenize(message.content)), self.suggest_min_matches)
+        if document is None:
+            return
+
+        if len(self._last_suggestion) >= COOLDOWN_CACHE_SIZE:
+            self._last_suggestion = {channel_id: last for channel_id, last in self._last_suggestion.items()
+                                     if now - last < self.suggest_cooldown}
+        self._last_suggestion[channel.id] = now
+
+        self.log.debug(f"Suggesting `{document.title}` in #{channel} to {message.author}")
+        self.bot.dispatcher.enqueue(channel,
+                                    content=f"{message.author.mention} this FAQ might answer "
+                                            f"your question: **{document.title}**",
+                                    view=FaqSuggestView(self.bot, document))
+
+    @commands.slash_command(guild_ids=guild_ids())
+    async def faq(self,
+                  inter: disnake.ApplicationCommandInteraction,
+                  query: str):
+        """
+        Search the frequently asked questions
+
+        Parameters
+        ----------
+        query
+            A FAQ title or the words to search for
+        """
+        document = self.index.get(query)
+        if document is not None:
+            await self._send_faq(inter, document)
+            return
+
+        results = self.index.search(query, limit=4)
+        if not results:
+            await self.bot.inter_send(inter,
+                                      panel=f"No FAQ matches `{query}`. Try one of the titles "
+                                            f"suggested while typing.",
+                                      color=EmbedColor.ERROR)
+            return
+
+        others = ", ".join(f"`{document.title}`" for document, _ in results[1:])
+        await self._send_faq(inter, results[0][0],
+                             content=f"See also: {others}" if others else None)
+
+    @faq.autocomplete("query")
+    async def faq_autocomplete(self,
+                               inter: disnake.ApplicationCommandInteraction,
+                               query: str) -> list[str]:
+        return self.index.complete(query)
+
+    @commands.check(utils.is_admin)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def faq_reload(self, inter: disnake.ApplicationCommandInteraction):
+        """
+        Re-index the FAQ files that changed since the last load
+        """
+        added, updated, removed = self.index.reload()
+        if not (added or updated or removed):
+            await self.bot.inter_send(inter, panel="No FAQ has changed.")
+            return
+
+        lines = [f"`{label:<8}` {', '.join(titles)}"
+                 for label, titles in (("Added:", added), ("Updated:", updated), ("Removed:", removed))
+                 if titles]
+        await self.bot.inter_send(inter,
+                                  panel="\n".join(lines),
+                                  title="FAQ index reloaded",
+                                  color=EmbedColor.SUCCESS)
+
+    @commands.slash_command(guild_ids=guild_ids())
+    async def rate_limit(self, inter: disnake.ApplicationCommandInteraction):
+        """Responds with the rate limit information for the Clash API"""
+        await self._send_faq(inter, self.index.get(RATE_LIMIT_FAQ))
+
+    @commands.slash_command(guild_ids=guild_ids())
+    async def cache_times(self,
+                          inter: disnake.ApplicationCommandInteraction):
+        """
+        Responds with the max age of the information for each endpoint in the
+        Clash API
+        """
+        await self._send_faq(inter, self.index.get(CACHING_FAQ))
+
+
+def setup(bot):
+    bot.add_cog(Faq(bot))
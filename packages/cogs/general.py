@@ -1,14 +1,60 @@
+import logging
+
 import disnake
 from disnake.ext import commands
 
 from packages.config import guild_ids
+from packages.utils import utils
+from packages.utils.responses import ResponseRegistry
+from packages.utils.utils import EmbedColor
 
 from bot import BotClient
 
 
 class General(commands.Cog):
+    """
+    The canned answers are not defined here, each entry of responses.json
+    is registered as a slash command served from the prebuilt embeds.
+    """
+
     def __init__(self, bot: BotClient):
         self.bot = bot
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.General")
+        self.registry = ResponseRegistry(self.bot.settings.responses_path)
+
+        # Names this cog added, a response shadowed by another command is not one of them
+        self._registered: set[str] = set()
+
+        added, _ = self.registry.reload()
+        for name in sorted(added):
+            self._add_response_command(name)
+
+    def cog_unload(self):
+        for name in self._registered:
+            self.bot.remove_slash_command(name)
+        self._registered.clear()
+
+    def _add_response_command(self, name: str) -> None:
+        if self.bot.get_slash_command(name) is not None:
+            self.log.error(f"Response `{name}` is shadowed by an existing slash command")
+            return
+
+        async def respond(inter: disnake.ApplicationCommandInteraction) -> None:
+            # Looked up on every call so a reload swaps the answer in place
+            response = self.registry.get(inter.data.name)
+            if response is None:
+                await self.bot.inter_send(inter, panel="This response has been removed.",
+                                          color=EmbedColor.ERROR)
+                return
+            await inter.response.send_message(embeds=response.embeds)
+
+        self.bot.add_slash_command(commands.InvokableSlashCommand(
+            respond,
+            name=name,
+            description=self.registry.get(name).description,
+            guild_ids=guild_ids()
+        ))
+        self._registered.add(name)
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -16,83 +62,41 @@ class General(commands.Cog):
         if message.channel.id == welcome_channel and message.type is disnake.MessageType.thread_created:
             await message.delete(delay=5)
 
+    @commands.check(utils.is_admin)
     @commands.slash_command(guild_ids=guild_ids())
-    async def invite(self, inter: disnake.ApplicationCommandInteraction):
-        """Responds with the invite link to this server"""
-        await self.bot.inter_send(inter, "https://discord.gg/clashapi")
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def regex(self, inter: disnake.ApplicationCommandInteraction):
-        """Responds with the RegEx for player/clan tags"""
-        await self.bot.inter_send(inter, "^#[PYLQGRJCUV0289]{3,9}$")
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def rate_limit(self, inter: disnake.ApplicationCommandInteraction):
-        """Responds with the rate limit information for the Clash API"""
-        await self.bot.inter_send(
-            inter,
-            "We have found that the approximate rate limit is 30-40 requests "
-            "per second. Staying below this should be safe."
-        )
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def cache_times(self,
-                          inter: disnake.ApplicationCommandInteraction):
-        """
-        Responds with the max age of the information for each endpoint in the
-        Clash API
-        """
-        payload = (f"{'Clans:':<14}`2 minutes`\n"
-                   f"{'Current War:':<14}`2 minutes`\n"
-                   f"{'Other War:':<14}`10 Minutes`\n"
-                   f"{'Players':<14}`1 Minute`\n"
-                   )
-        await self.bot.inter_send(inter, panel=payload,
-                                  title="Max age of information due to caching"
-                                  )
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def vps(self, inter: disnake.ApplicationCommandInteraction):
-        """Responds with a link to a GitHub MD on VPS options"""
-        await self.bot.inter_send(
-            inter,
-            "<https://github.com/majordoobie/HogRider/blob/main/Rules/vps_services.md>")
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def rules(self, inter: disnake.ApplicationCommandInteraction):
-        """Respond with a link to the rules markdown file."""
-        await self.bot.inter_send(
-            inter,
-            "<https://github.com/wpmjones/apibot/blob/master/Rules/code_of_conduct.md>"
-        )
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def getting_started(self, inter: disnake.ApplicationCommandInteraction):
+    async def responses_reload(self, inter: disnake.ApplicationCommandInteraction):
         """
-        Respond with a link to the getting started markdown
+        Reload the canned answers from responses.json
         """
-        await self.bot.inter_send(
-            inter,
-            "https://github.com/majordoobie/HogRider/blob/main/Rules/getting_started.md"
-        )
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def coc_wrappers(self,
-                           inter: disnake.ApplicationCommandInteraction):
-        """Provide link to the list of coc_wrappers created by @Doluk"""
-        await self.bot.inter_send(
-            inter,
-            "<https://coc-libs.vercel.app/>"
-        )
-
-    @commands.slash_command(guild_ids=guild_ids())
-    async def discord_wrappers(self,
-                               inter: disnake.ApplicationCommandInteraction):
-        """Respond with a link to a list of known discord wrappers"""
-        await self.bot.inter_send(
-            inter,
-            "<https://libs.advaith.io/>"
-        )
+        old = {name: response.description for name, response in self.registry.responses.items()}
+        try:
+            added, removed = self.registry.reload()
+        except (OSError, KeyError, ValueError) as error:
+            self.log.error("Responses reload failed", exc_info=True)
+            await self.bot.inter_send(inter,
+                                      panel=f"Responses not reloaded, the current ones are kept:\n{error}",
+                                      color=EmbedColor.ERROR)
+            return
+
+        # A new description is part of the command definition as well
+        changed = {name for name, description in old.items()
+                   if name in self.registry.responses
+                   and self.registry.get(name).description != description}
+
+        for name in (removed | changed) & self._registered:
+            self.bot.remove_slash_command(name)
+            self._registered.discard(name)
+        for name in sorted(added | changed):
+            self._add_response_command(name)
+        if added or removed or changed:
+            self.bot.schedule_command_sync()
+
+        panel = f"Loaded {len(self.registry.responses)} responses"
+        if added:
+            panel += f"\n`{'Added:':<8}` {', '.join(sorted(added))}"
+        if removed:
+            panel += f"\n`{'Removed:':<8}` {', '.join(sorted(removed))}"
+        await self.bot.inter_send(inter, panel=panel, color=EmbedColor.SUCCESS)
 
 
 def setup(bot):
@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import disnake
+from disnake.ext import commands
+
+from bot import BotClient
+from packages.config import guild_ids
+from packages.utils import crud, utils
+from packages.utils.diffs import apply_diff
+from packages.views.paginator import Paginator
+
+PAGE_SIZE = 15
+PREVIEW_LENGTH = 150
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise commands.BadArgument(f"`{value}` is not a date in the YYYY-MM-DD format")
+
+
+class Moderation(commands.Cog):
+    def __init__(self, bot: BotClient):
+        self.bot = bot
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.Moderation")
+
+    def _format_message(self, message) -> str:
+        created = disnake.utils.snowflake_time(message.message_id)
+        content = disnake.utils.escape_markdown(message.content or "").replace("\n", " ")
+        if len(content) > PREVIEW_LENGTH:
+            content = f"{content[:PREVIEW_LENGTH]}..."
+
+        jump_url = (f"https://discord.com/channels/{self.bot.settings.guild}/"
+                    f"{message.channel_id}/{message.message_id}")
+        return (f"[`{created.strftime('%Y-%m-%d %H:%M')}`]({jump_url}) "
+                f"<@{message.user_id}> <#{message.channel_id}>\n{content}")
+
+    @commands.check(utils.is_admin)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def search_messages(self,
+                              inter: disnake.ApplicationCommandInteraction,
+                              text: str | None = None,
+                              user: disnake.User | None = None,
+                              channel: disnake.TextChannel | None = None,
+                              since: str | None = None,
+                              until: str | None = None):
+        """
+        Search the message log, newest messages first
+
+        Parameters
+        ----------
+        text
+            Words to search for, supports "quoted phrases", or and -excluded
+        user
+            Only show messages from this user
+        channel
+            Only show messages from this channel
+        since
+            First day to search, YYYY-MM-DD
+        until
+            Last day to search, YYYY-MM-DD
+        """
+        if not any((text, user, channel, since, until)):
+            raise commands.BadArgument("Provide at least one filter to search with")
+
+        # Message ids are snowflakes, the dates become id bounds
+        after_id = None
+        if since:
+            after_id = disnake.utils.time_snowflake(_parse_date(since))
+
+        before_id = None
+        if until:
+            before_id = disnake.utils.time_snowflake(_parse_date(until) + timedelta(days=1))
+
+        await inter.response.defer()
+
+        async def fetch_page(cursor: int | None) -> tuple[str, int | None]:
+            messages = await crud.search_messages(
+                self.bot.pool,
+                text=text,
+                user_id=user.id if user else None,
+                channel_id=channel.id if channel else None,
+                after_id=after_id,
+                before_id=cursor if cursor is not None else before_id,
+                limit=PAGE_SIZE + 1
+            )
+            if not messages:
+                return "No messages found", None
+
+            # The extra row only tells if there is a next page
+            next_cursor = messages[PAGE_SIZE - 1].message_id if len(messages) > PAGE_SIZE else None
+            return "\n\n".join(self._format_message(message)
+                               for message in messages[:PAGE_SIZE]), next_cursor
+
+        paginator = Paginator(self.bot, inter.author.id, fetch_page, title="Message Search")
+        await paginator.start(inter)
+
+    @commands.check(utils.is_admin)
+    @commands.slash_command(guild_ids=guild_ids())
+    async def message_history(self,
+                              inter: disnake.ApplicationCommandInteraction,
+                              message_id: str):
+        """
+        Show every revision of a logged message
+
+        Parameters
+        ----------
+        message_id
+            ID of the message
+        """
+        if not message_id.isdigit():
+            raise commands.BadArgument(f"`{message_id}` is not a message ID")
+
+        await inter.response.defer()
+        timeline = await crud.get_message_timeline(self.bot.pool, int(message_id))
+        if timeline is None:
+            await self.bot.inter_send(inter, panel="Message was not found in the message log")
+            return
+
+        message, edits = timeline
+        content = message.content or ""
+        created = disnake.utils.snowflake_time(message.message_id)
+        panels = [f"**Original** `{created.strftime('%Y-%m-%d %H:%M:%S')}`\n{content}"]
+        for revision, edit in enumerate(edits, start=1):
+            content = apply_diff(content, edit.diff)
+            panels.append(f"**Revision {revision}** "
+                          f"`{edit.edited_at.strftime('%Y-%m-%d %H:%M:%S')}`\n{content}")
+
+        await self.bot.inter_send(inter,
+                                  panels=panels,
+                                  title=f"Edit history of {message.message_id}",
+                                  footer=f"Channel: #{self.bot.get_channel(message.channel_id)} | "
+                                         f"User ID: {message.user_id}")
+
+
+def setup(bot):
+    bot.add_cog(Moderation(bot))
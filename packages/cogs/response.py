@@ -13,7 +13,7 @@ from matplotlib.ticker import NullFormatter
 
 from bot import BotClient
 from packages.config import guild_ids, BotMode
-from packages.utils import crud
+from packages.utils import crud, db
 
 BASE = "https://api.clashofclans.com/v1"
 END_POINTS = [
@@ -30,13 +30,17 @@ class Response(commands.Cog):
         self.log: logging.Logger = logging.getLogger(f"{self.bot.settings.log_name}.{self.__class__.__name__}")
 
         if self.bot.settings.mode == BotMode.LIVE_MODE:
-            self.response_update.add_exception_type(asyncpg.PostgresConnectionError)
+            self.response_update.add_exception_type(asyncpg.PostgresConnectionError,
+                                                    db.DatabaseUnavailable)
+            self.server_display_update.add_exception_type(db.DatabaseUnavailable)
             self.response_update.start()
             self.server_display_update.start()
 
     @tasks.loop(minutes=10)
     async def server_display_update(self):
         records = await crud.get_api_response(self.bot.pool)
+        if records is None:
+            return
 
         channel = self.bot.get_channel(self.bot.settings.get_channel("resp_update"))
         if channel is not None:
@@ -53,6 +57,12 @@ class Response(commands.Cog):
 
     @tasks.loop(minutes=10)
     async def response_update(self) -> None:
+        if self.bot.maintenance.active:
+            # A single probe is enough to notice the end of the maintenance,
+            # nothing is stored until the next full sample
+            await self.get_response_times(END_POINTS[:1])
+            return
+
         response_times = await self.get_response_times()
         if -1 not in response_times:
             await crud.set_api_response(self.bot.pool, *response_times)
@@ -61,18 +71,32 @@ class Response(commands.Cog):
     @response_update.before_loop
     async def before_loops(self):
         await self.bot.wait_until_ready()
+        await self.bot.maintenance.restore()
 
     def cog_unload(self):
         self.response_update.cancel()
         self.server_display_update.cancel()
 
-    async def get_response_times(self) -> list[int]:
-        """Cycle through all the endpoints to fetch their response times"""
-        tasks = [self.get_response_time(url, next(self.bot.coc_client.http.keys), self.log) for url in END_POINTS]
-        return await asyncio.gather(*tasks)
+    async def get_response_times(self, end_points: list[str] = END_POINTS) -> list[int]:
+        """
+        Cycle through the endpoints to fetch their response times. The status
+        codes are reported to the maintenance tracker, a 503 opens a window
+        and a clean sample closes it.
+        """
+        tasks = [self.get_response_time(url, next(self.bot.coc_client.http.keys), self.log) for url in end_points]
+        results = await asyncio.gather(*tasks)
+
+        statuses = [status for status, _ in results]
+        if 503 in statuses:
+            await self.bot.maintenance.begin("latency sampler")
+        elif all(status == 200 for status in statuses):
+            await self.bot.maintenance.end("latency sampler")
+
+        return [response_time for _, response_time in results]
 
     @staticmethod
-    async def get_response_time(url: str, auth_token: str, log: logging.Logger) -> int:
+    async def get_response_time(url: str, auth_token: str, log: logging.Logger) -> tuple[int, int]:
+        """Returns the status code, 0 without a response, and the response time or -1"""
         header = {
             "Content-Type": "application/json",
             "Accept": "application/json",
@@ -81,11 +105,13 @@ class Response(commands.Cog):
 
         start = time.perf_counter_ns()
         stop = -1
+        status = 0
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.get(f"{BASE}{url}", headers=header) as resp:
+                    status = resp.status
                     if resp.status == 503:
-                        log.warn("Cannot retrieve API response times due to maintenance")
+                        log.debug(f"Cannot retrieve {BASE}{url} due to maintenance")
 
                     elif resp.status != 200:
                         log.error(f"Error trying to get {BASE}{url}: {await resp.text()}")
@@ -99,8 +125,16 @@ class Response(commands.Cog):
         if stop != -1:
             # Convert nanoseconds to milliseconds
             stop = int((stop - start) / 1_000_000)
-        return stop
+        return status, stop
 
+    async def _send_current_times(self, inter: disnake.ApplicationCommandInteraction) -> None:
+        """Fallback when there is no history to plot"""
+        response_times = await self.get_response_times()
+        panel = ("Sorry, not enough historical data to show graph. Here is the current response times:\n"
+                 f"`Player:`{response_times[0]}\n"
+                 f"`Clan:`{response_times[1]}\n"
+                 f"`War:`{response_times[2]}\n")
+        await self.bot.inter_send(inter, panel=panel)
 
     @commands.slash_command(guild_ids=guild_ids())
     async def response_times(self,
@@ -110,19 +144,30 @@ class Response(commands.Cog):
         records = await crud.get_api_response_24h(self.bot.pool)
 
         if len(records) == 0:
-            response_times = await self.get_response_times()
             self.log.error("Did not get any columns for resonse_times")
-
-            panel = ("Sorry, not enough historical data to show graph. Here is the current response times:\n"
-                     f"`Player:`{response_times[0]}\n"
-                     f"`Clan:`{response_times[1]}\n"
-                     f"`War:`{response_times[2]}\n")
-            await self.bot.inter_send(inter, panel=panel)
+            await self._send_current_times(inter)
             return
 
         columns = [key for key in records[0].__dict__.keys()]
         df = pd.DataFrame(records, columns=columns)
 
+        # Samples taken during a maintenance window are left out of the quartiles
+        first_check = df['check_time'].min()
+        now = datetime.now()
+        # A window that ended before the first sample is outside of the graph
+        windows = [(window.start_time, window.end_time or now)
+                   for window in await crud.get_maintenance_24h(self.bot.pool)
+                   if (window.end_time or now) >= first_check]
+        in_maintenance = pd.Series(False, index=df.index)
+        for start, end in windows:
+            in_maintenance |= df['check_time'].between(start, end)
+        df = df[~in_maintenance].reset_index(drop=True)
+
+        if df.empty:
+            self.log.warning("Every response time sample of the last 24 hours is in a maintenance window")
+            await self._send_current_times(inter)
+            return
+
         # Calculate Q1 and Q3 for each column (excluding 'check_time')
         Q1 = df[['clan_resp', 'player_resp', 'war_resp']].quantile(0.25)
         Q3 = df[['clan_resp', 'player_resp', 'war_resp']].quantile(0.75)
@@ -139,7 +184,12 @@ class Response(commands.Cog):
         """The following code was graciously provided by @lukasthaler"""
         # generate plot
         plot = df.plot.line(x='check_time', y=['clan_resp', 'player_resp', 'war_resp'],
-                            title='API Latencies', grid=True, xlabel='Last 24 hours', ylabel='Response Time (ms)')
+                            title='API Latencies', grid=True, xlabel='Last 24 hours', ylabel='Response Time (ms)',
+                            x_compat=True)
+
+        # shade the maintenance windows
+        for start, end in windows:
+            plot.axvspan(max(start, first_check), end, color='grey', alpha=0.3)
 
         # customize legend
         _, labels = plot.get_legend_handles_labels()
@@ -113,10 +113,13 @@ class Settings:
                 "admin",
                 "event_driver",
                 "general",
+                "faq",
                 "language_board",
                 "welcome",
                 "response",
                 "demo_bots",
+                "moderation",
+                "downtime",
             ]
 
         else:
@@ -125,6 +128,20 @@ class Settings:
                 "demo_bots",
             ]
 
+    @staticmethod
+    def get_cog_requirements(cog: str) -> set[str]:
+        """Dependencies that must be healthy before the cog is loaded"""
+        requirements = {
+            "event_driver": {"db"},
+            "language_board": {"db"},
+            "welcome": {"db"},
+            "response": {"db", "coc"},
+            "demo_bots": {"db"},
+            "moderation": {"db"},
+            "downtime": {"db", "coc"},
+        }
+        return requirements.get(cog, set())
+
     @property
     def logs_channel(self) -> int:
         return self.conf["channels"]["logs"]
@@ -137,6 +154,207 @@ class Settings:
     def bot_demo_category(self) -> int:
         return self.conf["category"]["bot_demo"]
 
+    @property
+    def db_pool_args(self) -> dict:
+        """Keyword arguments for asyncpg.create_pool"""
+        conf = self.conf["database"]
+        return {
+            "min_size": conf["min_size"],
+            "max_size": conf["max_size"],
+            "statement_cache_size": conf["statement_cache_size"],
+            "command_timeout": conf["command_timeout"],
+            "max_inactive_connection_lifetime": conf["max_inactive_connection_lifetime"],
+            "max_queries": conf["max_queries"],
+        }
+
+    @property
+    def db_acquire_timeout(self) -> float:
+        return self.conf["database"]["acquire_timeout"]
+
+    @property
+    def db_slow_query_ms(self) -> float:
+        return self.conf["database"]["slow_query_ms"]
+
+    @property
+    def db_query_timeouts(self) -> dict[str, float]:
+        """Per query overrides of the pool command timeout"""
+        return self.conf["database"]["query_timeouts"]
+
+    @property
+    def db_breaker_threshold(self) -> int:
+        """Consecutive connection failures before the circuit breaker opens"""
+        return self.conf["database"]["breaker_threshold"]
+
+    @property
+    def db_breaker_reset_seconds(self) -> float:
+        return self.conf["database"]["breaker_reset_seconds"]
+
+    @property
+    def spool_path(self) -> Path:
+        """Directory of the local spool files, relative to the working directory"""
+        return Path(self.conf["spool"]["path"])
+
+    @property
+    def spool_max_bytes(self) -> int:
+        return self.conf["spool"]["max_mb"] * 1024 * 1024
+
+    @property
+    def message_log_path(self) -> Path:
+        return self.spool_path / "messages"
+
+    @property
+    def message_segment_bytes(self) -> int:
+        return self.conf["message_log"]["segment_kb"] * 1024
+
+    @property
+    def message_log_max_bytes(self) -> int:
+        """Cap of the segments waiting to be ingested"""
+        return self.conf["message_log"]["max_mb"] * 1024 * 1024
+
+    @property
+    def message_ingest_seconds(self) -> float:
+        return self.conf["message_log"]["ingest_seconds"]
+
+    @property
+    def downtime_confirm_seconds(self) -> float:
+        """Seconds a bot must stay offline before it is reported down"""
+        return self.conf["downtime"]["confirm_seconds"]
+
+    @property
+    def downtime_sweep_minutes(self) -> float:
+        """Minutes between the sweeps looking for due downtime reminders"""
+        return self.conf["downtime"]["sweep_minutes"]
+
+    @property
+    def downtime_reminder_hours(self) -> float:
+        return self.conf["downtime"]["reminder_hours"]
+
+    @property
+    def downtime_reminders_per_second(self) -> float:
+        return self.conf["downtime"]["reminders_per_second"]
+
+    @property
+    def spam_window_seconds(self) -> float:
+        return self.conf["spam"]["window_seconds"]
+
+    @property
+    def spam_user_messages(self) -> int:
+        """Messages from one user inside the window that trip the detector"""
+        return self.conf["spam"]["user_messages"]
+
+    @property
+    def spam_channel_messages(self) -> int:
+        """Messages in one channel inside the window that trip the detector"""
+        return self.conf["spam"]["channel_messages"]
+
+    @property
+    def spam_duplicate_messages(self) -> int:
+        """Copies of the same content inside the window that trip the detector"""
+        return self.conf["spam"]["duplicate_messages"]
+
+    @property
+    def spam_duplicate_min_length(self) -> int:
+        """Shorter messages are not checked for copies, "lol" is not a flood"""
+        return self.conf["spam"]["duplicate_min_length"]
+
+    @property
+    def spam_incident_minutes(self) -> float:
+        """Quiet minutes after which an incident is closed"""
+        return self.conf["spam"]["incident_minutes"]
+
+    @property
+    def spam_timeout_minutes(self) -> float:
+        """Timeout given to the offenders, 0 only alerts mod-log"""
+        return self.conf["spam"]["timeout_minutes"]
+
+    @property
+    def responses_path(self) -> Path:
+        return _config_path / "responses.json"
+
+    @property
+    def faq_path(self) -> Path:
+        return Path("FAQs")
+
+    @property
+    def faq_suggest_channels(self) -> set[int]:
+        """Help channels opted in to the FAQ suggestions, by channel name"""
+        channels = {self.get_channel(name) for name in self.conf["faq_suggest"]["channels"]}
+        channels.discard(None)
+        return channels
+
+    @property
+    def faq_suggest_cooldown_minutes(self) -> float:
+        """Minutes between two suggestions in the same channel or thread"""
+        return self.conf["faq_suggest"]["cooldown_minutes"]
+
+    @property
+    def faq_suggest_min_length(self) -> int:
+        return self.conf["faq_suggest"]["min_length"]
+
+    @property
+    def faq_suggest_min_matches(self) -> int:
+        """Keywords a message must share with a FAQ for it to be suggested"""
+        return self.conf["faq_suggest"]["min_matches"]
+
+    @property
+    def scanner_rules_path(self) -> Path:
+        return _config_path / "scanner.json"
+
+    @property
+    def raid_window_seconds(self) -> float:
+        return self.conf["raid"]["window_seconds"]
+
+    @property
+    def raid_join_threshold(self) -> int:
+        """Joins inside the window that switch into raid mode"""
+        return self.conf["raid"]["join_threshold"]
+
+    @property
+    def raid_calm_minutes(self) -> float:
+        """Minutes under the threshold before the raid mode ends"""
+        return self.conf["raid"]["calm_minutes"]
+
+    @property
+    def raid_summary_seconds(self) -> float:
+        """Seconds between two edits of the raid summary"""
+        return self.conf["raid"]["summary_seconds"]
+
+    @property
+    def raid_young_days(self) -> int:
+        """Accounts younger than this are targeted by the new account kick"""
+        return self.conf["raid"]["young_days"]
+
+    @property
+    def raid_kicks_per_second(self) -> float:
+        return self.conf["raid"]["kicks_per_second"]
+
+    @property
+    def demo_reconcile_hours(self) -> float:
+        """Hours between demo channel reconciliations, 0 disables it"""
+        return self.conf["demo"]["reconcile_hours"]
+
+    @property
+    def demo_dry_run(self) -> bool:
+        """Only report what the scheduled reconciliation would clean up"""
+        return self.conf["demo"]["dry_run"]
+
+    @property
+    def demo_actions_per_second(self) -> float:
+        return self.conf["demo"]["actions_per_second"]
+
+    @property
+    def audit_flush_seconds(self) -> int:
+        return self.conf["audit"]["flush_seconds"]
+
+    @property
+    def audit_store(self) -> bool:
+        return self.conf["audit"]["store"]
+
+    @property
+    def perf_flush_minutes(self) -> int:
+        """Minutes between metric flushes to the database, 0 disables it"""
+        return self.conf["perf"]["flush_minutes"]
+
     def get_role(self, role: str) -> int:
         return self.conf["roles"].get(role, None)
 
@@ -3,9 +3,19 @@ def init_tables() -> list[str]:
         _table_create_language_board(),
         _table_create_smelly_mike(),
         _table_create_user_message(),
+        _index_create_user_message(),
+        _table_create_user_message_edit(),
         _table_create_thread_manager(),
         _table_create_bot_responses(),
         _table_create_demo_channel(),
+        _index_create_demo_channel(),
+        _index_create_demo_channel_bot(),
+        _table_create_command_audit(),
+        _table_create_perf_metrics(),
+        _table_create_bot_owners(),
+        _table_create_bot_downtime(),
+        _table_create_bot_uptime_daily(),
+        _table_create_api_maintenance(),
     ]
 
 
@@ -42,6 +52,29 @@ def _table_create_user_message() -> str:
     """
 
 
+def _index_create_user_message() -> str:
+    # The expression of the GIN index must match the one used by the search
+    return """\
+    CREATE INDEX IF NOT EXISTS user_message_content_search
+        ON user_message USING GIN (to_tsvector('english', coalesce(content, '')));
+    CREATE INDEX IF NOT EXISTS user_message_user
+        ON user_message (user_id, message_id);
+    CREATE INDEX IF NOT EXISTS user_message_channel
+        ON user_message (channel_id, message_id);
+    """
+
+
+def _table_create_user_message_edit() -> str:
+    return """\
+    CREATE TABLE IF NOT EXISTS user_message_edit (
+        message_id BIGINT NOT NULL,
+        edited_at TIMESTAMPTZ NOT NULL,
+        diff JSON NOT NULL,
+        PRIMARY KEY(message_id, edited_at)
+    );
+    """
+
+
 def _table_create_thread_manager() -> str:
     return """\
     CREATE TABLE IF NOT EXISTS thread_manager (
@@ -74,3 +107,105 @@ def _table_create_demo_channel() -> str:
         PRIMARY KEY(channel_id)
     )
     """
+
+
+def _index_create_demo_channel() -> str:
+    return """\
+    CREATE INDEX IF NOT EXISTS demo_channel_listing
+        ON demo_channel (creation_date, channel_id);
+    CREATE INDEX IF NOT EXISTS demo_channel_owner
+        ON demo_channel (owner_id);
+    """
+
+
+def _index_create_demo_channel_bot() -> str:
+    # Kept on its own, it fails on existing duplicates without rolling back the others
+    return """\
+    CREATE UNIQUE INDEX IF NOT EXISTS demo_channel_bot_key
+        ON demo_channel (bot_id);
+    """
+
+
+def _table_create_command_audit() -> str:
+    return """\
+    CREATE TABLE IF NOT EXISTS command_audit (
+        invoked_at TIMESTAMP NOT NULL,
+        user_id BIGINT NOT NULL,
+        user_name TEXT NOT NULL,
+        channel_id BIGINT NOT NULL,
+        command TEXT NOT NULL,
+        options JSON NOT NULL
+    )
+    """
+
+
+def _table_create_bot_owners() -> str:
+    return """\
+    CREATE TABLE IF NOT EXISTS bot_owners (
+        bot_id BIGINT NOT NULL,
+        name TEXT NOT NULL,
+        owner_id BIGINT NOT NULL,
+        channel_id BIGINT NOT NULL,
+        monitor BOOLEAN NOT NULL DEFAULT TRUE,
+        email TEXT,
+        PRIMARY KEY(bot_id)
+    )
+    """
+
+
+def _table_create_bot_downtime() -> str:
+    return """\
+    CREATE TABLE IF NOT EXISTS bot_downtime (
+        bot_id BIGINT NOT NULL,
+        online BOOLEAN NOT NULL,
+        offline_start TIMESTAMP NOT NULL,
+        offline_end TIMESTAMP,
+        last_notification TIMESTAMP NOT NULL,
+        reported BOOLEAN NOT NULL DEFAULT FALSE
+    );
+    CREATE INDEX IF NOT EXISTS bot_downtime_open
+        ON bot_downtime (bot_id) WHERE online = FALSE;
+    """
+
+
+def _table_create_bot_uptime_daily() -> str:
+    return """\
+    CREATE TABLE IF NOT EXISTS bot_uptime_daily (
+        bot_id BIGINT NOT NULL,
+        day DATE NOT NULL,
+        down_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+        recoveries INTEGER NOT NULL DEFAULT 0,
+        repair_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+        PRIMARY KEY(bot_id, day)
+    )
+    """
+
+
+def _table_create_api_maintenance() -> str:
+    return """\
+    CREATE TABLE IF NOT EXISTS api_maintenance (
+        start_time TIMESTAMP NOT NULL,
+        end_time TIMESTAMP,
+        duration_seconds DOUBLE PRECISION,
+        source TEXT NOT NULL,
+        PRIMARY KEY(start_time)
+    )
+    """
+
+
+def _table_create_perf_metrics() -> str:
+    return """\
+    CREATE TABLE IF NOT EXISTS perf_metrics (
+        flush_time TIMESTAMP NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        calls INTEGER NOT NULL,
+        errors INTEGER NOT NULL,
+        wall_p50 REAL NOT NULL,
+        wall_p95 REAL NOT NULL,
+        wall_max REAL NOT NULL,
+        first_response_p95 REAL NOT NULL,
+        db_mean REAL NOT NULL,
+        api_mean REAL NOT NULL
+    )
+    """
@@ -0,0 +1,88 @@
+"""
+Command auditing. Every slash command is recorded as a small structured
+record without any network calls. A background loop periodically posts the
+buffered records as a digest to mod-log and optionally stores them.
+"""
+import logging
+from collections import deque
+from typing import TYPE_CHECKING
+
+import disnake
+from disnake.ext import tasks
+
+from packages.config import BotMode
+from . import crud, models
+from .utils import EmbedColor
+
+if TYPE_CHECKING:
+    from bot import BotClient
+
+MAX_BUFFER = 5000
+
+
+class CommandAuditor:
+    def __init__(self, bot: "BotClient") -> None:
+        self.bot = bot
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.{self.__class__.__name__}")
+        self.buffer: deque[models.CommandAudit] = deque(maxlen=MAX_BUFFER)
+        self.flush_loop = tasks.loop(seconds=self.bot.settings.audit_flush_seconds)(self.flush)
+
+    def start(self) -> None:
+        if not self.flush_loop.is_running():
+            self.flush_loop.start()
+
+    async def stop(self) -> None:
+        """Stop the loop and flush whatever is left in the buffer"""
+        self.flush_loop.cancel()
+        await self.flush()
+
+    def record(self, inter: disnake.ApplicationCommandInteraction) -> None:
+        """Buffer the command invocation, this does not do any I/O"""
+        options = {}
+        for option, data in inter.options.items():
+            if isinstance(data, (disnake.Member, disnake.User)):
+                options[option] = data.name
+            else:
+                options[option] = str(data)
+
+        self.buffer.append(models.CommandAudit(
+            invoked_at=inter.created_at.replace(tzinfo=None),
+            user_id=inter.author.id,
+            user_name=inter.author.name,
+            channel_id=inter.channel.id,
+            command=inter.data.name,
+            options=options
+        ))
+
+    async def flush(self) -> None:
+        if not self.buffer:
+            return
+
+        audits = list(self.buffer)
+        self.buffer.clear()
+
+        if self.bot.settings.mode == BotMode.LIVE_MODE:
+            channel = self.bot.get_channel(self.bot.settings.get_channel("mod-log"))
+            self.bot.queue_send(
+                channel,
+                panel=self._make_digest(audits),
+                title=f"Command Log ({len(audits)})",
+                color=EmbedColor.WARNING
+            )
+
+        if self.bot.settings.audit_store and self.bot.pool is not None:
+            try:
+                await crud.set_command_audits(self.bot.pool, audits)
+            except Exception:
+                self.log.error(f"Failed to store {len(audits)} command audits", exc_info=True)
+
+        self.log.debug(f"Flushed {len(audits)} command audits")
+
+    @staticmethod
+    def _make_digest(audits: list[models.CommandAudit]) -> str:
+        lines = []
+        for audit in audits:
+            options = " ".join(f"`{option}:` {data}" for option, data in audit.options.items())
+            lines.append(f"`{audit.invoked_at.strftime('%H:%M:%S')}` {audit.user_name} "
+                         f"<#{audit.channel_id}> `/{audit.command}` {options}".rstrip())
+        return "\n".join(lines)
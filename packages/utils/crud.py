@@ -1,10 +1,30 @@
-from datetime import datetime
+from datetime import date, datetime
 
 import asyncpg
 from asyncpg import Pool
 import disnake
 
-from . import models
+from . import db, models
+from .diffs import apply_diff
+
+# Hot queries are prepared once on every new connection of the pool
+SQL_GET_LANGUAGES = db.register(
+    "get_languages",
+    "SELECT * FROM bot_language_board;")
+
+SQL_GET_MESSAGE = db.register(
+    "get_message",
+    "SELECT m.message_id, m.user_id, m.channel_id, m.create_date, m.content, "
+    "coalesce(json_agg(e.diff ORDER BY e.edited_at) "
+    "FILTER (WHERE e.message_id IS NOT NULL), '[]') AS diffs "
+    "FROM user_message m "
+    "LEFT JOIN user_message_edit e ON e.message_id = m.message_id "
+    "WHERE m.message_id = $1 "
+    "GROUP BY m.message_id")
+
+SQL_GET_THREAD_MGR = db.register(
+    "get_thread_mgr",
+    "SELECT * FROM thread_manager WHERE thread_id = $1")
 
 
 async def set_language(pool: Pool, language: models.Language) -> None:
@@ -13,20 +33,17 @@ async def set_language(pool: Pool, language: models.Language) -> None:
            "(role_id, role_name, emoji_id, emoji_repr) "
            "VALUES ($1, $2, $3, $4)")
 
-    async with pool.acquire() as conn:
-        await conn.execute(sql,
-                           language.role_id,
-                           language.role_name,
-                           language.emoji_id,
-                           language.emoji_repr
-                           )
+    await db.execute(pool, "set_language", sql,
+                     language.role_id,
+                     language.role_name,
+                     language.emoji_id,
+                     language.emoji_repr
+                     )
 
 
 async def get_languages(pool: Pool) -> list[models.Language]:
     """Returns all the registered languages"""
-    async with pool.acquire() as conn:
-        records = await conn.fetch(
-            "SELECT * FROM bot_language_board;")
+    records = await db.fetch(pool, "get_languages", SQL_GET_LANGUAGES)
 
     langs = []
     for record in records:
@@ -37,24 +54,24 @@ async def get_languages(pool: Pool) -> list[models.Language]:
 
 async def del_language(pool: Pool, role_id: int) -> None:
     """Remove a language from the database"""
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "DELETE FROM bot_language_board WHERE role_id = $1",
-            role_id)
+    await db.execute(pool, "del_language",
+                     "DELETE FROM bot_language_board WHERE role_id = $1",
+                     role_id)
 
 
 async def language_exists(pool: Pool,
                           role: int | str) -> models.Language | None:
     """Verify is a language exists in the database. If it does return it"""
-    async with pool.acquire() as conn:
-        if isinstance(role, int):
-            row = await conn.fetchrow(
-                "SELECT role_id FROM bot_language_board WHERE role_id = $1",
-                role)
-        else:
-            row = await conn.fetchrow(
-                "SELECT role_id FROM bot_language_board WHERE role_name = $1",
-                role)
+    if isinstance(role, int):
+        row = await db.fetchrow(
+            pool, "language_exists",
+            "SELECT * FROM bot_language_board WHERE role_id = $1",
+            role)
+    else:
+        row = await db.fetchrow(
+            pool, "language_exists",
+            "SELECT * FROM bot_language_board WHERE role_name = $1",
+            role)
 
     if row:
         return models.Language(**row)
@@ -62,31 +79,28 @@ async def language_exists(pool: Pool,
         return None
 
 
-async def set_message(pool: Pool, message: disnake.Message) -> None:
+async def set_messages(pool: Pool, messages: list[tuple]) -> None:
     """
-    Logs every message into the database
+    Bulk load messages from the message log, messages already stored are
+    skipped so a segment can safely be ingested twice
     Parameters
     ----------
     pool: pool object to the database
-    message: disnake message to log
+    messages: (message_id, user_id, channel_id, create_date, content) rows
     """
     sql = ("INSERT INTO user_message "
            "(message_id, user_id, channel_id, create_date, content) "
-           "VALUES ($1, $2, $3, $4, $5)")
+           "VALUES ($1, $2, $3, $4, $5) "
+           "ON CONFLICT (message_id) DO NOTHING")
 
-    async with pool.acquire() as conn:
-        await conn.execute(sql,
-                           message.id,
-                           message.author.id,
-                           message.channel.id,
-                           message.created_at,
-                           message.content)
+    await db.executemany(pool, "set_messages", sql, messages)
 
 
 async def get_message(pool: Pool,
                       message_id: int) -> models.Message | None:
     """
-    Fetch a message from the database if it exists otherwise return None
+    Fetch a message from the database if it exists otherwise return None.
+    The content is the latest revision of the message.
     Parameters
     ----------
     pool: pool object to the database
@@ -96,13 +110,110 @@ async def get_message(pool: Pool,
     -------
     message object or None
     """
-    async with pool.acquire() as conn:
-        record = await conn.fetchrow(
-            "SELECT * FROM user_message WHERE message_id = $1",
-            message_id)
+    record = await db.fetchrow(pool, "get_message", SQL_GET_MESSAGE, message_id)
 
     if record:
-        return models.Message(**record)
+        message = dict(record)
+        content = message["content"] or ""
+        for diff in message.pop("diffs"):
+            content = apply_diff(content, diff)
+        message["content"] = content
+        return models.Message(**message)
+
+
+async def set_message_edits(pool: Pool, edits: list[tuple]) -> None:
+    """
+    Bulk load message revisions from the message log
+    Parameters
+    ----------
+    pool: pool object to the database
+    edits: (message_id, edited_at, diff) rows
+    """
+    sql = ("INSERT INTO user_message_edit (message_id, edited_at, diff) "
+           "VALUES ($1, $2, $3) "
+           "ON CONFLICT (message_id, edited_at) DO NOTHING")
+
+    await db.executemany(pool, "set_message_edits", sql, edits)
+
+
+async def get_message_timeline(
+        pool: Pool,
+        message_id: int) -> tuple[models.Message, list[models.MessageEdit]] | None:
+    """
+    Fetch the original message and its revisions oldest first
+    Parameters
+    ----------
+    pool: pool object to the database
+    message_id: id of the message
+
+    Returns
+    -------
+    original message and revisions or None
+    """
+    record = await db.fetchrow(pool, "get_message_original",
+                               "SELECT * FROM user_message WHERE message_id = $1",
+                               message_id)
+    if record is None:
+        return None
+
+    sql = ("SELECT * FROM user_message_edit "
+           "WHERE message_id = $1 "
+           "ORDER BY edited_at")
+
+    records = await db.fetch(pool, "get_message_edits", sql, message_id)
+    return models.Message(**record), [models.MessageEdit(**record) for record in records]
+
+
+async def search_messages(pool: Pool,
+                          text: str | None = None,
+                          user_id: int | None = None,
+                          channel_id: int | None = None,
+                          after_id: int | None = None,
+                          before_id: int | None = None,
+                          limit: int = 20) -> list[models.Message]:
+    """
+    Search the message log newest first with keyset pagination. Message ids
+    are snowflakes so they double as the time bounds and as the cursor.
+    Parameters
+    ----------
+    pool: pool object to the database
+    text: web search style query matched against the content
+    user_id: only messages from this user
+    channel_id: only messages from this channel
+    after_id: only messages with an id greater or equal to this one
+    before_id: only messages with an id lower than this one, the cursor
+    limit: page size
+
+    Returns
+    -------
+    list of messages
+    """
+    filters = []
+    args = []
+
+    def add(condition: str, value) -> None:
+        args.append(value)
+        filters.append(condition.format(f"${len(args)}"))
+
+    if text:
+        add("to_tsvector('english', coalesce(content, '')) "
+            "@@ websearch_to_tsquery('english', {})", text)
+    if user_id is not None:
+        add("user_id = {}", user_id)
+    if channel_id is not None:
+        add("channel_id = {}", channel_id)
+    if after_id is not None:
+        add("message_id >= {}", after_id)
+    if before_id is not None:
+        add("message_id < {}", before_id)
+
+    where = f"WHERE {' AND '.join(filters)} " if filters else ""
+    args.append(limit)
+    sql = (f"SELECT * FROM user_message {where}"
+           f"ORDER BY message_id DESC LIMIT ${len(args)}")
+
+    records = await db.fetch(pool, "search_messages", sql, *args)
+    return [models.Message(**record) for record in records]
 
 
 async def set_thread_mgr(pool: Pool,
@@ -114,20 +225,15 @@ async def set_thread_mgr(pool: Pool,
            "(thread_id, user_id, created_date) "
            "VALUES ($1, $2, $3)")
 
-    async with pool.acquire() as conn:
-        await conn.execute(sql, thread_id, user_id, created_at)
+    await db.execute(pool, "set_thread_mgr", sql, thread_id, user_id, created_at)
 
     return None
 
 
 async def get_thread_mgr(pool: Pool,
                          thread_id: int) -> models.ThreadMgr | None:
-    async with pool.acquire() as conn:
-        """Fetch a thread manager object from the database"""
-        record = await conn.fetchrow(
-            "SELECT * FROM thread_manager WHERE thread_id = $1",
-            thread_id
-        )
+    """Fetch a thread manager object from the database"""
+    record = await db.fetchrow(pool, "get_thread_mgr", SQL_GET_THREAD_MGR, thread_id)
 
     if record:
         return models.ThreadMgr(**record)
@@ -135,10 +241,9 @@ async def get_thread_mgr(pool: Pool,
 
 async def delete_thread_mgr(pool: Pool, thread_id: int) -> None:
     """Delete the thread manager object"""
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "DELETE FROM thread_manager WHERE thread_id = $1",
-            thread_id)
+    await db.execute(pool, "delete_thread_mgr",
+                     "DELETE FROM thread_manager WHERE thread_id = $1",
+                     thread_id)
 
 
 async def set_api_response(pool: Pool, player_resp: int, clan_resp: int, war_resp: int) -> None:
@@ -146,19 +251,19 @@ async def set_api_response(pool: Pool, player_resp: int, clan_resp: int, war_res
            "(check_time, clan_resp, player_resp, war_resp) "
            "VALUES ($1, $2, $3, $4)")
 
-    async with pool.acquire() as conn:
-        await conn.execute(sql, datetime.now(), player_resp, clan_resp, war_resp)
+    await db.execute(pool, "set_api_response", sql, datetime.now(), player_resp, clan_resp, war_resp)
 
     return None
 
 
-async def get_api_response(pool: Pool) -> models.CoCEndPointResponse:
+async def get_api_response(pool: Pool) -> models.CoCEndPointResponse | None:
     sql = ("SELECT player_resp, clan_resp, war_resp "
            "FROM coc_api_response "
            "ORDER BY check_time DESC")
 
-    async with pool.acquire() as conn:
-        record = await conn.fetchrow(sql)
+    record = await db.fetchrow(pool, "get_api_response", sql)
+    if record is None:
+        return None
 
     return models.CoCEndPointResponse(**record)
 
@@ -168,8 +273,7 @@ async def get_api_response_24h(pool: Pool) -> list[models.CoCEndPointStatus]:
            "WHERE check_time > now() - INTERVAL  '24 hours' "
            "ORDER BY check_time DESC")
 
-    async with pool.acquire() as conn:
-        records = await conn.fetch(sql)
+    records = await db.fetch(pool, "get_api_response_24h", sql)
 
     return [models.CoCEndPointStatus(**record) for record in records]
 
@@ -179,61 +283,273 @@ async def set_demo_channel(pool: Pool,
                            bot_id: int,
                            owner_id: int) -> None:
     sql = "INSERT INTO demo_channel (channel_id, bot_id, owner_id, creation_date) VALUES ($1, $2, $3, $4)"
-    async with pool.acquire() as conn:
-        await conn.execute(sql, channel_id, bot_id, owner_id, datetime.now())
+    await db.execute(pool, "set_demo_channel", sql, channel_id, bot_id, owner_id, datetime.now())
+
+
+def _demo_channel(guild: disnake.Guild, record: asyncpg.Record) -> models.DemoChannel:
+    return models.DemoChannel(
+        **record,
+        member_obj=guild.get_member(record.get("owner_id")),
+        bot_obj=guild.get_member(record.get("bot_id")),
+        channel_obj=guild.get_channel(record.get("channel_id"))
+    )
 
 
 async def get_demo_channel(pool: Pool, guild: disnake.Guild) -> list[models.DemoChannel]:
     sql = "SELECT * FROM demo_channel"
 
-    async with pool.acquire() as conn:
-        records = await conn.fetch(sql)
+    records = await db.fetch(pool, "get_demo_channel", sql)
+    return [_demo_channel(guild, record) for record in records]
+
+
+async def get_demo_channel_page(
+        pool: Pool,
+        guild: disnake.Guild,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 10) -> list[models.DemoChannel]:
+    """
+    Fetch a page of demo channels oldest first with keyset pagination
+    Parameters
+    ----------
+    pool: pool object to the database
+    guild: guild used to resolve the members and channels
+    after: (creation_date, channel_id) of the last row of the previous page
+    limit: page size
+
+    Returns
+    -------
+    list of demo channels
+    """
+    if after is None:
+        sql = ("SELECT * FROM demo_channel "
+               "ORDER BY creation_date, channel_id LIMIT $1")
+        records = await db.fetch(pool, "get_demo_channel_page", sql, limit)
+    else:
+        sql = ("SELECT * FROM demo_channel "
+               "WHERE (creation_date, channel_id) > ($1, $2) "
+               "ORDER BY creation_date, channel_id LIMIT $3")
+        records = await db.fetch(pool, "get_demo_channel_page", sql, *after, limit)
+
+    return [_demo_channel(guild, record) for record in records]
+
+
+async def get_demo_channel_by_channel(pool: Pool,
+                                      guild: disnake.Guild,
+                                      channel_id: int) -> models.DemoChannel | None:
+    sql = "SELECT * FROM demo_channel WHERE channel_id = $1"
+    record = await db.fetchrow(pool, "get_demo_channel_by_channel", sql, channel_id)
+    return _demo_channel(guild, record) if record else None
+
+
+async def get_demo_channel_by_bot(pool: Pool,
+                                  guild: disnake.Guild,
+                                  bot_id: int) -> models.DemoChannel | None:
+    sql = "SELECT * FROM demo_channel WHERE bot_id = $1"
+    record = await db.fetchrow(pool, "get_demo_channel_by_bot", sql, bot_id)
+    return _demo_channel(guild, record) if record else None
+
+
+async def get_demo_channels_by_owner(pool: Pool,
+                                     guild: disnake.Guild,
+                                     owner_id: int) -> list[models.DemoChannel]:
+    sql = "SELECT * FROM demo_channel WHERE owner_id = $1 ORDER BY creation_date"
+    records = await db.fetch(pool, "get_demo_channels_by_owner", sql, owner_id)
+    return [_demo_channel(guild, record) for record in records]
+
+
+async def get_demo_registration(pool: Pool,
+                                bot_id: int,
+                                owner_id: int) -> tuple[int | None, int]:
+    """
+    Check in one round trip whether a bot or an owner is already registered
+    Parameters
+    ----------
+    pool: pool object to the database
+    bot_id: id of the bot
+    owner_id: id of the owner
+
+    Returns
+    -------
+    channel id of the bot or None, number of channels of the owner
+    """
+    sql = ("SELECT "
+           "(SELECT channel_id FROM demo_channel WHERE bot_id = $1) AS bot_channel, "
+           "(SELECT count(*) FROM demo_channel WHERE owner_id = $2) AS owner_channels")
+    record = await db.fetchrow(pool, "get_demo_registration", sql, bot_id, owner_id)
+    return record["bot_channel"], record["owner_channels"]
+
+
+async def del_demo_channel(pool: Pool, channel_id: int) -> None:
+    sql = "DELETE FROM demo_channel WHERE channel_id = $1"
+    await db.execute(pool, "del_demo_channel", sql, channel_id)
+
+
+async def del_demo_channels(pool: Pool, channel_ids: list[int]) -> None:
+    sql = "DELETE FROM demo_channel WHERE channel_id = ANY($1::BIGINT[])"
+    await db.execute(pool, "del_demo_channels", sql, channel_ids)
+
+
+async def set_command_audits(pool: Pool, audits: list[models.CommandAudit]) -> None:
+    """Store a batch of command audit records"""
+    sql = ("INSERT INTO command_audit "
+           "(invoked_at, user_id, user_name, channel_id, command, options) "
+           "VALUES ($1, $2, $3, $4, $5, $6)")
+
+    await db.executemany(pool, "set_command_audits", sql, [
+        (audit.invoked_at, audit.user_id, audit.user_name,
+         audit.channel_id, audit.command, audit.options)
+        for audit in audits
+    ])
+
+
+async def set_perf_metrics(pool: Pool, metrics: list[models.PerfMetric]) -> None:
+    """Store the handler metrics of a flush interval"""
+    sql = ("INSERT INTO perf_metrics "
+           "(flush_time, kind, name, calls, errors, wall_p50, wall_p95, "
+           "wall_max, first_response_p95, db_mean, api_mean) "
+           "VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)")
+
+    now = datetime.now()
+    await db.executemany(pool, "set_perf_metrics", sql, [
+        (now, metric.kind, metric.name, metric.calls, metric.errors,
+         metric.wall_p50, metric.wall_p95, metric.wall_max,
+         metric.first_response_p95, metric.db_mean, metric.api_mean)
+        for metric in metrics
+    ])
+
+
+async def get_bot_owners(pool: Pool) -> list[models.BotOwner]:
+    sql = "SELECT bot_id, name, owner_id, channel_id, monitor, email FROM bot_owners ORDER BY name"
+    records = await db.fetch(pool, "get_bot_owners", sql)
+    return [models.BotOwner(**record) for record in records]
+
+
+async def set_bot_owner(pool: Pool,
+                        bot_id: int,
+                        name: str,
+                        owner_id: int,
+                        channel_id: int) -> models.BotOwner:
+    sql = ("INSERT INTO bot_owners (bot_id, name, owner_id, channel_id) "
+           "VALUES ($1, $2, $3, $4) "
+           "ON CONFLICT (bot_id) DO UPDATE "
+           "SET name = $2, owner_id = $3, channel_id = $4 "
+           "RETURNING bot_id, name, owner_id, channel_id, monitor, email")
+    record = await db.fetchrow(pool, "set_bot_owner", sql, bot_id, name, owner_id, channel_id)
+    return models.BotOwner(**record)
+
+
+async def toggle_bot_monitor(pool: Pool, bot_id: int) -> bool | None:
+    """Flip the monitor flag of a bot, returns the new value or None if not registered"""
+    sql = ("UPDATE bot_owners "
+           "SET monitor = NOT monitor "
+           "WHERE bot_id = $1 "
+           "RETURNING monitor")
+    return await db.fetchval(pool, "toggle_bot_monitor", sql, bot_id)
+
+
+async def del_bot_owners_by_channel(pool: Pool, channel_id: int) -> list[int]:
+    """Stop monitoring the bots of a demo channel, returns their ids"""
+    sql = "DELETE FROM bot_owners WHERE channel_id = $1 RETURNING bot_id"
+    records = await db.fetch(pool, "del_bot_owners_by_channel", sql, channel_id)
+    return [record["bot_id"] for record in records]
+
+
+async def get_open_downtimes(pool: Pool) -> dict[int, datetime]:
+    """Map the bots currently marked down to the start of their outage"""
+    sql = "SELECT bot_id, offline_start FROM bot_downtime WHERE online = FALSE"
+    records = await db.fetch(pool, "get_open_downtimes", sql)
+    return {record["bot_id"]: record["offline_start"] for record in records}
+
+
+async def set_bot_down(pool: Pool, bot_id: int, offline_start: datetime) -> None:
+    sql = ("INSERT INTO bot_downtime (bot_id, online, offline_start, last_notification) "
+           "VALUES ($1, FALSE, $2, $2)")
+    await db.execute(pool, "set_bot_down", sql, bot_id, offline_start)
+
+
+async def set_bot_up(pool: Pool, bot_id: int, offline_end: datetime) -> None:
+    sql = ("UPDATE bot_downtime "
+           "SET online = TRUE, reported = TRUE, offline_end = $1 "
+           "WHERE bot_id = $2 AND online = FALSE")
+    await db.execute(pool, "set_bot_up", sql, offline_end, bot_id)
+
+
+async def get_due_downtimes(pool: Pool,
+                            notified_before: datetime) -> list[tuple[models.BotOwner, datetime]]:
+    """
+    Fetch the monitored bots that are down and were last notified before the
+    given time, with the start of their outage
+    """
+    sql = ("SELECT o.bot_id, o.name, o.owner_id, o.channel_id, o.monitor, o.email, "
+           "d.offline_start "
+           "FROM bot_downtime d "
+           "JOIN bot_owners o ON o.bot_id = d.bot_id "
+           "WHERE d.online = FALSE AND o.monitor AND d.last_notification < $1")
+    records = await db.fetch(pool, "get_due_downtimes", sql, notified_before)
 
     results = []
     for record in records:
-        member_obj = guild.get_member(record.get("owner_id"))
-        bot_obj = guild.get_member(record.get("bot_id"))
-        channel_obj = guild.get_channel(record.get("channel_id"))
+        record = dict(record)
+        offline_start = record.pop("offline_start")
+        results.append((models.BotOwner(**record), offline_start))
+    return results
 
-        results.append(models.DemoChannel(
-            **record,
-            member_obj=member_obj,
-            bot_obj=bot_obj,
-            channel_obj=channel_obj
-        ))
 
-    return results
+async def set_bots_notified(pool: Pool, bot_ids: list[int], notified: datetime) -> None:
+    sql = ("UPDATE bot_downtime SET last_notification = $1 "
+           "WHERE online = FALSE AND bot_id = ANY($2::BIGINT[])")
+    await db.execute(pool, "set_bots_notified", sql, notified, bot_ids)
 
 
-async def get_demo_channel_param(
-        pool: Pool,
-        guild: disnake.Guild,
-        param: disnake.Member | disnake.TextChannel) -> models.DemoChannel | None:
-    sql = "SELECT * FROM demo_channel WHERE channel_id = $1 or owner_id = $1 or bot_id = $1"
-    async with pool.acquire() as conn:
-        record = await conn.fetchrow(sql, param.id)
+async def add_uptime_rollups(pool: Pool, days: list[models.UptimeDay]) -> None:
+    """Add an outage to the daily rollups of its bot"""
+    sql = ("INSERT INTO bot_uptime_daily (bot_id, day, down_seconds, recoveries, repair_seconds) "
+           "VALUES ($1, $2, $3, $4, $5) "
+           "ON CONFLICT (bot_id, day) DO UPDATE SET "
+           "down_seconds = bot_uptime_daily.down_seconds + EXCLUDED.down_seconds, "
+           "recoveries = bot_uptime_daily.recoveries + EXCLUDED.recoveries, "
+           "repair_seconds = bot_uptime_daily.repair_seconds + EXCLUDED.repair_seconds")
+    await db.executemany(pool, "add_uptime_rollups", sql, [
+        (day.bot_id, day.day, day.down_seconds, day.recoveries, day.repair_seconds)
+        for day in days
+    ])
 
-    if record:
-        member_obj = guild.get_member(record.get("owner_id"))
-        bot_obj = guild.get_member(record.get("bot_id"))
-        channel_obj = guild.get_channel(record.get("channel_id"))
 
-        return models.DemoChannel(
-            **record,
-            member_obj=member_obj,
-            bot_obj=bot_obj,
-            channel_obj=channel_obj
-        )
+async def get_uptime_rollups(pool: Pool, bot_id: int, since: date) -> list[models.UptimeDay]:
+    sql = ("SELECT * FROM bot_uptime_daily "
+           "WHERE bot_id = $1 AND day >= $2 "
+           "ORDER BY day")
+    records = await db.fetch(pool, "get_uptime_rollups", sql, bot_id, since)
+    return [models.UptimeDay(**record) for record in records]
 
-    else:
-        return None
 
+async def set_maintenance_start(pool: Pool, start_time: datetime, source: str) -> None:
+    sql = ("INSERT INTO api_maintenance (start_time, source) VALUES ($1, $2) "
+           "ON CONFLICT (start_time) DO NOTHING")
+    await db.execute(pool, "set_maintenance_start", sql, start_time, source)
+
+
+async def set_maintenance_end(pool: Pool, start_time: datetime, end_time: datetime) -> None:
+    sql = ("UPDATE api_maintenance "
+           "SET end_time = $2, duration_seconds = EXTRACT(EPOCH FROM $2::TIMESTAMP - start_time) "
+           "WHERE start_time = $1")
+    await db.execute(pool, "set_maintenance_end", sql, start_time, end_time)
+
+
+async def get_open_maintenance(pool: Pool) -> models.MaintenanceWindow | None:
+    sql = ("SELECT * FROM api_maintenance "
+           "WHERE end_time IS NULL "
+           "ORDER BY start_time DESC")
+    record = await db.fetchrow(pool, "get_open_maintenance", sql)
+    if record is None:
+        return None
+    return models.MaintenanceWindow(**record)
 
-async def del_demo_channel(pool: Pool, param: disnake.Member | disnake.TextChannel) -> None:
-    if isinstance(param, disnake.TextChannel):
-        sql = "DELETE FROM demo_channel WHERE channel_id = $1"
-    else:
-        sql = "DELETE FROM demo_channel WHERE bot_id = $1"
 
-    async with pool.acquire() as conn:
-        await conn.execute(sql, param.id)
+async def get_maintenance_24h(pool: Pool) -> list[models.MaintenanceWindow]:
+    """Windows overlapping the last 24 hours, the open one included"""
+    sql = ("SELECT * FROM api_maintenance "
+           "WHERE end_time IS NULL OR end_time > now() - INTERVAL '24 hours' "
+           "ORDER BY start_time")
+    records = await db.fetch(pool, "get_maintenance_24h", sql)
+    return [models.MaintenanceWindow(**record) for record in records]
@@ -0,0 +1,427 @@
+"""
+Instrumented access to the asyncpg pool. Every crud query goes through these
+helpers with a name so that the time spent waiting on the pool, the time spent
+executing the query and the rows returned can be tracked per query.
+
+Hot queries are registered with `register` and prepared once on every new
+connection by the pool init hook. They skip the statement cache lookup and
+can never be evicted from it.
+
+A circuit breaker guards the pool. After repeated connection failures it opens:
+writes are appended to a local spool instead and reads raise
+`DatabaseUnavailable` at once so that event listeners never wait on a dead
+database. Once a probe query succeeds the spool is replayed in bulk.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable
+
+import asyncpg
+from asyncpg import Connection, Pool, Record
+from asyncpg.prepared_stmt import PreparedStatement
+
+from packages.config import Settings
+from . import perf
+from .perf import Histogram
+from .spool import Spool, read_records
+
+SLOW_QUERY_MS = 250
+SLOW_QUERY_RING = 100
+
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+# Errors meaning the database cannot be reached, query errors do not count
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.AdminShutdownError,
+    asyncpg.InterfaceError,
+)
+
+# Raised by the client before the query reaches the database, e.g. an argument
+# of the wrong type. They subclass InterfaceError but retrying cannot help.
+CLIENT_ERRORS = (
+    asyncpg.DataError,
+    asyncpg.ClientConfigurationError,
+    asyncpg.UnsupportedClientFeatureError,
+)
+
+log = logging.getLogger("db")
+
+
+class DatabaseUnavailable(Exception):
+    """Raised instead of running a read while the circuit breaker is open"""
+
+
+@dataclass
+class SlowQuery:
+    name: str
+    time: datetime
+    acquire_ms: float
+    execute_ms: float
+    params: str
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.acquire = Histogram()
+        self.execute = Histogram()
+
+
+class QueryMonitor:
+    def __init__(self,
+                 slow_query_ms: float = SLOW_QUERY_MS,
+                 slow_query_ring: int = SLOW_QUERY_RING) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.stats: dict[str, QueryStats] = {}
+        self.slow_queries: deque[SlowQuery] = deque(maxlen=slow_query_ring)
+        self.pool: Pool | None = None
+
+        # Callers currently waiting on pool.acquire
+        self.waiting = 0
+        self.peak_waiting = 0
+
+    def _get(self, name: str) -> QueryStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = QueryStats()
+        return stats
+
+    def record(self, name: str, acquire: float, execute: float,
+               rows: int, args: Iterable[Any]) -> None:
+        acquire_ms = acquire * 1000
+        execute_ms = execute * 1000
+
+        stats = self._get(name)
+        stats.calls += 1
+        stats.rows += rows
+        stats.acquire.add(acquire_ms)
+        stats.execute.add(execute_ms)
+
+        if acquire_ms + execute_ms >= self.slow_query_ms:
+            self.slow_queries.append(SlowQuery(name=name,
+                                               time=datetime.now(),
+                                               acquire_ms=acquire_ms,
+                                               execute_ms=execute_ms,
+                                               params=redact(args)))
+
+    def record_error(self, name: str) -> None:
+        self._get(name).errors += 1
+
+    def pool_status(self) -> dict[str, int]:
+        """Report how saturated the pool is"""
+        if self.pool is None:
+            return {}
+
+        size = self.pool.get_size()
+        idle = self.pool.get_idle_size()
+        return {
+            "max": self.pool.get_max_size(),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self,
+                 threshold: int = BREAKER_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS) -> None:
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """
+        Return True if a query may reach the database. Once the reset delay
+        is over a single probe is let through while the breaker is half open.
+        A probe that never reports back, e.g. a cancelled query, does not hold
+        the breaker half open, another one is let through after the delay.
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            # Start of the probe while half open
+            self.opened_at = now
+            return True
+
+        return False
+
+    def success(self) -> bool:
+        """Record a successful query, returns True if the breaker closed"""
+        self.failures = 0
+        if self.state == self.CLOSED:
+            return False
+
+        self.state = self.CLOSED
+        log.warning("Database reachable again, circuit breaker closed")
+        return True
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state == self.CLOSED:
+                self.trips += 1
+                log.error(f"Circuit breaker opened after {self.failures} "
+                          f"connection failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+monitor = QueryMonitor()
+breaker = CircuitBreaker()
+
+# Pool wide settings, set by configure
+_acquire_timeout: float | None = None
+_query_timeouts: dict[str, float] = {}
+
+# Statements prepared on every connection, keyed by query name
+_registry: dict[str, str] = {}
+
+# Prepared statements of each connection, keyed by the server pid
+_statements: dict[int, dict[str, PreparedStatement]] = {}
+
+# Writes held while the breaker is open, replayed by a single task
+_spool: Spool | None = None
+_replay_task: asyncio.Task | None = None
+
+
+def configure(settings: Settings) -> None:
+    """Apply the database settings to the helpers"""
+    global _acquire_timeout, _query_timeouts, _spool, log
+    _acquire_timeout = settings.db_acquire_timeout
+    _query_timeouts = settings.db_query_timeouts
+    monitor.slow_query_ms = settings.db_slow_query_ms
+    breaker.threshold = settings.db_breaker_threshold
+    breaker.reset_seconds = settings.db_breaker_reset_seconds
+
+    log = logging.getLogger(f"{settings.log_name}.db")
+    _spool = Spool(settings.spool_path / "db.spool", settings.spool_max_bytes, log)
+
+
+def status() -> dict[str, Any]:
+    """Report the circuit breaker and the spool"""
+    return {
+        "breaker": breaker.state,
+        "trips": breaker.trips,
+        "spool_pending": _spool is not None and _spool.pending,
+        "spool_dropped": 0 if _spool is None else _spool.dropped,
+    }
+
+
+def register(name: str, sql: str) -> str:
+    """Register a hot query to be prepared on every connection"""
+    _registry[name] = sql
+    return sql
+
+
+async def prepare_statements(con: Connection) -> None:
+    """Pool init hook that prepares the registered queries on the connection"""
+    pid = con.get_server_pid()
+    _statements[pid] = {name: await con.prepare(sql) for name, sql in _registry.items()}
+    con.add_termination_listener(lambda _: _statements.pop(pid, None))
+
+
+def redact(args: Iterable[Any]) -> str:
+    """Describe the query parameters without leaking their values"""
+    redacted = []
+    for arg in args:
+        if isinstance(arg, (str, bytes, list, tuple, dict)):
+            redacted.append(f"<{type(arg).__name__}:{len(arg)}>")
+        else:
+            redacted.append(f"<{type(arg).__name__}>")
+    return ", ".join(redacted)
+
+
+def _row_count(method: str, result: Any, args: tuple) -> int:
+    if method == "fetch":
+        return len(result)
+    if method == "executemany":
+        return len(args[0])
+    if method == "execute":
+        # Status strings look like "INSERT 0 1" or "DELETE 3"
+        count = result.rsplit(" ", 1)[-1]
+        return int(count) if count.isdigit() else 0
+    return 0 if result is None else 1
+
+
+def _batches(records: Iterable[tuple[str, str, list[tuple]]]) -> list[tuple[str, list[tuple]]]:
+    """Merge consecutive spooled writes of the same statement"""
+    batches: list[tuple[str, list[tuple]]] = []
+    for _, sql, rows in records:
+        if batches and batches[-1][0] == sql:
+            batches[-1][1].extend(rows)
+        else:
+            batches.append((sql, list(rows)))
+    return batches
+
+
+async def replay(pool: Pool) -> None:
+    """
+    Replay the spooled writes in order. Each sealed spool file is replayed in
+    a single transaction so a failure part way through can be retried.
+    """
+    while (path := _spool.seal()) is not None:
+        batches = _batches(read_records(path))
+        try:
+            async with pool.acquire(timeout=_acquire_timeout) as conn:
+                async with conn.transaction():
+                    for sql, rows in batches:
+                        await conn.executemany(sql, rows)
+        except CLIENT_ERRORS:
+            _quarantine()
+            continue
+        except CONNECTION_ERRORS:
+            breaker.failure()
+            log.warning("Spool replay interrupted, the database went away again")
+            return
+        except Exception:
+            _quarantine()
+            continue
+
+        breaker.success()
+        _spool.commit()
+        log.warning(f"Replayed {sum(len(rows) for _, rows in batches)} spooled writes")
+
+
+def _quarantine() -> None:
+    """Set aside a spool file that cannot be replayed"""
+    # Retrying would fail the same way and block every later write
+    breaker.success()
+    log.exception(f"Spool replay failed, the records were moved "
+                  f"to `{_spool.quarantine()}`")
+
+
+def _schedule_replay(pool: Pool) -> None:
+    global _replay_task
+    if _spool is None or not _spool.pending:
+        return
+
+    if _replay_task is None or _replay_task.done():
+        _replay_task = asyncio.create_task(replay(pool))
+
+
+async def _write(pool: Pool, name: str, method: str, sql: str, args: tuple) -> Any:
+    """Run a write or spool it while the database is unreachable"""
+    if _spool is None:
+        return await _run(pool, name, method, sql, args)
+
+    if breaker.state == breaker.CLOSED and not _spool.pending:
+        try:
+            return await _run(pool, name, method, sql, args)
+        except CLIENT_ERRORS:
+            raise
+        except CONNECTION_ERRORS:
+            log.warning(f"Could not run `{name}`, spooling it")
+
+    # Writes queue behind the spool until it is replayed to keep their order,
+    # the replay doubles as the probe of a half open breaker
+    rows = args[0] if method == "executemany" else [args]
+    _spool.append((name, sql, rows))
+    if breaker.allow():
+        _schedule_replay(pool)
+    return ""
+
+
+async def _run(pool: Pool, name: str, method: str, sql: str, args: tuple) -> Any:
+    if not breaker.allow():
+        raise DatabaseUnavailable(f"Database unavailable, `{name}` not run")
+
+    try:
+        result = await _timed(pool, name, method, sql, args)
+    except CLIENT_ERRORS:
+        # The query is at fault, the state of the database is unknown
+        raise
+    except CONNECTION_ERRORS:
+        breaker.failure()
+        raise
+    except Exception:
+        # The database answered, the query itself is at fault
+        if breaker.success():
+            _schedule_replay(pool)
+        raise
+
+    if breaker.success():
+        _schedule_replay(pool)
+    return result
+
+
+async def _timed(pool: Pool, name: str, method: str, sql: str, args: tuple) -> Any:
+    monitor.waiting += 1
+    monitor.peak_waiting = max(monitor.peak_waiting, monitor.waiting)
+    start = time.perf_counter()
+    try:
+        conn = await pool.acquire(timeout=_acquire_timeout)
+    except Exception:
+        monitor.record_error(name)
+        raise
+    finally:
+        monitor.waiting -= 1
+
+    acquired = time.perf_counter()
+    timeout = _query_timeouts.get(name)
+    try:
+        stmt = _statements.get(conn.get_server_pid(), {}).get(name)
+        if stmt is None:
+            result = await getattr(conn, method)(sql, *args, timeout=timeout)
+        elif method == "execute":
+            # Prepared statements do not have execute, the status is kept
+            await stmt.fetch(*args, timeout=timeout)
+            result = stmt.get_statusmsg()
+        else:
+            result = await getattr(stmt, method)(*args, timeout=timeout)
+    except Exception:
+        monitor.record_error(name)
+        raise
+    finally:
+        done = time.perf_counter()
+        await pool.release(conn)
+        perf.add_db_time(done - start)
+
+    # Only the first row of a batch is described in the slow query log
+    params = args[0][0] if method == "executemany" and args[0] else args
+    monitor.record(name, acquired - start, done - acquired,
+                   _row_count(method, result, args), params)
+    return result
+
+
+async def execute(pool: Pool, name: str, sql: str, *args: Any) -> str:
+    return await _write(pool, name, "execute", sql, args)
+
+
+async def executemany(pool: Pool, name: str, sql: str, args: list[tuple]) -> None:
+    await _write(pool, name, "executemany", sql, (args,))
+
+
+async def fetch(pool: Pool, name: str, sql: str, *args: Any) -> list[Record]:
+    return await _run(pool, name, "fetch", sql, args)
+
+
+async def fetchrow(pool: Pool, name: str, sql: str, *args: Any) -> Record | None:
+    return await _run(pool, name, "fetchrow", sql, args)
+
+
+async def fetchval(pool: Pool, name: str, sql: str, *args: Any) -> Any:
+    return await _run(pool, name, "fetchval", sql, args)
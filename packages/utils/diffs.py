@@ -0,0 +1,62 @@
+"""
+Compact character diffs used to store message revisions. A diff is a list of
+operations applied left to right over the previous text:
+
+    int >= 0    keep that many characters
+    int < 0     skip (delete) that many characters
+    str         insert the text
+
+Whatever is left of the previous text after the last operation is kept, so
+an edit at the start of a long message is a couple of entries. The lists are
+JSON friendly.
+
+A diff can also be the new text itself, a plain string replacing the previous
+one. It is used when there is no previous text to diff against and for long
+messages, the matcher is quadratic and runs on the event loop.
+"""
+from difflib import SequenceMatcher
+
+Diff = list[int | str] | str
+
+# Longest text on either side that is diffed, longer ones are stored in full
+MAX_DIFF_LENGTH = 500
+
+
+def make_diff(old: str, new: str) -> Diff:
+    if not old or max(len(old), len(new)) > MAX_DIFF_LENGTH:
+        return new
+
+    ops: list[int | str] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new[j1:j2])
+
+    # The remainder of the old text is implied
+    if ops and isinstance(ops[-1], int) and ops[-1] >= 0:
+        ops.pop()
+    return ops
+
+
+def apply_diff(old: str, ops: Diff) -> str:
+    if isinstance(ops, str):
+        return ops
+
+    parts = []
+    position = 0
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        elif op >= 0:
+            parts.append(old[position:position + op])
+            position += op
+        else:
+            position -= op
+
+    parts.append(old[position:])
+    return "".join(parts)
@@ -0,0 +1,170 @@
+"""
+Outbound message dispatcher. Event handlers that only need to post a log
+enqueue their embeds here and return right away. Each channel has its own
+queue that is drained by a worker which coalesces the queued embeds into
+multi-embed messages and paces the sends to stay inside the channel bucket.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import disnake
+
+from . import embeds as embed_engine
+
+if TYPE_CHECKING:
+    from bot import BotClient
+
+# Discord allows 5 messages every 5 seconds for each channel
+BUCKET_RATE = 5
+BUCKET_PER = 5.0
+MAX_BACKLOG = 500
+
+
+@dataclass
+class Outbound:
+    """Represents a queued message"""
+    embeds: list[disnake.Embed]
+    size: int
+    content: str | None = None
+    view: disnake.ui.View | None = None
+
+    @property
+    def mergeable(self) -> bool:
+        """Only plain embed messages can be coalesced with other messages"""
+        return (self.content is None and self.view is None and
+                len(self.embeds) <= embed_engine.EMBED_SEND_TOTAL and
+                self.size <= embed_engine.EMBED_TOTAL)
+
+
+class OutboundDispatcher:
+    def __init__(self, bot: "BotClient",
+                 rate: int = BUCKET_RATE,
+                 per: float = BUCKET_PER,
+                 max_backlog: int = MAX_BACKLOG) -> None:
+        self.bot = bot
+        self.rate = rate
+        self.per = per
+        self.max_backlog = max_backlog
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.{self.__class__.__name__}")
+
+        self._channels: dict[int, disnake.abc.Messageable] = {}
+        self._queues: dict[int, deque[Outbound]] = {}
+        self._sent: dict[int, deque[float]] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self.dropped = 0
+
+    def enqueue(self,
+                channel: disnake.abc.Messageable,
+                embeds: list[disnake.Embed] | None = None,
+                content: str | None = None,
+                view: disnake.ui.View | None = None) -> None:
+        """
+        Queue a message for the channel and return immediately
+
+        :param channel: Channel to send the message to
+        :param embeds: Embeds to send
+        :param content: Optional text content, disables coalescing
+        :param view: Optional view, disables coalescing
+        """
+        if channel is None:
+            self.log.error("Attempted to queue a message for a missing channel")
+            return
+
+        embeds = embeds or []
+        queue = self._queues.setdefault(channel.id, deque())
+        if len(queue) >= self.max_backlog:
+            queue.popleft()
+            self.dropped += 1
+            self.log.error(f"Outbound backlog for `{channel}` is full, dropped the oldest message")
+
+        queue.append(Outbound(embeds=embeds,
+                              size=sum(len(embed) for embed in embeds),
+                              content=content,
+                              view=view))
+        self._channels[channel.id] = channel
+
+        if channel.id not in self._workers:
+            self._workers[channel.id] = asyncio.get_running_loop().create_task(
+                self._worker(channel.id))
+
+    def backlog(self) -> dict[int, int]:
+        """Return the number of queued messages for each channel"""
+        return {channel_id: len(queue) for channel_id, queue in self._queues.items() if queue}
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Wait for the queues to drain"""
+        workers = list(self._workers.values())
+        if not workers:
+            return
+
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        if pending:
+            self.log.error(f"Dropped {sum(self.backlog().values())} queued messages on close")
+
+    def _next_message(self, queue: deque[Outbound]) -> Outbound:
+        """Pop as many queued messages as fit into a single message"""
+        item = queue.popleft()
+        if not item.mergeable:
+            return item
+
+        embeds = list(item.embeds)
+        size = item.size
+        while queue and queue[0].mergeable:
+            nxt = queue[0]
+            if (len(embeds) + len(nxt.embeds) > embed_engine.EMBED_SEND_TOTAL or
+                    size + nxt.size > embed_engine.EMBED_TOTAL):
+                break
+
+            queue.popleft()
+            embeds.extend(nxt.embeds)
+            size += nxt.size
+
+        return Outbound(embeds=embeds, size=size)
+
+    async def _wait_for_bucket(self, channel_id: int) -> None:
+        """Sleep until the channel bucket has room for another message"""
+        sent = self._sent.setdefault(channel_id, deque(maxlen=self.rate))
+        if len(sent) == self.rate:
+            delay = sent[0] + self.per - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        sent.append(time.monotonic())
+
+    async def _worker(self, channel_id: int) -> None:
+        queue = self._queues[channel_id]
+        channel = self._channels[channel_id]
+        try:
+            while queue:
+                item = self._next_message(queue)
+                await self._wait_for_bucket(channel_id)
+                try:
+                    await self._send(channel, item)
+                except disnake.HTTPException:
+                    self.log.error(f"Failed to send queued message to `{channel}`", exc_info=True)
+        finally:
+            # No awaits between the empty check and the removal so a producer
+            # can never queue a message without a worker to pick it up
+            self._workers.pop(channel_id, None)
+
+    @staticmethod
+    async def _send(channel: disnake.abc.Messageable, item: Outbound) -> None:
+        if item.mergeable:
+            await channel.send(embeds=item.embeds)
+            return
+
+        groups = embed_engine.pack_embeds(item.embeds) or [[]]
+        last_group = len(groups) - 1
+        for index, embeds in enumerate(groups):
+            kwargs = {}
+            if index == 0 and item.content is not None:
+                kwargs["content"] = item.content
+            if index == last_group and item.view is not None:
+                kwargs["view"] = item.view
+            await channel.send(embeds=embeds, **kwargs)
@@ -0,0 +1,167 @@
+"""
+Embed rendering engine used by BotClient.inter_send and BotClient.send. Text is
+split into description sized blocks and the resulting embeds are packed into
+as few messages as possible without exceeding the discord limits.
+"""
+from typing import Iterable
+
+import disnake
+
+from .utils import EmbedColor
+
+# limits
+EMBED_TITLE = 256
+EMBED_DESCRIPTION = 4096
+EMBED_FOOTER = 2048
+EMBED_AUTHOR = 256
+EMBED_TOTAL = 6000
+EMBED_SEND_TOTAL = 10
+
+CODE_BLOCK = "```"
+
+
+def text_splitter(text: str,
+                  code_block: bool = False,
+                  limit: int = EMBED_DESCRIPTION) -> list[str]:
+    """
+    Split text into blocks that fit into an embed description. Text is split
+    on new lines, lines that are longer than the limit are hard wrapped.
+
+    :param text: Text to split
+    :param code_block: If each block should be wrapped in a code block
+    :param limit: Max length of each block including the code block fence
+    :return: List of blocks
+    """
+    if code_block:
+        limit -= len(CODE_BLOCK) * 2
+
+    blocks: list[str] = []
+    lines: list[str] = []
+    size = 0
+
+    def flush() -> None:
+        nonlocal size
+        block = "\n".join(lines)
+        blocks.append(f"{CODE_BLOCK}{block}{CODE_BLOCK}" if code_block else block)
+        lines.clear()
+        size = 0
+
+    for line in text.split("\n"):
+        if len(line) > limit:
+            if lines:
+                flush()
+            # Hard wrap lines that can never fit into a single block
+            while len(line) > limit:
+                lines.append(line[:limit])
+                flush()
+                line = line[limit:]
+            if not line:
+                continue
+
+        # Account for the new line character that joins the lines
+        needed = len(line) + 1 if lines else len(line)
+        if lines and size + needed > limit:
+            flush()
+            needed = len(line)
+
+        lines.append(line)
+        size += needed
+
+    if lines or not blocks:
+        flush()
+
+    return blocks
+
+
+class EmbedPacker:
+    """
+    Packs embeds into groups that can be sent in a single message. The size of
+    the open group is tracked as embeds are added so that every embed is only
+    measured once.
+
+    Since the order of the embeds must be kept, closing a group only when the
+    next embed does not fit yields the fewest possible messages.
+    """
+
+    def __init__(self) -> None:
+        self.groups: list[list[disnake.Embed]] = []
+        self._group: list[disnake.Embed] = []
+        self._size = 0
+
+    def add(self, embed: disnake.Embed) -> None:
+        size = len(embed)
+        if self._group and (len(self._group) == EMBED_SEND_TOTAL or
+                            self._size + size > EMBED_TOTAL):
+            self.groups.append(self._group)
+            self._group = []
+            self._size = 0
+
+        self._group.append(embed)
+        self._size += size
+
+    def extend(self, embeds: Iterable[disnake.Embed]) -> None:
+        for embed in embeds:
+            self.add(embed)
+
+    def finish(self) -> list[list[disnake.Embed]]:
+        """Close the open group and return all the groups"""
+        if self._group:
+            self.groups.append(self._group)
+            self._group = []
+            self._size = 0
+        return self.groups
+
+
+def build_embeds(panels: Iterable[str],
+                 title: str = "",
+                 color: EmbedColor = EmbedColor.INFO,
+                 code_block: bool = False,
+                 footer: str = "",
+                 author: disnake.Member | None = None,
+                 author_name: str | None = None,
+                 author_icon: str | None = None) -> list[disnake.Embed]:
+    """
+    Create the embeds for the panels. The title and author are set on the
+    first embed and the footer on the last embed.
+
+    :param panels: Text blocks to render, each one is split as needed
+    :param title: Optional title of the first embed
+    :param color: Color to use for the embeds
+    :param code_block: If the text should be in a code block
+    :param footer: Optional footer of the last embed
+    :param author: Optional member to use as the author
+    :param author_name: Optional author name when no member is available
+    :param author_icon: Optional author icon when no member is available
+    :return: List of embeds
+    """
+    embeds = [
+        disnake.Embed(description=block, color=color.value)
+        for panel in panels
+        for block in text_splitter(panel, code_block)
+    ]
+
+    if not embeds:
+        return embeds
+
+    if title:
+        embeds[0].title = title
+
+    if author:
+        embeds[0].set_author(
+            name=author.display_name,
+            icon_url=author.avatar.url if author.avatar else None
+        )
+    elif author_name:
+        embeds[0].set_author(name=author_name, icon_url=author_icon)
+
+    if footer:
+        embeds[-1].set_footer(text=footer)
+
+    return embeds
+
+
+def pack_embeds(embeds: Iterable[disnake.Embed]) -> list[list[disnake.Embed]]:
+    """Pack the embeds into the fewest messages possible"""
+    packer = EmbedPacker()
+    packer.extend(embeds)
+    return packer.finish()
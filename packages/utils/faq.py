@@ -0,0 +1,232 @@
+"""
+Search over the markdown answers of the FAQs directory. The files are parsed
+once into an inverted index, term -> {faq key: term frequency}, and ranked
+with BM25. The title words are counted several times so a query naming the
+topic of a FAQ ranks it first.
+
+The embeds of every FAQ are rendered when it is indexed. A reload compares
+the modification time and the size of each file and only re-indexes the
+files that changed, were added or were removed.
+
+The suggestions in the help channels use a much smaller keyword index, the
+title words and the most distinctive body terms of each FAQ, so matching a
+message is a single pass over its tokens.
+"""
+import bisect
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import disnake
+
+from . import embeds as embed_engine
+
+TOKEN = re.compile(r"[a-z0-9]+")
+ANCHOR = re.compile(r"\s*<a name=\"[^\"]*\"></a>")
+HEADING = re.compile(r"^#{2,6}\s*(.+?)\s*$", re.MULTILINE)
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by can do does for from how i if in is it its my of
+on or so that the their then there these this to was what when where which
+who why will with you your
+""".split())
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+TITLE_BOOST = 3
+
+# Distinctive body terms of each FAQ kept for the suggestions
+KEYWORDS_PER_FAQ = 12
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+@dataclass
+class FaqDocument:
+    key: str
+    title: str
+    body: str
+    mtime: float
+    size: int
+    terms: Counter[str] = field(default_factory=Counter)
+    embeds: list[disnake.Embed] = field(default_factory=list)
+
+    @property
+    def length(self) -> int:
+        return sum(self.terms.values())
+
+
+def parse_faq(path: Path) -> FaqDocument:
+    stat = path.stat()
+    text = path.read_text(encoding="utf-8")
+
+    # The first level one heading is the title, the file name otherwise
+    title = path.stem
+    lines = text.strip().splitlines()
+    if lines and lines[0].startswith("# "):
+        title = lines[0][2:].strip()
+        lines = lines[1:]
+
+    body = ANCHOR.sub("", "\n".join(lines)).strip()
+    body = HEADING.sub(r"**\1**", body)
+
+    terms = Counter(tokenize(body))
+    for _ in range(TITLE_BOOST):
+        terms.update(tokenize(title))
+
+    return FaqDocument(key=path.stem,
+                       title=title,
+                       body=body,
+                       mtime=stat.st_mtime,
+                       size=stat.st_size,
+                       terms=terms,
+                       embeds=embed_engine.build_embeds([body], title=title))
+
+
+class FaqIndex:
+    def __init__(self, directory: Path, log: logging.Logger) -> None:
+        self.directory = directory
+        self.log = log
+        self.documents: dict[str, FaqDocument] = {}
+        self.postings: dict[str, dict[str, int]] = {}
+        self._total_length = 0
+
+        # Lower case title suffixes starting at each word, for the autocomplete
+        self._completions: list[tuple[str, str]] = []
+
+        # Keyword -> keys of the FAQs it suggests
+        self.keywords: dict[str, set[str]] = {}
+
+    def _add(self, document: FaqDocument) -> None:
+        self.documents[document.key] = document
+        self._total_length += document.length
+        for term, frequency in document.terms.items():
+            self.postings.setdefault(term, {})[document.key] = frequency
+
+    def _remove(self, key: str) -> None:
+        document = self.documents.pop(key)
+        self._total_length -= document.length
+        for term in document.terms:
+            postings = self.postings[term]
+            del postings[key]
+            if not postings:
+                del self.postings[term]
+
+    def _build_completions(self) -> None:
+        completions = []
+        for document in self.documents.values():
+            words = document.title.lower().split()
+            completions.extend((" ".join(words[start:]), document.title)
+                               for start in range(len(words)))
+        self._completions = sorted(completions)
+
+    def _build_keywords(self) -> None:
+        """The idf changes with every file, so the keywords of all the FAQs are rebuilt"""
+        count = len(self.documents)
+        keywords: dict[str, set[str]] = {}
+        for document in self.documents.values():
+            # Words found in most FAQs, like "api", do not tell them apart
+            distinctive = {term: frequency * math.log(count / len(self.postings[term]))
+                           for term, frequency in document.terms.items()
+                           if len(self.postings[term]) <= count / 2}
+            ranked = sorted(distinctive, key=distinctive.get, reverse=True)
+            terms = set(ranked[:KEYWORDS_PER_FAQ])
+            terms.update(term for term in tokenize(document.title) if term in distinctive)
+            for term in terms:
+                keywords.setdefault(term, set()).add(document.key)
+        self.keywords = keywords
+
+    def reload(self) -> tuple[list[str], list[str], list[str]]:
+        """Re-index the changed files, returns the added, updated and removed titles"""
+        added, updated, removed = [], [], []
+        paths = {path.stem: path for path in self.directory.glob("*.md")}
+
+        for key in [key for key in self.documents if key not in paths]:
+            removed.append(self.documents[key].title)
+            self._remove(key)
+
+        for key, path in paths.items():
+            stat = path.stat()
+            current = self.documents.get(key)
+            if current is not None and (current.mtime, current.size) == (stat.st_mtime, stat.st_size):
+                continue
+
+            try:
+                document = parse_faq(path)
+            except (OSError, UnicodeDecodeError):
+                self.log.error(f"Could not index {path}", exc_info=True)
+                continue
+
+            if current is None:
+                added.append(document.title)
+            else:
+                updated.append(document.title)
+                self._remove(key)
+            self._add(document)
+
+        if added or updated or removed:
+            self._build_completions()
+            self._build_keywords()
+        self.log.debug(f"FAQ index: {len(added)} added, {len(updated)} updated, {len(removed)} removed")
+        return added, updated, removed
+
+    def get(self, title: str) -> FaqDocument | None:
+        """Find a FAQ by its exact title, case insensitive"""
+        title = title.lower()
+        for document in self.documents.values():
+            if document.title.lower() == title:
+                return document
+        return None
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[FaqDocument, float]]:
+        """Rank the FAQs against the query with BM25"""
+        count = len(self.documents)
+        if count == 0:
+            return []
+        average_length = self._total_length / count
+
+        scores: Counter[str] = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                length = self.documents[key].length
+                scores[key] += idf * frequency * (K1 + 1) / (
+                    frequency + K1 * (1 - B + B * length / average_length))
+
+        return [(self.documents[key], score) for key, score in scores.most_common(limit)]
+
+    def suggest(self, tokens: set[str], min_matches: int) -> FaqDocument | None:
+        """The FAQ sharing the most keywords with the tokens, if it shares enough"""
+        matches: Counter[str] = Counter()
+        for term in tokens & self.keywords.keys():
+            matches.update(self.keywords[term])
+        if not matches:
+            return None
+
+        key, count = matches.most_common(1)[0]
+        return self.documents[key] if count >= min_matches else None
+
+    def complete(self, prefix: str, limit: int = 25) -> list[str]:
+        """Titles with a word sequence starting with the prefix"""
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return sorted(document.title for document in self.documents.values())[:limit]
+
+        titles: list[str] = []
+        start = bisect.bisect_left(self._completions, (prefix, ""))
+        for suffix, title in self._completions[start:]:
+            if not suffix.startswith(prefix) or len(titles) == limit:
+                break
+            if title not in titles:
+                titles.append(title)
+        return titles
@@ -0,0 +1,94 @@
+"""
+Message log ingestion. `on_message` and `on_message_edit` append every
+message and every revision to a local segment log without touching the
+database. A background loop seals the active segment, bulk loads the sealed
+segments into Postgres and removes each segment once its batch is committed.
+Segments survive restarts and database outages, they are simply picked up by
+the next successful ingest. A segment failing for any other reason is
+quarantined so it cannot block the later ones.
+"""
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import disnake
+from disnake.ext import tasks
+
+from . import crud, db
+from .diffs import make_diff
+from .segment_log import SegmentLog
+
+if TYPE_CHECKING:
+    from bot import BotClient
+
+MESSAGE = "message"
+EDIT = "edit"
+
+
+class MessageIngester:
+    def __init__(self, bot: "BotClient") -> None:
+        self.bot = bot
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.{self.__class__.__name__}")
+        self.segments = SegmentLog(self.bot.settings.message_log_path,
+                                   self.bot.settings.message_segment_bytes,
+                                   self.bot.settings.message_log_max_bytes,
+                                   self.log)
+        self.ingest_loop = tasks.loop(seconds=self.bot.settings.message_ingest_seconds)(self.ingest)
+
+    def start(self) -> None:
+        if not self.ingest_loop.is_running():
+            self.ingest_loop.start()
+
+    def stop(self) -> None:
+        """Stop the loop, anything not ingested stays on disk for the next run"""
+        self.ingest_loop.cancel()
+        self.segments.close()
+
+    def record_message(self, message: disnake.Message) -> None:
+        """Append the message to the segment log, this does not do any network I/O"""
+        self.segments.append(MESSAGE, (message.id,
+                                       message.author.id,
+                                       message.channel.id,
+                                       message.created_at,
+                                       message.content))
+
+    def record_edit(self, before: disnake.Message, after: disnake.Message) -> None:
+        """Append the revision as a diff against the previous content"""
+        self.segments.append(EDIT, (after.id,
+                                    after.edited_at or disnake.utils.utcnow(),
+                                    make_diff(before.content, after.content)))
+
+    def _quarantine(self, path: Path) -> None:
+        # Retrying would fail the same way and block every later segment
+        self.log.exception(f"Failed to ingest segment `{path.name}`, it was moved "
+                           f"to `{self.segments.quarantine(path).name}`")
+
+    async def ingest(self) -> None:
+        if self.bot.pool is None or db.breaker.state != db.breaker.CLOSED:
+            return
+
+        for path in self.segments.seal():
+            records = {MESSAGE: [], EDIT: []}
+            for kind, payload in self.segments.read(path):
+                records[kind].append(payload)
+
+            messages = records[MESSAGE]
+            try:
+                if messages:
+                    await crud.set_messages(self.bot.pool, messages)
+                if records[EDIT]:
+                    await crud.set_message_edits(self.bot.pool, records[EDIT])
+            except db.CLIENT_ERRORS:
+                self._quarantine(path)
+                continue
+            except (db.DatabaseUnavailable, *db.CONNECTION_ERRORS):
+                # Keep the segment and the order, the next tick retries it
+                self.log.warning(f"Database unreachable, segment `{path.name}` is kept for later")
+                return
+            except Exception:
+                self._quarantine(path)
+                continue
+
+            self.segments.commit(path)
+            self.log.debug(f"Ingested {len(messages)} messages and {len(records[EDIT])} "
+                           f"edits from `{path.name}`")
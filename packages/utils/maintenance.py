@@ -0,0 +1,72 @@
+"""
+Clash API maintenance windows. The coc.py maintenance events and the 503s
+seen by the latency sampler both report to the same tracker, whichever
+notices first opens the window and the other one is a no-op. Each window is
+stored with its start, end and duration so the latency statistics can leave
+it out, and while one is open the probes and the downtime alerts stand down.
+"""
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from . import crud
+from .uptime import to_time
+
+if TYPE_CHECKING:
+    from bot import BotClient
+
+
+class MaintenanceTracker:
+    def __init__(self, bot: "BotClient") -> None:
+        self.bot = bot
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.{self.__class__.__name__}")
+
+        # Local naive time, like the check_time of the latency samples
+        self.started_at: datetime | None = None
+        self._restored = False
+
+    @property
+    def active(self) -> bool:
+        return self.started_at is not None
+
+    async def restore(self) -> None:
+        """Pick up a window left open by a restart, only the first call reads the table"""
+        if self._restored:
+            return
+        self._restored = True
+
+        window = await crud.get_open_maintenance(self.bot.pool)
+        if window is not None and self.started_at is None:
+            self.started_at = window.start_time
+            self.log.info(f"Maintenance started at {window.start_time} is still open")
+
+    def _announce(self, content: str) -> None:
+        channel = self.bot.get_channel(self.bot.settings.get_channel("general"))
+        if channel is None:
+            self.log.error("Cannot announce the maintenance, general channel is missing")
+            return
+        self.bot.dispatcher.enqueue(channel, content=content)
+
+    async def begin(self, source: str) -> bool:
+        """Open a window, returns False if one is already open"""
+        if self.active:
+            return False
+
+        self.started_at = datetime.now()
+        self.log.warning(f"Clash API maintenance detected by the {source}")
+        await crud.set_maintenance_start(self.bot.pool, self.started_at, source)
+        self._announce("The Clash API has entered maintenance mode.")
+        return True
+
+    async def end(self, source: str) -> bool:
+        """Close the open window, returns False if there is none"""
+        if not self.active:
+            return False
+
+        started_at, self.started_at = self.started_at, None
+        ended_at = datetime.now()
+        duration = to_time((ended_at - started_at).total_seconds())
+        self.log.warning(f"Clash API maintenance ended after {duration}, seen by the {source}")
+        await crud.set_maintenance_end(self.bot.pool, started_at, ended_at)
+        self._announce(f"Maintenance has ended after {duration}. Get back to work!")
+        return True
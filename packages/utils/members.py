@@ -0,0 +1,80 @@
+"""
+Batched member updates. Role and nickname changes are collected on a
+MemberMutation and sent as a single `member.edit` with the final role set,
+instead of one request per `add_roles`, `remove_roles` and nickname change.
+
+The role set is computed from the roles the member has when it is built,
+create it from a fresh member right before applying it.
+"""
+import logging
+
+import disnake
+
+NICK_MAX_LENGTH = 32
+
+
+class MemberMutation:
+    def __init__(self, member: disnake.Member, log: logging.Logger) -> None:
+        self.member = member
+        self.log = log
+        self._add: dict[int, disnake.Role] = {}
+        self._remove: set[int] = set()
+        self._nick: str | None = None
+
+    def add_roles(self, *roles: disnake.Role | None) -> "MemberMutation":
+        for role in roles:
+            if role is not None:
+                self._add[role.id] = role
+                self._remove.discard(role.id)
+        return self
+
+    def remove_roles(self, *roles: disnake.Role | None) -> "MemberMutation":
+        for role in roles:
+            if role is not None:
+                self._remove.add(role.id)
+                self._add.pop(role.id, None)
+        return self
+
+    def set_nick(self, nick: str) -> bool:
+        """Queue the nickname, returns False if Discord would reject its length"""
+        if len(nick) > NICK_MAX_LENGTH:
+            return False
+        self._nick = nick
+        return True
+
+    @property
+    def roles(self) -> list[disnake.Role]:
+        """Final role set of the member, @everyone is implied"""
+        roles = {role.id: role for role in self.member.roles
+                 if not role.is_default() and role.id not in self._remove}
+        roles.update(self._add)
+        return list(roles.values())
+
+    @property
+    def roles_changed(self) -> bool:
+        current = {role.id for role in self.member.roles if not role.is_default()}
+        return current != {role.id for role in self.roles}
+
+    async def apply(self, reason: str | None = None) -> bool:
+        """Send the changes in one request, returns False if there was nothing to change"""
+        changes = {}
+        if self.roles_changed:
+            changes["roles"] = self.roles
+        if self._nick is not None and self._nick != self.member.nick:
+            changes["nick"] = self._nick
+
+        if not changes:
+            return False
+
+        try:
+            await self.member.edit(**changes, reason=reason)
+        except disnake.Forbidden:
+            # The owner and members above the bot cannot be renamed, the roles still apply
+            if "nick" not in changes:
+                raise
+            self.log.error(f"Could not change the nickname of `{self.member}` to `{changes.pop('nick')}`",
+                           exc_info=True)
+            if not changes:
+                return False
+            await self.member.edit(**changes, reason=reason)
+        return True
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime
 
 import disnake
 
@@ -29,10 +29,18 @@ class Message:
     message_id: int
     user_id: int
     channel_id: int
-    created_date: datetime
+    create_date: date
     content: str
 
 
+@dataclass
+class MessageEdit:
+    """Represents the user_message_edit table"""
+    message_id: int
+    edited_at: datetime
+    diff: list | str
+
+
 @dataclass
 class ThreadMgr:
     """Represents the thread_manager table"""
@@ -72,3 +80,59 @@ class DemoChannel:
         self.channel_present = "👍" if self.channel_obj else "❌"
         self.member_present = "👍" if self.member_obj else "❌"
         self.bot_present = "👍" if self.bot_obj else "❌"
+
+
+@dataclass
+class CommandAudit:
+    """Represents the command_audit table"""
+    invoked_at: datetime
+    user_id: int
+    user_name: str
+    channel_id: int
+    command: str
+    options: dict[str, str]
+
+
+@dataclass
+class PerfMetric:
+    """Represents the perf_metrics table, durations are in milliseconds"""
+    kind: str
+    name: str
+    calls: int
+    errors: int
+    wall_p50: float
+    wall_p95: float
+    wall_max: float
+    first_response_p95: float
+    db_mean: float
+    api_mean: float
+
+
+@dataclass
+class BotOwner:
+    """Represents the bot_owners table"""
+    bot_id: int
+    name: str
+    owner_id: int
+    channel_id: int
+    monitor: bool
+    email: str | None
+
+
+@dataclass
+class UptimeDay:
+    """Represents the bot_uptime_daily table"""
+    bot_id: int
+    day: date
+    down_seconds: float
+    recoveries: int
+    repair_seconds: float
+
+
+@dataclass
+class MaintenanceWindow:
+    """Represents the api_maintenance table"""
+    start_time: datetime
+    end_time: datetime | None
+    duration_seconds: float | None
+    source: str
@@ -0,0 +1,55 @@
+"""
+Rate paced execution of Discord actions. Bulk clean ups queue their API calls
+here instead of firing them all at once, the queue runs them one at a time
+with a minimum interval so a large batch never hits the rate limits.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+
+@dataclass
+class Action:
+    description: str
+    run: Callable[[], Awaitable[Any]]
+
+    # What the action is done for, e.g. the row to clean up once it succeeded
+    key: Any = None
+
+
+class PacedQueue:
+    def __init__(self, per_second: float, log: logging.Logger) -> None:
+        self.interval = 1 / per_second
+        self.log = log
+        self.actions: list[Action] = []
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def add(self, description: str, run: Callable[[], Awaitable[Any]], key: Any = None) -> None:
+        self.actions.append(Action(description, run, key))
+
+    async def drain(self) -> tuple[list[Action], list[Action]]:
+        """Run the queued actions in order, returns the done and failed actions"""
+        done = []
+        failed = []
+        actions, self.actions = self.actions, []
+
+        last = 0.0
+        for action in actions:
+            wait = last + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last = time.monotonic()
+
+            try:
+                await action.run()
+            except Exception:
+                self.log.error(f"Paced action failed: {action.description}", exc_info=True)
+                failed.append(action)
+            else:
+                done.append(action)
+
+        return done, failed
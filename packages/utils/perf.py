@@ -0,0 +1,202 @@
+"""
+Latency instrumentation for slash commands, component callbacks and event
+listeners. Each handler invocation opens a span stored in a context variable
+so that the Discord HTTP client and the database helpers can attribute
+their time to the handler that caused it. Finished spans are folded into
+in-memory histograms.
+
+A span belongs to the task that opened it. The tasks a handler starts copy
+its context, they see the span but do not add their time to it.
+"""
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from . import models
+
+# Interaction responses (send_message, defer, modals) hit this route of the webhook adapter
+INTERACTION_CALLBACK = "/interactions/{webhook_id}/{webhook_token}/callback"
+
+# Upper bounds of the histogram buckets in milliseconds
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+@dataclass
+class Span:
+    kind: str
+    name: str
+    start: float = field(default_factory=time.perf_counter)
+    first_response: float | None = None
+    db: float = 0.0
+    api: float = 0.0
+    task: asyncio.Task | None = field(default_factory=asyncio.current_task)
+
+
+_current_span: ContextVar[Span | None] = ContextVar("perf_span", default=None)
+
+
+def _active_span() -> Span | None:
+    """The span opened by the current task, not one inherited from the task that started it"""
+    span = _current_span.get()
+    if span is None or span.task is not asyncio.current_task():
+        return None
+    return span
+
+
+class Histogram:
+    """Fixed bucket histogram of durations in milliseconds"""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Return the upper bound of the bucket holding the percentile"""
+        if not self.count:
+            return 0.0
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max
+        return self.max
+
+
+class HandlerStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.wall = Histogram()
+        self.first_response = Histogram()
+        self.db = Histogram()
+        self.api = Histogram()
+
+    def add(self, span: Span, wall: float) -> None:
+        self.calls += 1
+        self.wall.add(wall * 1000)
+        self.db.add(span.db * 1000)
+        self.api.add(span.api * 1000)
+        if span.first_response is not None:
+            self.first_response.add((span.first_response - span.start) * 1000)
+
+
+class PerfRecorder:
+    def __init__(self) -> None:
+        # Stats since start up for /perf and stats since the last flush
+        self.stats: dict[tuple[str, str], HandlerStats] = {}
+        self.interval: dict[tuple[str, str], HandlerStats] = {}
+
+    def _get(self, key: tuple[str, str]) -> tuple[HandlerStats, HandlerStats]:
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = HandlerStats()
+
+        interval = self.interval.get(key)
+        if interval is None:
+            interval = self.interval[key] = HandlerStats()
+
+        return stats, interval
+
+    def start(self, kind: str, name: str) -> Span:
+        """Open a span for the current task"""
+        span = Span(kind=kind, name=name)
+        _current_span.set(span)
+        return span
+
+    def finish(self, span: Span | None = None) -> None:
+        """Close the span and record it"""
+        span = span or _current_span.get()
+        if span is None:
+            return
+
+        wall = time.perf_counter() - span.start
+        for stats in self._get((span.kind, span.name)):
+            stats.add(span, wall)
+        _current_span.set(None)
+
+    def record_error(self, kind: str, name: str) -> None:
+        for stats in self._get((kind, name)):
+            stats.errors += 1
+
+    @contextmanager
+    def track(self, kind: str, name: str) -> Iterator[Span]:
+        span = self.start(kind, name)
+        try:
+            yield span
+        except Exception:
+            self.record_error(kind, name)
+            raise
+        finally:
+            self.finish(span)
+
+    def drain_interval(self) -> dict[tuple[str, str], HandlerStats]:
+        """Return the stats since the last drain and reset them"""
+        interval, self.interval = self.interval, {}
+        return interval
+
+    def wrap_request(self, request: Callable) -> Callable:
+        """
+        Wrap the request of the Discord HTTPClient or of the webhook adapter
+        to attribute the API time to the current span. The interaction
+        responses and followups only go through the webhook adapter, the
+        first interaction callback is the time to first response.
+        """
+        async def timed_request(route: Any, *args, **kwargs) -> Any:
+            span = _active_span()
+            if span is None:
+                return await request(route, *args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return await request(route, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                span.api += end - start
+                if span.first_response is None and route.path == INTERACTION_CALLBACK:
+                    span.first_response = end
+
+        return timed_request
+
+
+def to_metrics(stats: dict[tuple[str, str], HandlerStats]) -> list[models.PerfMetric]:
+    """Summarize the histograms of each handler"""
+    return [
+        models.PerfMetric(
+            kind=kind,
+            name=name,
+            calls=handler.calls,
+            errors=handler.errors,
+            wall_p50=handler.wall.percentile(50),
+            wall_p95=handler.wall.percentile(95),
+            wall_max=handler.wall.max,
+            first_response_p95=handler.first_response.percentile(95),
+            db_mean=handler.db.mean,
+            api_mean=handler.api.mean
+        )
+        for (kind, name), handler in stats.items()
+    ]
+
+
+def add_db_time(seconds: float) -> None:
+    """Attribute database time to the current span"""
+    span = _active_span()
+    if span is not None:
+        span.db += seconds
@@ -0,0 +1,92 @@
+"""
+Join-wave raid detection. The joins of the last `window_seconds` are kept in
+a deque, when they reach the threshold the tracker switches into raid mode
+and every join from then on is captured in the raid cohort. The raid ends
+once the join rate stayed under the threshold for `calm_seconds`.
+
+While a raid is on the joins are not reported one by one, the cohort is
+summarized in one rolling embed with an account-age histogram.
+"""
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import disnake
+
+# Upper bound in days of each account-age bucket
+AGE_BUCKETS = (("< 1 day", 1), ("< 1 week", 7), ("< 1 month", 30), ("< 1 year", 365), ("Older", None))
+
+
+@dataclass
+class Join:
+    member_id: int
+    name: str
+    account_age_days: float
+    bot: bool
+    joined: float
+
+
+def age_histogram(joins: list[Join]) -> list[tuple[str, int]]:
+    counts = {label: 0 for label, _ in AGE_BUCKETS}
+    for join in joins:
+        for label, days in AGE_BUCKETS:
+            if days is None or join.account_age_days < days:
+                counts[label] += 1
+                break
+    return list(counts.items())
+
+
+class JoinTracker:
+    def __init__(self, window_seconds: float, threshold: int, calm_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+        self.calm_seconds = calm_seconds
+
+        self.window: deque[Join] = deque()
+        self.started_at: datetime | None = None
+        # A new dict per raid, the summary view of a raid keeps its own cohort
+        self.cohort: dict[int, Join] = {}
+        self._last_above = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.started_at is not None
+
+    def _expire(self, now: float) -> None:
+        while self.window and now - self.window[0].joined > self.window_seconds:
+            self.window.popleft()
+
+    def observe(self, member: disnake.Member, now: float | None = None) -> bool:
+        """Record the join, returns True if it is part of a raid"""
+        now = time.monotonic() if now is None else now
+        join = Join(member_id=member.id,
+                    name=str(member),
+                    account_age_days=(datetime.now(timezone.utc) - member.created_at).total_seconds() / 86400,
+                    bot=member.bot,
+                    joined=now)
+
+        self.window.append(join)
+        self._expire(now)
+
+        if len(self.window) >= self.threshold:
+            self._last_above = now
+            if not self.active:
+                # The joins that tripped the threshold are part of the raid
+                self.started_at = datetime.now(timezone.utc)
+                self.cohort = {join.member_id: join for join in self.window}
+
+        if self.active:
+            self.cohort[join.member_id] = join
+        return self.active
+
+    def check_calm(self, now: float | None = None) -> bool:
+        """End the raid once the joins calmed down, returns True if it ended"""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if not self.active or now - self._last_above < self.calm_seconds:
+            return False
+
+        self.started_at = None
+        self.cohort = {}
+        return True
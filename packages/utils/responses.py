@@ -0,0 +1,74 @@
+"""
+Canned answers of packages/config/responses.json. Each entry becomes a
+slash command, its embeds are built once when the file is loaded and every
+call sends the same prebuilt embeds.
+
+A reload builds the whole registry aside and swaps it in with a single
+assignment, the commands either see the old answers or the new ones.
+"""
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import disnake
+
+from . import embeds as embed_engine
+from .utils import EmbedColor
+
+# Discord rules for the name and description of a slash command
+COMMAND_NAME = re.compile(r"^[a-z0-9_-]{1,32}$")
+DESCRIPTION_MAX = 100
+
+
+@dataclass
+class StaticResponse:
+    name: str
+    description: str
+    embeds: list[disnake.Embed]
+
+
+def load_responses(path: Path) -> dict[str, StaticResponse]:
+    """Parse and render the responses, raises KeyError or ValueError on an invalid entry"""
+    with path.open("rt", encoding="utf-8") as infile:
+        conf = json.load(infile)
+
+    responses = {}
+    for name, entry in conf.items():
+        if not COMMAND_NAME.match(name):
+            raise ValueError(f"`{name}` is not a valid slash command name")
+
+        description = entry.get("description", "")
+        if not 0 < len(description) <= DESCRIPTION_MAX:
+            raise ValueError(f"`{name}` needs a description of 1 to {DESCRIPTION_MAX} characters")
+
+        embeds = embed_engine.build_embeds([entry["panel"]],
+                                           title=entry.get("title", ""),
+                                           color=EmbedColor[entry.get("color", "INFO")])
+        if not 0 < len(embeds) <= embed_engine.EMBED_SEND_TOTAL or \
+                sum(len(embed) for embed in embeds) > embed_engine.EMBED_TOTAL:
+            raise ValueError(f"`{name}` does not fit in one message")
+
+        responses[name] = StaticResponse(name=name, description=description, embeds=embeds)
+    return responses
+
+
+class ResponseRegistry:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.responses: dict[str, StaticResponse] = {}
+
+    def get(self, name: str) -> StaticResponse | None:
+        return self.responses.get(name)
+
+    def reload(self) -> tuple[set[str], set[str]]:
+        """
+        Swap in the responses of the file, returns the added and removed
+        names. Raises OSError, ValueError or KeyError and keeps the current
+        responses if the file is missing or invalid.
+        """
+        responses = load_responses(self.path)
+        added = responses.keys() - self.responses.keys()
+        removed = self.responses.keys() - responses.keys()
+        self.responses = responses
+        return added, removed
@@ -0,0 +1,121 @@
+"""
+Message content scanner. Every rule of packages/config/scanner.json becomes
+a named group of one combined regular expression, a message is scanned in a
+single pass whatever the number of rules and patterns. The match tells which
+rule it belongs to through the name of its group.
+
+Rule types:
+
+    regex       the patterns are regular expressions
+    domain      the patterns are domains, their subdomains match as well
+    keyword     the patterns are words or phrases, case insensitive
+
+A reload compiles the new expression first and only swaps it in when the
+whole file is valid, a broken edit keeps the previous rules running.
+"""
+import json
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+
+
+class ScanAction(Enum):
+    DELETE = "delete"
+    ALERT = "alert"
+
+
+@dataclass
+class ScanRule:
+    name: str
+    kind: str
+    action: ScanAction
+    patterns: list[str]
+
+    # Lower case matches that are let through, e.g. the invite of this server
+    allow: set[str] = field(default_factory=set)
+
+    def expression(self) -> str:
+        if self.kind == "regex":
+            return "|".join(f"(?:{pattern})" for pattern in self.patterns)
+        if self.kind == "domain":
+            domains = "|".join(re.escape(pattern) for pattern in self.patterns)
+            return rf"(?<![\w.-])(?:[\w-]+\.)*(?:{domains})(?![\w-])"
+        if self.kind == "keyword":
+            keywords = "|".join(r"\s+".join(map(re.escape, pattern.split()))
+                                for pattern in self.patterns)
+            return rf"\b(?:{keywords})\b"
+        raise ValueError(f"Rule `{self.name}` has an unknown type `{self.kind}`")
+
+
+@dataclass
+class ScanHit:
+    rule: ScanRule
+    match: str
+
+
+def load_rules(path: Path) -> list[ScanRule]:
+    with path.open("rt", encoding="utf-8") as infile:
+        conf = json.load(infile)
+
+    rules = []
+    for name, rule in conf["rules"].items():
+        if not rule["patterns"]:
+            continue
+        rules.append(ScanRule(name=name,
+                              kind=rule["type"],
+                              action=ScanAction(rule.get("action", "alert")),
+                              patterns=rule["patterns"],
+                              allow={allowed.lower() for allowed in rule.get("allow", [])}))
+    return rules
+
+
+def compile_rules(rules: list[ScanRule]) -> re.Pattern | None:
+    """One alternation with a named group per rule, group names are positional"""
+    if not rules:
+        return None
+    return re.compile("|".join(f"(?P<r{index}>{rule.expression()})"
+                               for index, rule in enumerate(rules)),
+                      re.IGNORECASE)
+
+
+class ContentScanner:
+    def __init__(self, path: Path, log: logging.Logger) -> None:
+        self.path = path
+        self.log = log
+        self.rules: list[ScanRule] = []
+        self.hits: Counter[str] = Counter()
+        self._pattern: re.Pattern | None = None
+
+    def reload(self) -> int:
+        """
+        Load and compile the rules, returns the number of rules. Raises
+        OSError, ValueError or re.error and keeps the current rules if the
+        file is missing or invalid.
+        """
+        rules = load_rules(self.path)
+        pattern = compile_rules(rules)
+
+        self.rules, self._pattern = rules, pattern
+        # Keep the counters of the rules that survived the reload
+        self.hits = Counter({name: count for name, count in self.hits.items()
+                             if any(rule.name == name for rule in rules)})
+        self.log.info(f"Content scanner loaded {len(rules)} rules")
+        return len(rules)
+
+    def scan(self, content: str) -> list[ScanHit]:
+        """Return the first match of each rule found in the content"""
+        if self._pattern is None or not content:
+            return []
+
+        hits: dict[str, ScanHit] = {}
+        for match in self._pattern.finditer(content):
+            rule = self.rules[int(match.lastgroup[1:])]
+            text = match.group()
+            if rule.name in hits or text.lower() in rule.allow:
+                continue
+            hits[rule.name] = ScanHit(rule, text)
+            self.hits[rule.name] += 1
+        return list(hits.values())
@@ -0,0 +1,108 @@
+"""
+Append-only segment log on local disk. Records are tagged with a kind and
+written with the length prefixed format of the spool to numbered segment
+files. Appending is a single buffered write followed by a flush to the OS, so
+it is cheap enough to be done synchronously from gateway event handlers.
+
+The active segment is sealed when it grows past the segment size or when a
+consumer asks for it. Sealed segments are read back in order and removed once
+the consumer has committed them, or set aside if they cannot be consumed.
+Segments left behind by a previous run are treated as sealed.
+
+The pending segments are capped at `max_bytes`, past that new records are
+dropped and counted so that a long outage cannot fill the disk.
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from .spool import encode_record, read_records
+
+SUFFIX = ".seg"
+
+
+class SegmentLog:
+    def __init__(self, directory: Path, segment_bytes: int, max_bytes: int, log: logging.Logger) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.log = log
+        self.dropped = 0
+        self._overflowing = False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sealed = sorted(self.directory.glob(f"*{SUFFIX}"))
+        self._sealed_size = sum(path.stat().st_size for path in self._sealed)
+        self._next_id = int(self._sealed[-1].stem) + 1 if self._sealed else 0
+
+        self._file: BinaryIO | None = None
+        self._size = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of segments waiting to be consumed, the active one included"""
+        return len(self._sealed) + (1 if self._size else 0)
+
+    def append(self, kind: str, payload: Any) -> bool:
+        """Append a record, returns False if the backlog is full and it was dropped"""
+        data = encode_record((kind, payload))
+        if self._sealed_size + self._size + len(data) > self.max_bytes:
+            if not self._overflowing:
+                self._overflowing = True
+                self.log.error(f"Segment log `{self.directory}` is full, dropping records")
+            self.dropped += 1
+            return False
+
+        if self._file is None:
+            path = self.directory / f"{self._next_id:012d}{SUFFIX}"
+            self._next_id += 1
+            self._file = path.open("ab")
+
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+        if self._size >= self.segment_bytes:
+            self._roll()
+        return True
+
+    def _roll(self) -> None:
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._sealed.append(Path(self._file.name))
+        self._sealed_size += self._size
+        self._file = None
+        self._size = 0
+
+    def seal(self) -> list[Path]:
+        """Seal the active segment and return every segment ready to be consumed"""
+        if self._size:
+            self._roll()
+        return list(self._sealed)
+
+    @staticmethod
+    def read(path: Path) -> Iterator[tuple[str, Any]]:
+        return read_records(path)
+
+    def _release(self, path: Path) -> None:
+        self._sealed.remove(path)
+        self._sealed_size -= path.stat().st_size if path.exists() else 0
+        self._overflowing = False
+
+    def commit(self, path: Path) -> None:
+        """Remove a segment once its records are safely stored"""
+        self._release(path)
+        path.unlink(missing_ok=True)
+
+    def quarantine(self, path: Path) -> Path:
+        """Set aside a segment that cannot be consumed for inspection"""
+        self._release(path)
+        failed = path.with_suffix(f"{SUFFIX}.failed")
+        os.replace(path, failed)
+        return failed
+
+    def close(self) -> None:
+        self._roll()
@@ -0,0 +1,160 @@
+"""
+Spam detection on the message hot path. Every message costs a constant
+amount of work: each sliding window only keeps the timestamps and authors
+of the last `limit` messages of its key, so a window trips when it is full
+and its oldest entry is still inside the window.
+
+Three windows are kept:
+
+    user        messages of one author, in any channel
+    channel     messages in one channel, from anyone
+    duplicate   messages with the same normalized content, from anyone in
+                any channel, copy-paste floods and raids posting one text
+
+A tripped window opens an incident with every author in the window as an
+offender, the whole burst of a copy-paste flood is handled at once. Messages
+tripping it again while it is open only extend it, so the moderators get one
+alert per incident and each offender is handled once. Once a copy-paste
+incident is open, an author posting its text becomes an offender on the
+second post, quoting a circulating scam once to warn about it is not spam.
+"""
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+
+
+class SpamKind(Enum):
+    USER = "message flood"
+    CHANNEL = "channel flood"
+    DUPLICATE = "copy-paste flood"
+
+
+@dataclass
+class Incident:
+    kind: SpamKind
+    key: int
+    started: float
+    last_seen: float
+    messages: int = 0
+    offenders: set[int] = field(default_factory=set)
+    channels: set[int] = field(default_factory=set)
+
+    # Authors that posted the text of a copy-paste incident once
+    posters: set[int] = field(default_factory=set)
+
+
+@dataclass
+class Hit:
+    incident: Incident
+
+    # First hit of the incident, the moderators are alerted once
+    new_incident: bool
+
+    # Authors caught for the first time in this incident
+    new_offenders: set[int]
+
+
+class SlidingWindow:
+    """Per key timestamps and authors of the last `limit` events"""
+
+    def __init__(self, seconds: float, limit: int) -> None:
+        self.seconds = seconds
+        self.limit = limit
+        self._events: dict[int, deque[tuple[float, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(self, key: int, now: float, author_id: int) -> bool:
+        """Record an event, returns True if the key went over its limit"""
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.limit)
+        events.append((now, author_id))
+        return len(events) == self.limit and now - events[0][0] <= self.seconds
+
+    def authors(self, key: int) -> set[int]:
+        return {author_id for _, author_id in self._events.get(key, ())}
+
+    def prune(self, now: float) -> None:
+        """Forget the keys without an event in the window"""
+        self._events = {key: events for key, events in self._events.items()
+                        if now - events[-1][0] <= self.seconds}
+
+
+class SpamDetector:
+    # Messages between two clean ups of the idle windows and incidents
+    PRUNE_EVERY = 1000
+
+    def __init__(self,
+                 window_seconds: float,
+                 user_messages: int,
+                 channel_messages: int,
+                 duplicate_messages: int,
+                 duplicate_min_length: int,
+                 incident_seconds: float) -> None:
+        self.duplicate_min_length = duplicate_min_length
+        self.incident_seconds = incident_seconds
+        self.windows = {
+            SpamKind.USER: SlidingWindow(window_seconds, user_messages),
+            SpamKind.CHANNEL: SlidingWindow(window_seconds, channel_messages),
+            SpamKind.DUPLICATE: SlidingWindow(window_seconds, duplicate_messages),
+        }
+        self.incidents: dict[tuple[SpamKind, int], Incident] = {}
+        self._seen = 0
+
+    @staticmethod
+    def content_hash(content: str) -> int:
+        """Hash of the content ignoring the case and the whitespace"""
+        return hash(" ".join(content.lower().split()))
+
+    def observe(self, author_id: int, channel_id: int, content: str,
+                now: float | None = None) -> list[Hit]:
+        """Feed a message to the windows, returns the incidents it belongs to"""
+        now = time.monotonic() if now is None else now
+
+        keys = {SpamKind.USER: author_id, SpamKind.CHANNEL: channel_id}
+        if len(content) >= self.duplicate_min_length:
+            keys[SpamKind.DUPLICATE] = self.content_hash(content)
+
+        hits = []
+        for kind, key in keys.items():
+            tripped = self.windows[kind].add(key, now, author_id)
+            incident = self.incidents.get((kind, key))
+            if incident is not None and now - incident.last_seen > self.incident_seconds:
+                del self.incidents[(kind, key)]
+                incident = None
+
+            if incident is None and not tripped:
+                continue
+
+            new_incident = incident is None
+            if new_incident:
+                incident = self.incidents[(kind, key)] = Incident(kind, key, started=now, last_seen=now)
+                new_offenders = self.windows[kind].authors(key)
+            elif author_id in incident.offenders:
+                new_offenders = set()
+            elif kind == SpamKind.DUPLICATE and author_id not in incident.posters:
+                incident.posters.add(author_id)
+                new_offenders = set()
+            else:
+                new_offenders = {author_id}
+
+            incident.last_seen = now
+            incident.messages += 1
+            incident.offenders.update(new_offenders)
+            incident.channels.add(channel_id)
+            hits.append(Hit(incident, new_incident, new_offenders))
+
+        self._seen += 1
+        if self._seen % self.PRUNE_EVERY == 0:
+            self.prune(now)
+
+        return hits
+
+    def prune(self, now: float) -> None:
+        for window in self.windows.values():
+            window.prune(now)
+        self.incidents = {key: incident for key, incident in self.incidents.items()
+                          if now - incident.last_seen <= self.incident_seconds}
@@ -0,0 +1,91 @@
+"""
+Bounded, file backed queue used to hold database writes while Postgres is
+unreachable. Records are pickled and stored with a 4 byte length prefix so the
+file can be appended to cheaply and read back in order.
+"""
+import logging
+import os
+import pickle
+import struct
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+_HEADER = struct.Struct(">I")
+
+
+def encode_record(record: Any) -> bytes:
+    """Pickle the record behind its length prefix"""
+    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload)) + payload
+
+
+def read_records(path: Path) -> Iterator[Any]:
+    """Yield the records of a length prefixed file, a torn tail is ignored"""
+    with path.open("rb") as infile:
+        while True:
+            header = infile.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+
+            (size,) = _HEADER.unpack(header)
+            payload = infile.read(size)
+            if len(payload) < size:
+                return
+
+            yield pickle.loads(payload)
+
+
+class Spool:
+    def __init__(self, path: Path, max_bytes: int, log: logging.Logger) -> None:
+        self.path = path
+        self.replay_path = path.with_suffix(f"{path.suffix}.replay")
+        self.max_bytes = max_bytes
+        self.log = log
+        self.dropped = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._size = self.path.stat().st_size if self.path.exists() else 0
+
+    @property
+    def pending(self) -> bool:
+        return self._size > 0 or self.replay_path.exists()
+
+    def append(self, record: Any) -> bool:
+        """Append the record, returns False if the spool is full"""
+        data = encode_record(record)
+        if self._size + len(data) > self.max_bytes:
+            self.dropped += 1
+            self.log.error(f"Spool `{self.path}` is full, dropped a record")
+            return False
+
+        with self.path.open("ab") as outfile:
+            outfile.write(data)
+        self._size += len(data)
+        return True
+
+    def seal(self) -> Path | None:
+        """
+        Move the records aside for replay so that new records can keep being
+        appended while the sealed ones are replayed. A sealed file left over by
+        a failed replay is returned first.
+        """
+        if self.replay_path.exists():
+            return self.replay_path
+
+        if not self._size:
+            return None
+
+        os.replace(self.path, self.replay_path)
+        self._size = 0
+        return self.replay_path
+
+    def quarantine(self) -> Path:
+        """Set aside sealed records that cannot be replayed for inspection"""
+        failed = self.path.with_suffix(f"{self.path.suffix}.{int(time.time())}.failed")
+        os.replace(self.replay_path, failed)
+        return failed
+
+    def commit(self) -> None:
+        """Remove the sealed records once they have been replayed"""
+        self.replay_path.unlink(missing_ok=True)
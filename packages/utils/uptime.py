@@ -0,0 +1,186 @@
+"""
+In-memory presence tracking for the monitored demo bots. Each bot moves
+through a small state machine:
+
+    ONLINE -> SUSPECT      went offline, confirmation deadline scheduled
+    SUSPECT -> ONLINE      came back before the deadline, nothing is stored
+    SUSPECT -> DOWN        still offline at the deadline, outage is stored
+    DOWN -> RECOVERED      came back, outage is closed
+    RECOVERED -> SUSPECT   went offline again
+
+Only the SUSPECT -> DOWN and DOWN -> RECOVERED transitions touch the
+database, so a storm of presence updates costs a dict lookup each. All the
+confirmation deadlines share one scheduler task instead of one sleeping
+coroutine per bot.
+
+Closed outages are added to per bot daily rollups when the bot recovers, the
+availability reports read at most one rollup row per day.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta, timezone
+from enum import Enum
+from typing import Awaitable, Callable
+
+from . import models
+
+
+class BotState(Enum):
+    ONLINE = "online"
+    SUSPECT = "suspect"
+    DOWN = "down"
+    RECOVERED = "recovered"
+
+
+@dataclass
+class TrackedBot:
+    owner: models.BotOwner
+    state: BotState = BotState.ONLINE
+
+    # First seen offline while SUSPECT, start of the outage while DOWN
+    offline_start: datetime | None = None
+
+
+@dataclass
+class Availability:
+    window: str
+    uptime: float
+    recoveries: int
+
+    # Mean time to recovery in seconds, None without any recovery
+    mttr: float | None
+
+
+# Reported windows in calendar days, today included
+WINDOWS = (("1d", 1), ("7d", 7), ("30d", 30))
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, the downtime tables store naive timestamps"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_time(seconds: float) -> str:
+    d, r = divmod(seconds, 86400)
+    h, r = divmod(r, 3600)
+    m, s = divmod(r, 60)
+    if d > 0:
+        return f"{d:.0f}d {h:.0f}h"
+    elif h > 0:
+        return f"{h:.0f}h {m:.0f}m"
+    else:
+        return f"{m:.0f}m {s:.0f}s"
+
+
+def outage_rollups(bot_id: int, start: datetime, end: datetime) -> list[models.UptimeDay]:
+    """Split an outage over the days it covers, the recovery counts on the day it ended"""
+    days = []
+    cursor = start
+    while cursor < end:
+        midnight = datetime.combine(cursor.date() + timedelta(days=1), dt_time.min)
+        chunk_end = min(end, midnight)
+        days.append(models.UptimeDay(bot_id=bot_id,
+                                     day=cursor.date(),
+                                     down_seconds=(chunk_end - cursor).total_seconds(),
+                                     recoveries=0,
+                                     repair_seconds=0.0))
+        cursor = chunk_end
+
+    if not days:
+        days.append(models.UptimeDay(bot_id=bot_id, day=end.date(), down_seconds=0.0,
+                                     recoveries=0, repair_seconds=0.0))
+
+    days[-1].recoveries = 1
+    days[-1].repair_seconds = (end - start).total_seconds()
+    return days
+
+
+def availability(rollups: list[models.UptimeDay],
+                 now: datetime,
+                 ongoing_start: datetime | None = None) -> list[Availability]:
+    """Compute the availability over each window from the daily rollups"""
+    results = []
+    for label, days in WINDOWS:
+        first_day = now.date() - timedelta(days=days - 1)
+        window_start = datetime.combine(first_day, dt_time.min)
+        elapsed = (now - window_start).total_seconds()
+
+        window = [rollup for rollup in rollups if rollup.day >= first_day]
+        down = sum(rollup.down_seconds for rollup in window)
+        recoveries = sum(rollup.recoveries for rollup in window)
+        repair = sum(rollup.repair_seconds for rollup in window)
+
+        # The current outage is not in the rollups until the bot recovers
+        if ongoing_start is not None:
+            down += (now - max(ongoing_start, window_start)).total_seconds()
+
+        results.append(Availability(
+            window=label,
+            uptime=max(0.0, 100 * (1 - down / elapsed)) if elapsed > 0 else 100.0,
+            recoveries=recoveries,
+            mttr=repair / recoveries if recoveries else None
+        ))
+    return results
+
+
+class DeadlineScheduler:
+    """
+    Run a callback for a key once its deadline passes. A single task sleeps
+    until the earliest deadline, rescheduling or cancelling a key only
+    replaces its entry in a dict and stale heap entries are skipped.
+    """
+
+    def __init__(self, callback: Callable[[int], Awaitable[None]], log: logging.Logger) -> None:
+        self.callback = callback
+        self.log = log
+        self._deadlines: dict[int, float] = {}
+        self._heap: list[tuple[float, int]] = []
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def schedule(self, key: int, delay: float) -> None:
+        deadline = time.monotonic() + delay
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        self._wake.set()
+
+    def cancel(self, key: int) -> None:
+        self._deadlines.pop(key, None)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+
+            while self._heap:
+                deadline, key = self._heap[0]
+                if self._deadlines.get(key) != deadline:
+                    # Cancelled or rescheduled
+                    heapq.heappop(self._heap)
+                    continue
+
+                if deadline > time.monotonic():
+                    break
+
+                heapq.heappop(self._heap)
+                del self._deadlines[key]
+                try:
+                    await self.callback(key)
+                except Exception:
+                    self.log.error(f"Deadline callback failed for `{key}`", exc_info=True)
+
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -78,7 +78,7 @@ async def kick_user(bot: "BotClient",
     mod_log = bot.get_channel(
         bot.settings.get_channel("mod-log"))
 
-    await bot.inter_send(
+    bot.queue_send(
         mod_log,
         title=f"Member has been kicked by `HogRider`",
         panel=f"**Reason:**\n{reason}",
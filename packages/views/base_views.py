@@ -20,6 +20,17 @@ class BaseView(disnake.ui.View):
         self.log = getLogger(f"{self.bot.settings.log_name}.{self.cls_name}")
         self.custom_id = kwargs.get("custom_id")
 
+    @staticmethod
+    def _perf_name(item: disnake.ui.Item) -> str:
+        return (getattr(item, "label", None) or getattr(item, "placeholder", None) or
+                item.__class__.__name__)
+
+    async def _scheduled_task(self, item: disnake.ui.Item,
+                              inter: disnake.MessageInteraction):
+        """Override of disnake.ui.View._scheduled_task to time the callbacks"""
+        with self.bot.perf.track("component", f"{self.cls_name}.{self._perf_name(item)}"):
+            await super()._scheduled_task(item, inter)
+
     async def on_timeout(self) -> None:
         self.log.warning("View has timed out")
 
@@ -33,5 +44,6 @@ class BaseView(disnake.ui.View):
                                        error.__traceback__,
                                        chain=True))
 
+        self.bot.perf.record_error("component", f"{self.cls_name}.{self._perf_name(item)}")
         self.log.error(
             f"**ui.View Error**\n\nItem: {item}\n\n```\n{err_msg}\n```")
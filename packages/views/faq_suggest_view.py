@@ -0,0 +1,29 @@
+from typing import TYPE_CHECKING
+
+import disnake
+
+from .base_views import BaseView
+from ..utils.faq import FaqDocument
+
+if TYPE_CHECKING:
+    from bot import BotClient
+
+
+class FaqSuggestView(BaseView):
+    """
+    Button attached to a FAQ suggestion, anyone can open the FAQ privately
+    so the channel only ever shows the one line suggestion.
+    """
+
+    def __init__(self, bot: "BotClient", document: FaqDocument, timeout: float = 3600):
+        super().__init__(bot, timeout=timeout)
+        self.document = document
+        self.show_faq.label = f"Show: {document.title}"[:80]
+
+    async def on_timeout(self) -> None:
+        pass
+
+    @disnake.ui.button(label="Show FAQ", emoji="📖", style=disnake.ButtonStyle.blurple)
+    async def show_faq(self, button: disnake.ui.Button,
+                       inter: disnake.MessageInteraction):
+        await inter.response.send_message(embeds=self.document.embeds, ephemeral=True)
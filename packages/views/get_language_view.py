@@ -8,6 +8,7 @@ from typing import TYPE_CHECKING
 import disnake
 
 from packages.utils import models
+from packages.utils.members import MemberMutation
 
 if TYPE_CHECKING:
     from bot import BotClient
@@ -87,8 +88,10 @@ class LanguageSelector(disnake.ui.StringSelect):
     async def callback(self, inter: disnake.MessageInteraction):
         add_roles, rm_roles = await self._get_langs()
 
-        await inter.user.remove_roles(*[role.role for role in rm_roles])
-        await inter.user.add_roles(*[role.role for role in add_roles])
+        mutation = MemberMutation(inter.user, self.log)
+        mutation.remove_roles(*[role.role for role in rm_roles])
+        mutation.add_roles(*[role.role for role in add_roles])
+        await mutation.apply(reason="Language selection")
 
         added = " ".join(role.emoji_repr for role in add_roles)
         added_msg = f"Added: {added}\n" if add_roles else ""
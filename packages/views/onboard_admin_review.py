@@ -6,6 +6,7 @@ import disnake
 from .step31_more_info_view import ApplicantMoreInfo
 from .base_views import BaseView
 from ..utils import models, utils
+from ..utils.members import MemberMutation
 
 if TYPE_CHECKING:
     from bot import BotClient
@@ -65,20 +66,24 @@ class AdminReviewView(BaseView):
         roles = [utils.get_role(self.bot, lang.role_id) for lang in
                  self.langs]
 
-        roles.append(utils.get_role(self.bot, "developer"))
-        applicant_role = utils.get_role(self.bot, "applicant")
+        # The final role set replaces the current one, roles granted since the
+        # application was posted must not be lost
+        self.member = (inter.guild.get_member(self.member.id) or
+                       await inter.guild.fetch_member(self.member.id))
 
-        await self.member.remove_roles(applicant_role)
-        await self.member.add_roles(*roles, atomic=True)
+        # Roles and nickname are applied in a single request
+        mutation = MemberMutation(self.member, self.log)
+        mutation.add_roles(*roles, utils.get_role(self.bot, "developer"))
+        mutation.remove_roles(utils.get_role(self.bot, "applicant"))
 
         old_name = self.member.nick if self.member.nick else self.member.name
 
         if self.primary_lang:
-            try:
-                await self.member.edit(nick=f"{old_name} | {self.primary_lang.role_name}")
-            except disnake.HTTPException:
+            if not mutation.set_nick(f"{old_name} | {self.primary_lang.role_name}"):
                 self.log.critical(f"Could not edit `{self.member}` name due to length")
 
+        await mutation.apply(reason=f"Accepted by {inter.user}")
+
         self.log.error(f"Enrolling {self.member}\nNew Name: `{self.member.nick}`\n"
                        f"New Roles: `{', '.join(i.role_name for i in self.langs)}`")
 
@@ -0,0 +1,93 @@
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+import disnake
+
+from packages.utils import embeds as embed_engine
+from packages.utils.utils import EmbedColor
+from packages.views.base_views import BaseView
+
+if TYPE_CHECKING:
+    from bot import BotClient
+
+# Receives the cursor of the page to render and returns the panel of the page
+# with the cursor of the next page, or None if it is the last page
+PageFetcher = Callable[[Any], Awaitable[tuple[str, Any]]]
+
+
+class Paginator(BaseView):
+    """
+    Page through keyset paginated results. Only the cursor of each visited
+    page is kept, so going back re-runs the query from the saved cursor
+    instead of holding every page in memory.
+    """
+
+    def __init__(self,
+                 bot: "BotClient",
+                 author_id: int,
+                 fetch_page: PageFetcher,
+                 title: str = "",
+                 color: EmbedColor = EmbedColor.INFO,
+                 footer: str = "",
+                 timeout: float = 600):
+        super().__init__(bot, timeout=timeout)
+        self.log = logging.getLogger(f"{self.bot.settings.log_name}.{self.__class__.__name__}")
+        self.author_id = author_id
+        self.fetch_page = fetch_page
+        self.title = title
+        self.color = color
+        self.footer = footer
+
+        self.cursors: list[Any] = [None]
+        self.page = 0
+        self.message: disnake.Message | None = None
+
+    async def _render(self) -> list[disnake.Embed]:
+        panel, next_cursor = await self.fetch_page(self.cursors[self.page])
+
+        # Drop the cursors past this page, the results may have changed
+        del self.cursors[self.page + 1:]
+        if next_cursor is not None:
+            self.cursors.append(next_cursor)
+
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = next_cursor is None
+
+        return embed_engine.build_embeds([panel],
+                                         title=self.title,
+                                         color=self.color,
+                                         footer=" | ".join(filter(None, (
+                                             self.footer, f"Page {self.page + 1}"))))
+
+    async def start(self, inter: disnake.ApplicationCommandInteraction) -> None:
+        """Send the first page as the response to the interaction"""
+        embeds = await self._render()
+        await inter.send(embeds=embeds, view=self)
+        self.message = await inter.original_message()
+
+    async def interaction_check(self, inter: disnake.MessageInteraction) -> bool:
+        if inter.author.id != self.author_id:
+            await inter.response.send_message("Only the user who ran the command can page "
+                                              "through the results", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self) -> None:
+        if self.message is not None:
+            await self.message.edit(view=None)
+
+    async def _show(self, inter: disnake.MessageInteraction, page: int) -> None:
+        await inter.response.defer()
+        self.page = page
+        embeds = await self._render()
+        await inter.edit_original_message(embeds=embeds, view=self)
+
+    @disnake.ui.button(label="Previous", emoji="◀", style=disnake.ButtonStyle.grey)
+    async def previous_page(self, button: disnake.ui.Button,
+                            inter: disnake.MessageInteraction):
+        await self._show(inter, max(self.page - 1, 0))
+
+    @disnake.ui.button(label="Next", emoji="▶", style=disnake.ButtonStyle.grey)
+    async def next_page(self, button: disnake.ui.Button,
+                        inter: disnake.MessageInteraction):
+        await self._show(inter, min(self.page + 1, len(self.cursors) - 1))
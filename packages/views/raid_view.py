@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import disnake
+
+from .base_views import BaseView
+from ..utils.pacing import PacedQueue
+from ..utils.raid import Join
+
+if TYPE_CHECKING:
+    from bot import BotClient
+
+
+class RaidView(BaseView):
+    """
+    Bulk-kick actions attached to the raid summary. The cohort is the dict
+    of the raid, joins captured after the summary was sent are included.
+    """
+
+    def __init__(self, bot: "BotClient", started_at: datetime, cohort: dict[int, Join]) -> None:
+        super().__init__(bot, timeout=None)
+        self.started_at = started_at
+        self.cohort = cohort
+        self.kick_new.label = f"Kick accounts younger than {self.bot.settings.raid_young_days} days"
+
+    async def interaction_check(self, inter: disnake.Interaction):
+        admin_role = self.bot.settings.get_role("admin")
+
+        if inter.user.get_role(admin_role) is None:
+            await inter.send("Only admins can clean up a raid.", ephemeral=True)
+            return False
+
+        return True
+
+    async def _kick(self, inter: disnake.MessageInteraction, joins: list[Join]) -> None:
+        self.log.warning(f"`{inter.user}` is kicking {len(joins)} members of the raid cohort")
+
+        # Once is enough, the kicks are paced and can take a while
+        for child in self.children:
+            child.disabled = True
+        await inter.response.edit_message(view=self)
+
+        queue = PacedQueue(self.bot.settings.raid_kicks_per_second, self.log)
+        for join in joins:
+            member = inter.guild.get_member(join.member_id)
+            if member is None:
+                continue
+            queue.add(f"Kick {member}",
+                      lambda member=member: member.kick(reason=f"Raid clean up by {inter.user}"))
+
+        done, failed = await queue.drain()
+        await inter.followup.send(f"Kicked {len(done)} members of the raid cohort, "
+                                  f"{len(failed)} failed.")
+
+    @disnake.ui.button(label="Kick new accounts", style=disnake.ButtonStyle.red)
+    async def kick_new(self, button: disnake.ui.Button,
+                       inter: disnake.MessageInteraction):
+        young_days = self.bot.settings.raid_young_days
+        await self._kick(inter, [join for join in list(self.cohort.values())
+                                 if join.account_age_days < young_days and not join.bot])
+
+    @disnake.ui.button(label="Kick whole cohort", style=disnake.ButtonStyle.red)
+    async def kick_all(self, button: disnake.ui.Button,
+                       inter: disnake.MessageInteraction):
+        await self._kick(inter, list(self.cohort.values()))